@@ -0,0 +1,11 @@
+"""
+Benchmarks για την εισαγωγή Excel. Τρέχουν ως scripts από τον φάκελο του
+project, π.χ.
+
+    python benchmarks/run_ingestion.py --rows 100000 --output results.json
+
+- generate_workbook: συνθετικά αρχεία με τις ελληνικές επικεφαλίδες
+- run_ingestion:     χρόνος / queries ανά φάση ενός upload, σε JSON
+- bench_excel_reader: pandas έναντι streaming ανάγνωσης
+- bench_bulk_insert:  bulk_create έναντι COPY
+"""
@@ -0,0 +1,85 @@
+"""
+Σύγκριση εισαγωγής νέων εγγραφών: bulk_create (ORM) έναντι COPY
+(main.bulk.insert_people σε PostgreSQL).
+
+Τρέχει σε προσωρινή test βάση (όπως το manage.py test), ώστε να μην
+αγγίζει τα πραγματικά δεδομένα.
+
+    python benchmarks/bench_bulk_insert.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'excel_form_app.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from main.bulk import insert_people  # noqa: E402
+from main.ingestion import CHUNK_SIZE, FIELDS  # noqa: E402
+from main.models import Person  # noqa: E402
+
+
+def _rows(count):
+    for i in range(1, count + 1):
+        values = {field: None for field in FIELDS}
+        values.update(
+            hmeromhnia_eis='2024',
+            syggrafeas='Παπαδόπουλος, Γιάννης',
+            koha='Γιάννης Παπαδόπουλος',
+            titlos=f'Τίτλος βιβλίου {i}',
+            ekdoths='Εκδόσεις Πατάκη',
+            etosEkdoshs='2012',
+            toposEkdoshs='Αθήνα',
+            selides='320',
+            ISBN=str(9789600000000 + i),
+        )
+        yield (i, *(values[field] for field in FIELDS))
+
+
+def _run(count, use_copy):
+    Person.objects.all().delete()
+    with override_settings(INGESTION_USE_COPY=use_copy):
+        started = time.perf_counter()
+        chunk = []
+        for row in _rows(count):
+            chunk.append(row)
+            if len(chunk) >= CHUNK_SIZE:
+                insert_people(chunk)
+                chunk = []
+        insert_people(chunk)
+        elapsed = time.perf_counter() - started
+    assert Person.objects.count() == count
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    if connection.vendor != 'postgresql':
+        print(f"Σημείωση: {connection.vendor} — το COPY υπάρχει μόνο σε PostgreSQL, "
+              "και οι δύο μετρήσεις θα είναι bulk_create.")
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        for count in args.sizes:
+            for label, use_copy in (('bulk_create', False), ('COPY', True)):
+                elapsed = _run(count, use_copy)
+                print(f"{count:>9,} rows  {label:>11}: {elapsed:7.2f}s "
+                      f"({count / elapsed:,.0f} rows/s)")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Σύγκριση ανάγνωσης και καθαρισμού Excel: pd.read_excel + iterrows με
+καθαρισμό ανά κελί (παλιός τρόπος) έναντι του streaming reader και του
+καθαρισμού ανά στήλη του main.ingestion.
+
+Κάθε τρόπος τρέχει σε ξεχωριστή διεργασία ώστε το peak RSS να είναι
+καθαρό.
+
+    python benchmarks/bench_excel_reader.py path/to/file.xlsx
+"""
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _legacy_clean(value):
+    import pandas as pd
+    if pd.isna(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _pandas_rows(path):
+    """Ο παλιός τρόπος: όλο το φύλλο σε DataFrame, iterrows, καθαρισμός ανά κελί."""
+    import pandas as pd
+    from main.ingestion import ID_HEADER, COLUMNS
+    df = pd.read_excel(path)
+    for _, row in df.iterrows():
+        yield tuple(
+            _legacy_clean(row.get(header))
+            for header in [ID_HEADER] + [h for h, _, _ in COLUMNS]
+        )
+
+
+def _streaming_rows(path):
+    from main.ingestion import iter_clean_chunks
+    with open(path, 'rb') as f:
+        for rows in iter_clean_chunks(f):
+            yield from rows
+
+
+MODES = {
+    'pandas': _pandas_rows,
+    'streaming': _streaming_rows,
+}
+
+
+def _run(mode, path, queue):
+    started = time.perf_counter()
+    rows = sum(1 for _ in MODES[mode](path))
+    elapsed = time.perf_counter() - started
+    # ru_maxrss είναι σε KB στο Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    queue.put((rows, elapsed, peak_mb))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path')
+    parser.add_argument('--mode', choices=sorted(MODES), action='append')
+    args = parser.parse_args()
+
+    for mode in args.mode or ['pandas', 'streaming']:
+        queue = multiprocessing.Queue()
+        proc = multiprocessing.Process(target=_run, args=(mode, args.path, queue))
+        proc.start()
+        proc.join()
+        if proc.exitcode:
+            sys.exit(f"{mode}: failed with exit code {proc.exitcode}")
+        rows, elapsed, peak_mb = queue.get()
+        rate = rows / elapsed if elapsed else 0
+        print(f"{mode:>10}: {rows} rows in {elapsed:.2f}s "
+              f"({rate:,.0f} rows/s), peak RSS {peak_mb:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Κρύα εκκίνηση ενός web worker: χρόνος και peak RSS μέχρι να φορτωθούν το
+WSGI application και όλα τα URLconf/views, όπως σε ένα νέο gunicorn
+worker. Κάθε μέτρηση τρέχει σε καινούργια διεργασία Python· κρατιέται η
+διάμεσος του χρόνου και το μέγιστο RSS.
+
+Δείχνει και ποια βαριά modules (pandas, numpy, openpyxl) φορτώθηκαν ήδη
+κατά την εκκίνηση· κανονικά κανένα, αφού χρειάζονται μόνο στο upload.
+
+    python benchmarks/bench_startup.py --repeat 10 --output before.json
+    python benchmarks/bench_startup.py --repeat 10 --compare before.json
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'xlrd')
+
+
+def _child():
+    """Runs in the measured process: starts the application and reports."""
+    started = time.perf_counter()
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'excel_form_app.settings')
+
+    from django.core.wsgi import get_wsgi_application
+    from django.urls import get_resolver
+
+    get_wsgi_application()
+    # Το gunicorn φορτώνει τα URLconf στο πρώτο request· εδώ αμέσως
+    get_resolver().url_patterns
+
+    print(json.dumps({
+        'seconds': time.perf_counter() - started,
+        # ru_maxrss είναι σε KB στο Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'modules': len(sys.modules),
+        'heavy_modules': [name for name in HEAVY_MODULES if name in sys.modules],
+    }))
+
+
+def _measure_once():
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, __file__, '--child'],
+        capture_output=True, text=True, check=True, cwd=PROJECT_DIR,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    # Μαζί με την εκκίνηση του ίδιου του interpreter
+    result['process_seconds'] = time.perf_counter() - started
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=PROJECT_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_comparison(base, result):
+    print(f"Compared with {base.get('commit') or '?'} ({base.get('timestamp', '?')}):")
+
+    def line(label, key, unit):
+        old, new = base[key], result[key]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"  {label:>14}: {old:8.3f}{unit} → {new:8.3f}{unit}  {change}")
+
+    line('import', 'seconds', 's')
+    line('process', 'process_seconds', 's')
+    line('peak RSS', 'peak_rss_mb', 'MB')
+    print(f"  {'heavy modules':>14}: {', '.join(base['heavy_modules']) or '-'} → "
+          f"{', '.join(result['heavy_modules']) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="Write the results to this JSON file.")
+    parser.add_argument('--compare', help="JSON file of an earlier run to compare with.")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child()
+        return
+
+    runs = [_measure_once() for _ in range(args.repeat)]
+    result = {
+        'commit': _git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': args.repeat,
+        'seconds': round(statistics.median(run['seconds'] for run in runs), 3),
+        'process_seconds': round(statistics.median(run['process_seconds'] for run in runs), 3),
+        'peak_rss_mb': round(max(run['peak_rss_mb'] for run in runs), 1),
+        'modules': runs[-1]['modules'],
+        'heavy_modules': runs[-1]['heavy_modules'],
+    }
+
+    print(f"Worker start-up ({args.repeat} runs): {result['seconds']:.3f}s import, "
+          f"{result['process_seconds']:.3f}s with the interpreter, peak RSS {result['peak_rss_mb']:.0f} MB, "
+          f"{result['modules']} modules")
+    print(f"  heavy modules loaded: {', '.join(result['heavy_modules']) or 'none'}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            _print_comparison(json.load(f), result)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""
+Συνθετικά βιβλία εισαγωγών για τα benchmarks, με τις ακριβείς ελληνικές
+επικεφαλίδες του main.ingestion.
+
+Κάθε γραμμή ανήκει σε μία κατηγορία και το ποσοστό της καθεμίας ορίζεται
+από τις παραμέτρους:
+
+- new:       νέος αριθμός εισαγωγής
+- duplicate: υπάρχει ήδη στη βάση με διαφορετικά δεδομένα
+- empty:     υπάρχει ήδη στη βάση ως κενή εγγραφή
+- unchanged: υπάρχει ήδη στη βάση με τα ίδια ακριβώς δεδομένα
+- invalid:   άκυρος αριθμός εισαγωγής (κείμενο, κενό ή 0)
+
+Το ίδιο seed δίνει πάντα το ίδιο αρχείο· seed_database() δημιουργεί τις
+εγγραφές που χρειάζονται οι κατηγορίες duplicate/empty/unchanged.
+
+    python benchmarks/generate_workbook.py out.xlsx --rows 100000 --duplicate-ratio 0.2
+"""
+import argparse
+import csv
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from main.ingestion import COLUMNS, ID_HEADER  # noqa: E402
+
+HEADERS = [ID_HEADER] + [header for header, _, _ in COLUMNS]
+
+NEW = 'new'
+DUPLICATE = 'duplicate'
+EMPTY = 'empty'
+UNCHANGED = 'unchanged'
+INVALID = 'invalid'
+
+SURNAMES = ['Παπαδόπουλος', 'Γεωργίου', 'Νικολάου', 'Οικονόμου', 'Καραγιάννης', 'Ιωάννου']
+NAMES = ['Γιάννης', 'Μαρία', 'Ελένη', 'Κώστας', 'Δημήτρης', 'Αικατερίνη']
+PUBLISHERS = ['Εκδόσεις Πατάκη', 'Κέδρος', 'Μεταίχμιο', 'Ψυχογιός', 'Gutenberg', 'Πανεπιστημιακές Εκδόσεις Κρήτης']
+PLACES = ['Αθήνα', 'Θεσσαλονίκη', 'Ηράκλειο', 'Πάτρα', '[Χ.τ.]']
+INVALID_IDS = ['abc', None, 0, '12-34']
+
+
+def _author_surname_name(rng):
+    return f"{rng.choice(SURNAMES)}, {rng.choice(NAMES)}"
+
+
+def _author_no_space(rng):
+    return f"{rng.choice(SURNAMES)},{rng.choice(NAMES)}"
+
+
+def _author_with_extra(rng):
+    return f"{rng.choice(SURNAMES)}, {rng.choice(NAMES)}, επιμ."
+
+
+def _author_fullwidth_comma(rng):
+    return f"{rng.choice(SURNAMES)}，{rng.choice(NAMES)}"
+
+
+def _author_no_comma(rng):
+    return f"{rng.choice(NAMES)} {rng.choice(SURNAMES)}"
+
+
+# Τα σχήματα του ΣΥΓΓΡΑΦΕΑ που βλέπει το generate_koha_from_author
+AUTHOR_PATTERNS = {
+    'surname_name': _author_surname_name,
+    'no_space': _author_no_space,
+    'with_extra': _author_with_extra,
+    'fullwidth_comma': _author_fullwidth_comma,
+    'no_comma': _author_no_comma,
+}
+
+
+class WorkbookSpec:
+    """Οι παράμετροι ενός συνθετικού αρχείου."""
+
+    def __init__(self, rows=10_000, duplicate_ratio=0.1, empty_ratio=0.02,
+                 unchanged_ratio=0.0, invalid_ratio=0.01, author_patterns=None,
+                 seed=1):
+        if duplicate_ratio + empty_ratio + unchanged_ratio + invalid_ratio > 1:
+            raise ValueError("The ratios add up to more than 1.")
+        self.rows = rows
+        self.duplicate_ratio = duplicate_ratio
+        self.empty_ratio = empty_ratio
+        self.unchanged_ratio = unchanged_ratio
+        self.invalid_ratio = invalid_ratio
+        self.author_patterns = list(author_patterns or AUTHOR_PATTERNS)
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def categories(self):
+        """The category of every row, shuffled with the seed."""
+        counts = {
+            DUPLICATE: round(self.rows * self.duplicate_ratio),
+            EMPTY: round(self.rows * self.empty_ratio),
+            UNCHANGED: round(self.rows * self.unchanged_ratio),
+            INVALID: round(self.rows * self.invalid_ratio),
+        }
+        categories = [category for category, count in counts.items() for _ in range(count)]
+        categories += [NEW] * (self.rows - len(categories))
+        random.Random(self.seed).shuffle(categories)
+        return categories
+
+
+def iter_rows(spec):
+    """Yields (category, row) with row in the order of HEADERS."""
+    rng = random.Random(spec.seed + 1)
+    patterns = [AUTHOR_PATTERNS[name] for name in spec.author_patterns]
+
+    for number, category in enumerate(spec.categories(), start=1):
+        ari8mos = rng.choice(INVALID_IDS) if category == INVALID else number
+        author = rng.choice(patterns)(rng)
+        row = [
+            ari8mos,
+            f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/20{rng.randint(10, 24)}",
+            author,
+            None,  # ΣΥΓΓΡΑΦΕΑΣ KOHA: παράγεται από τον ΣΥΓΓΡΑΦΕΑ
+            f"Τίτλος βιβλίου {number}",
+            rng.choice(PUBLISHERS),
+            rng.choice([None, '1η', '2η', 'Β΄ έκδ.']),
+            rng.choice([float(rng.randint(1950, 2024)), f"[{rng.randint(1950, 2024)}]"]),
+            rng.choice(PLACES),
+            rng.choice([None, '21 εκ.', '24 εκ.']),
+            rng.randint(48, 900),
+            rng.choice([None, None, 'Α΄', 'Β΄']),
+            rng.choice(['Αγορά', 'Δωρεά', None]),
+            float(9789600000000 + number),
+            None,
+            None,
+        ]
+        yield category, row
+
+
+def write_workbook(spec, path):
+    """Writes the workbook (.xlsx, or .csv/.tsv) and returns its path."""
+    path = Path(path)
+    rows = (row for _, row in iter_rows(spec))
+
+    if path.suffix.lower() in ('.csv', '.tsv'):
+        delimiter = '\t' if path.suffix.lower() == '.tsv' else ','
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, delimiter=delimiter)
+            writer.writerow(HEADERS)
+            for row in rows:
+                writer.writerow(['' if v is None else _csv_value(v) for v in row])
+        return path
+
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADERS)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    return path
+
+
+def _csv_value(value):
+    # 9789600000001.0 → "9789600000001", όπως θα το έγραφε το Excel
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return value
+
+
+def seed_database(spec, batch_size=2000):
+    """
+    Creates the records the duplicate/empty/unchanged rows of spec collide
+    with. Needs Django to be set up (and a database to write to).
+    """
+    from main.bulk import insert_people
+    from main.ingestion import clean_rows, map_headers
+
+    positions = map_headers(HEADERS)
+    existing = []
+
+    def flush():
+        insert_people(existing)
+        existing.clear()
+
+    numbers = []
+    rows = []
+    categories = []
+
+    def seed_chunk():
+        for category, (_, ari8mos, *values) in zip(categories, clean_rows(numbers, rows, positions)):
+            if category == UNCHANGED:
+                existing.append((ari8mos, *values))
+            elif category == DUPLICATE:
+                values[3] = f"{values[3]} (παλιός τίτλος)"  # titlos
+                existing.append((ari8mos, *values))
+            elif category == EMPTY:
+                existing.append((ari8mos, values[0]) + (None,) * (len(values) - 1))
+        numbers.clear()
+        rows.clear()
+        categories.clear()
+        if len(existing) >= batch_size:
+            flush()
+
+    for number, (category, row) in enumerate(iter_rows(spec), start=2):
+        if category in (NEW, INVALID):
+            continue
+        numbers.append(number)
+        rows.append(tuple(row))
+        categories.append(category)
+        if len(rows) >= batch_size:
+            seed_chunk()
+    if rows:
+        seed_chunk()
+    if existing:
+        flush()
+
+
+def add_spec_arguments(parser):
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--duplicate-ratio', type=float, default=0.1)
+    parser.add_argument('--empty-ratio', type=float, default=0.02)
+    parser.add_argument('--unchanged-ratio', type=float, default=0.0)
+    parser.add_argument('--invalid-ratio', type=float, default=0.01)
+    parser.add_argument(
+        '--author-patterns', nargs='+', choices=list(AUTHOR_PATTERNS), default=list(AUTHOR_PATTERNS),
+    )
+    parser.add_argument('--seed', type=int, default=1)
+
+
+def spec_from_args(args):
+    return WorkbookSpec(
+        rows=args.rows,
+        duplicate_ratio=args.duplicate_ratio,
+        empty_ratio=args.empty_ratio,
+        unchanged_ratio=args.unchanged_ratio,
+        invalid_ratio=args.invalid_ratio,
+        author_patterns=args.author_patterns,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', help=".xlsx, .csv or .tsv")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    path = write_workbook(spec_from_args(args), args.output)
+    print(f"{args.rows:,} rows → {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+Χρονομέτρηση ενός upload ανά φάση (hash, parse, clean, classify, insert,
+staging, ...) σε συνθετικό αρχείο του generate_workbook, με peak RSS και
+πλήθος SQL queries ανά φάση. Τα αποτελέσματα γράφονται σε JSON ώστε να
+συγκρίνονται runs από διαφορετικά commits.
+
+Τρέχει σε προσωρινή test βάση (όπως το manage.py test) και το upload σε
+ξεχωριστή διεργασία, ώστε το peak RSS να αφορά μόνο αυτό.
+
+    python benchmarks/run_ingestion.py --rows 100000 --duplicate-ratio 0.2 --output before.json
+    python benchmarks/run_ingestion.py --rows 100000 --duplicate-ratio 0.2 --compare before.json
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'excel_form_app.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+
+from benchmarks.generate_workbook import (  # noqa: E402
+    add_spec_arguments, seed_database, spec_from_args, write_workbook,
+)
+from main.ingestion import PhaseTimer  # noqa: E402
+from main.models import CONFLICT_POLICIES, REVIEW  # noqa: E402
+from main.pipeline import run_upload  # noqa: E402
+
+
+def _peak_rss_mb():
+    # ru_maxrss είναι σε KB στο Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _workbook(spec, file_format, directory):
+    """Το αρχείο του spec, από την cache αν έχει ήδη φτιαχτεί."""
+    key = hashlib.sha1(json.dumps(spec.as_dict(), sort_keys=True).encode()).hexdigest()[:12]
+    path = Path(directory) / f"bench_{spec.rows}_{key}.{file_format}"
+    if not path.exists():
+        started = time.perf_counter()
+        write_workbook(spec, path)
+        print(f"Generated {path} in {time.perf_counter() - started:.1f}s")
+    return path
+
+
+def _measure(spec, path, policy, queue):
+    """Runs in a child process: seeds the database and times the upload."""
+    started = time.perf_counter()
+    seed_database(spec)
+    seed_seconds = time.perf_counter() - started
+
+    user = User.objects.create_user('benchmark')
+    timer = PhaseTimer()
+    queries = Counter()
+
+    def count_query(execute, sql, params, many, context):
+        queries[timer.current or 'other'] += 1
+        return execute(sql, params, many, context)
+
+    rss_before = _peak_rss_mb()
+    started = time.perf_counter()
+    with connection.execute_wrapper(count_query), open(path, 'rb') as f:
+        summary = run_upload(f, path.name, user, policy, timer=timer)
+    elapsed = time.perf_counter() - started
+
+    queue.put({
+        'seed_seconds': round(seed_seconds, 3),
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(summary.rows_processed / elapsed) if elapsed else 0,
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'peak_rss_before_upload_mb': round(rss_before, 1),
+        'queries': sum(queries.values()),
+        'phases': {
+            name: {
+                'seconds': round(timer.seconds.get(name, 0.0), 3),
+                'queries': queries.get(name, 0),
+            }
+            for name in sorted(set(timer.seconds) | set(queries))
+        },
+        'summary': {
+            'rows_processed': summary.rows_processed,
+            'rows_added': summary.rows_added,
+            'rows_updated': summary.rows_updated,
+            'rows_staged': summary.rows_staged,
+            'rows_unchanged': summary.rows_unchanged,
+            'rows_kept': summary.rows_kept,
+            'rows_skipped': summary.rows_skipped,
+        },
+    })
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_result(result):
+    print(f"{result['summary']['rows_processed']:,} rows in {result['seconds']:.2f}s "
+          f"({result['rows_per_second']:,} rows/s), peak RSS {result['peak_rss_mb']:.0f} MB, "
+          f"{result['queries']} queries")
+    for name, phase in result['phases'].items():
+        print(f"  {name:>10}: {phase['seconds']:8.3f}s  {phase['queries']:>6} queries")
+    print("  " + ", ".join(f"{k}={v}" for k, v in result['summary'].items()))
+
+
+def _print_comparison(base, result):
+    print(f"Compared with {base.get('commit') or '?'} ({base.get('timestamp', '?')}):")
+
+    def line(label, old, new, unit):
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"  {label:>10}: {old:10.3f}{unit} → {new:10.3f}{unit}  {change}")
+
+    line('total', base['seconds'], result['seconds'], 's')
+    line('peak RSS', base['peak_rss_mb'], result['peak_rss_mb'], 'MB')
+    for name in sorted(set(base['phases']) | set(result['phases'])):
+        old = base['phases'].get(name, {}).get('seconds', 0.0)
+        new = result['phases'].get(name, {}).get('seconds', 0.0)
+        line(name, old, new, 's')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_spec_arguments(parser)
+    parser.add_argument('--policy', default=REVIEW, choices=[value for value, _ in CONFLICT_POLICIES])
+    parser.add_argument('--format', default='xlsx', choices=['xlsx', 'csv', 'tsv'])
+    parser.add_argument('--workbook-dir', default=tempfile.gettempdir(),
+                        help="Where generated workbooks are cached.")
+    parser.add_argument('--output', help="Write the results to this JSON file.")
+    parser.add_argument('--compare', help="JSON file of an earlier run to compare with.")
+    args = parser.parse_args()
+
+    spec = spec_from_args(args)
+    path = _workbook(spec, args.format, args.workbook_dir)
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        # Η διεργασία του upload ανοίγει δικές της συνδέσεις
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        process = context.Process(target=_measure, args=(spec, path, args.policy, queue))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            sys.exit(f"Benchmark process failed (exit code {process.exitcode}).")
+        result = queue.get()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    result = {
+        'commit': _git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'database': connection.vendor,
+        'policy': args.policy,
+        'workbook': str(path),
+        'spec': spec.as_dict(),
+        **result,
+    }
+    _print_result(result)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            _print_comparison(json.load(f), result)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -37,10 +37,12 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # trigram / full-text indexes (main.search)
     'main'
 ]
 
 MIDDLEWARE = [
+    'main.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -126,4 +128,51 @@ STATICFILES_DIRS = [
 
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'home'
-LOGIN_URL = 'login'
\ No newline at end of file
+LOGIN_URL = 'login'
+
+# Logging: χρόνοι και πλήθη γραμμών από τα uploads (main.ingestion, main.bulk)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'main': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+
+# Ουρά uploads (main.jobs): τα αρχεία περιμένουν εδώ μέχρι να τα πάρει
+# ο `python manage.py run_ingestion_worker`
+INGESTION_UPLOAD_DIR = BASE_DIR / "upload_queue"
+
+# True: το upload τρέχει αμέσως μέσα στο request (χωρίς worker)
+INGESTION_INLINE = False
+
+# Δευτερόλεπτα χωρίς heartbeat μετά από τα οποία ένα job σε RUNNING
+# θεωρείται νεκρό (ο worker σκοτώθηκε, π.χ. OOM) και γίνεται FAILED, ώστε το
+# ίδιο αρχείο να μπορεί να ανέβει ξανά. Αρκετά μεγάλο για το τελικό βήμα
+# της ταξινόμησης στη βάση, που δεν στέλνει heartbeat
+INGESTION_JOB_TIMEOUT = 10 * 60
+
+# PostgreSQL: νέες εγγραφές με COPY αντί για bulk_create (main.bulk.insert_people)
+INGESTION_USE_COPY = True
+
+# PostgreSQL: ταξινόμηση των γραμμών μέσα στη βάση, σε προσωρινό πίνακα
+# (main.classify_sql) αντί για την ταξινόμηση ανά κομμάτι στην Python
+INGESTION_CLASSIFY_IN_DB = True
+
+# Server-Timing / αργά requests (main.middleware): όσα ξεπερνούν το όριο
+# γράφονται στον πίνακα SlowRequest, που κρατάει τα τελευταία SLOW_REQUEST_KEEP
+SLOW_REQUEST_THRESHOLD_MS = 1000
+SLOW_REQUEST_KEEP = 1000
+
+# Αναζήτηση "μήπως εννοούσατε;" (main.search): ελάχιστο word_similarity
+# του pg_trgm (0..1)· μικρότερο = περισσότερη ανοχή σε λάθη
+SEARCH_SIMILARITY_THRESHOLD = 0.45
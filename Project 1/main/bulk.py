@@ -0,0 +1,209 @@
+"""
+Μαζικές εγγραφές στον πίνακα Person: εισαγωγή νέων εγγραφών και
+αντικατάσταση / συμπλήρωση υπαρχουσών από δεδομένα Excel.
+"""
+import io
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .fingerprints import record_fingerprint
+from .ingestion import FIELDS
+from .models import FILL_EMPTY, OVERWRITE, SKIP, Person
+
+logger = logging.getLogger(__name__)
+
+# Πόσες εγγραφές γράφονται με κάθε UPDATE
+APPLY_BATCH_SIZE = 1000
+
+# Ό,τι γράφεται μαζικά: τα 15 πεδία και το αποτύπωμά τους
+WRITE_FIELDS = FIELDS + ('content_hash',)
+
+
+def _with_hash(values):
+    """(*FIELDS) → (*FIELDS, content_hash)"""
+    return (*values, record_fingerprint(values))
+
+
+def apply_excel_rows(excel_rows, label='apply_excel_rows'):
+    """
+    Overwrites existing records with Excel data.
+
+    excel_rows is a dict {ari8mos: {field: value}}. Everything runs in one
+    transaction, one bulk UPDATE per batch, so a failure leaves the
+    database untouched. Returns the number of records that were updated
+    (IDs that no longer exist are ignored).
+    """
+    ids = list(excel_rows)
+    updated = 0
+    started = time.perf_counter()
+
+    with transaction.atomic():
+        for start in range(0, len(ids), APPLY_BATCH_SIZE):
+            batch_started = time.perf_counter()
+            people = [
+                Person(
+                    ari8mosEisagoghs=ari8mos,
+                    **dict(zip(WRITE_FIELDS, _with_hash(
+                        [excel_rows[ari8mos].get(field) for field in FIELDS]
+                    ))),
+                )
+                for ari8mos in ids[start:start + APPLY_BATCH_SIZE]
+            ]
+            batch_updated = Person.objects.bulk_update(people, WRITE_FIELDS)
+            updated += batch_updated
+            logger.info(
+                "%s: batch %d: %d/%d rows updated in %.3fs",
+                label, start // APPLY_BATCH_SIZE + 1,
+                batch_updated, len(people), time.perf_counter() - batch_started,
+            )
+
+    logger.info(
+        "%s: %d rows updated in %.2fs", label, updated, time.perf_counter() - started,
+    )
+    return updated
+
+
+def _copy_value(value):
+    """Μια τιμή σε μορφή COPY text: \\N για NULL, escape στα ειδικά bytes."""
+    if value is None:
+        return '\\N'
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def _copy_from(cursor, sql, data):
+    raw = cursor.cursor
+    if hasattr(raw, 'copy_expert'):  # psycopg2
+        raw.copy_expert(sql, data)
+    else:  # psycopg 3
+        with raw.copy(sql) as copy:
+            copy.write(data.getvalue())
+
+
+def _copy_insert(rows):
+    """
+    PostgreSQL: COPY ... FROM STDIN σε προσωρινό πίνακα και μετά ένα
+    INSERT ... SELECT στον main_person.
+    """
+    table = Person._meta.db_table
+    columns = [Person._meta.pk.column] + [Person._meta.get_field(f).column for f in WRITE_FIELDS]
+    column_list = ', '.join(connection.ops.quote_name(c) for c in columns)
+
+    data = io.StringIO()
+    for ari8mos, *values in rows:
+        data.write('\t'.join(_copy_value(v) for v in (ari8mos, *_with_hash(values))))
+        data.write('\n')
+    data.seek(0)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE person_import (LIKE {connection.ops.quote_name(table)}) "
+            "ON COMMIT DROP"
+        )
+        _copy_from(cursor, f"COPY person_import ({column_list}) FROM STDIN", data)
+        cursor.execute(
+            f"INSERT INTO {connection.ops.quote_name(table)} ({column_list}) "
+            f"SELECT {column_list} FROM person_import"
+        )
+        inserted = cursor.rowcount
+        cursor.execute("DROP TABLE person_import")
+    return inserted
+
+
+def insert_people(rows):
+    """
+    Inserts new records. rows are tuples (ari8mos, *FIELDS) that do not
+    exist yet. On PostgreSQL (and INGESTION_USE_COPY) they are streamed with
+    COPY, otherwise they go through bulk_create. Returns the number of
+    inserted records.
+    """
+    if not rows:
+        return 0
+    if connection.vendor == 'postgresql' and settings.INGESTION_USE_COPY:
+        return _copy_insert(rows)
+
+    Person.objects.bulk_create(
+        [
+            Person(ari8mosEisagoghs=ari8mos, **dict(zip(WRITE_FIELDS, _with_hash(values))))
+            for ari8mos, *values in rows
+        ],
+        batch_size=1000,
+    )
+    return len(rows)
+
+
+# Πεδία που πρέπει να είναι κενά για να θεωρηθεί μια εγγραφή "κενή"
+# (όλα εκτός από ari8mosEisagoghs, hmeromhnia_eis και troposPromPar)
+EMPTY_RECORD_FIELDS = (
+    'syggrafeas', 'koha', 'titlos', 'ekdoths', 'ekdosh', 'etosEkdoshs',
+    'toposEkdoshs', 'sxhma', 'selides', 'tomos', 'ISBN', 'sthlh1', 'sthlh2',
+)
+
+# Γραμμές ανά INSERT ... ON CONFLICT (17 παράμετροι η καθεμία)
+UPSERT_BATCH_SIZE = 500
+
+
+def _upsert_sql(policy, row_count):
+    qn = connection.ops.quote_name
+    table = qn(Person._meta.db_table)
+    pk = qn(Person._meta.pk.column)
+    columns = [Person._meta.get_field(f).column for f in WRITE_FIELDS]
+    column_list = ', '.join([pk] + [qn(c) for c in columns])
+    placeholders = '(' + ', '.join(['%s'] * (len(columns) + 1)) + ')'
+
+    sql = (
+        f"INSERT INTO {table} ({column_list}) "
+        f"VALUES {', '.join([placeholders] * row_count)} "
+        f"ON CONFLICT ({pk}) "
+    )
+    if policy == SKIP:
+        sql += "DO NOTHING"
+    else:
+        sql += "DO UPDATE SET " + ', '.join(f"{qn(c)} = EXCLUDED.{qn(c)}" for c in columns)
+        if policy == FILL_EMPTY:
+            sql += " WHERE " + ' AND '.join(
+                f"COALESCE({table}.{qn(Person._meta.get_field(f).column)}, '') = ''"
+                for f in EMPTY_RECORD_FIELDS
+            )
+    return sql + f" RETURNING {pk}"
+
+
+def upsert_people(rows, policy, existing):
+    """
+    Writes rows (ari8mos, *FIELDS) with one INSERT ... ON CONFLICT per batch,
+    resolving conflicts by policy (OVERWRITE, FILL_EMPTY or SKIP) instead of
+    staging them for review. existing holds the numbers that already have
+    a record (known from the classification), so the written rows are
+    split into added and updated without another query. Returns
+    (added, updated).
+    """
+    if policy not in (OVERWRITE, FILL_EMPTY, SKIP):
+        raise ValueError(f"Unsupported conflict policy: {policy}")
+
+    added = 0
+    updated = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start:start + UPSERT_BATCH_SIZE]
+            cursor.execute(
+                _upsert_sql(policy, len(batch)),
+                [
+                    value
+                    for ari8mos, *values in batch
+                    for value in (ari8mos, *_with_hash(values))
+                ],
+            )
+            for pk, in cursor.fetchall():
+                if pk in existing:
+                    updated += 1
+                else:
+                    added += 1
+    return added, updated
@@ -0,0 +1,308 @@
+"""
+Ταξινόμηση ενός upload μέσα στη βάση (PostgreSQL).
+
+Οι καθαρές γραμμές φορτώνονται με COPY σε προσωρινό πίνακα και η
+απόφαση νέα / διπλότυπη / κενή εγγραφή / αμετάβλητη / άκυρη / διπλή
+μέσα στο αρχείο παίρνεται για όλες μαζί με ένα statement: ένα window
+function για τις επαναλήψεις μέσα στο αρχείο και ένα JOIN με τον
+main_person για τις συγκρούσεις. Οι εγγραφές (INSERT / UPDATE / staging)
+γίνονται επίσης με INSERT ... SELECT και UPDATE ... FROM, οπότε η Python
+διαβάζει πίσω μόνο τα αθροίσματα.
+
+Όσο φορτώνεται το αρχείο, κάθε κομμάτι ταξινομείται και πρόχειρα
+(_preview_chunk, με το αποτύπωμα αντί για σύγκριση πεδίο-πεδίο), ώστε η
+πρόοδος να δείχνει τις κατηγορίες από την αρχή· το τελικό statement
+βάζει στη θέση τους τα ακριβή αθροίσματα.
+
+Χρησιμοποιείται από το main.pipeline.ingest_chunks όταν η βάση είναι
+PostgreSQL και το INGESTION_CLASSIFY_IN_DB είναι ενεργό.
+"""
+import io
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .bulk import EMPTY_RECORD_FIELDS, WRITE_FIELDS, _copy_from, _copy_value
+from .fingerprints import record_fingerprint
+from .ingestion import FIELDS
+from .models import FILL_EMPTY, OVERWRITE, REVIEW, SKIP, Person, StagedRow, StagedUpload
+
+RAW_TABLE = 'upload_raw'
+ROWS_TABLE = 'upload_rows'
+
+# Κατηγορίες γραμμών
+NEW = 'new'
+DUPLICATE = 'duplicate'
+EMPTY = 'empty'
+UNCHANGED = 'unchanged'
+INVALID = 'invalid'
+MISSING = 'missing'
+REPEAT = 'repeat'
+
+# Οι λόγοι παράλειψης, όπως στην ταξινόμηση σε Python
+SKIP_REASONS = {
+    INVALID: 'Invalid ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ',
+    MISSING: 'Missing ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ',
+    REPEAT: 'Duplicate ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ inside Excel',
+}
+
+
+def classify_in_database():
+    return connection.vendor == 'postgresql' and getattr(settings, 'INGESTION_CLASSIFY_IN_DB', True)
+
+
+def _qn(name):
+    return connection.ops.quote_name(name)
+
+
+def _column(field):
+    return _qn(Person._meta.get_field(field).column)
+
+
+def _create_raw_table(cursor):
+    columns = ', '.join(f"{_column(field)} text" for field in WRITE_FIELDS)
+    cursor.execute(f"DROP TABLE IF EXISTS {RAW_TABLE}, {ROWS_TABLE}")
+    cursor.execute(f"CREATE TEMP TABLE {RAW_TABLE} (row_no integer, ari8mos bigint, {columns})")
+
+
+def _load_chunk(cursor, rows):
+    """
+    COPY μιας λίστας καθαρών tuples (row_number, ari8mos, *FIELDS).
+    Returns the fingerprints of the rows, in order.
+    """
+    fingerprints = []
+    data = io.StringIO()
+    for row_number, ari8mos, *values in rows:
+        fingerprint = record_fingerprint(values)
+        fingerprints.append(fingerprint)
+        line = (row_number, ari8mos, *values, fingerprint)
+        data.write('\t'.join(_copy_value(v) for v in line))
+        data.write('\n')
+    data.seek(0)
+    column_list = ', '.join(['row_no', 'ari8mos'] + [_column(field) for field in WRITE_FIELDS])
+    _copy_from(cursor, f"COPY {RAW_TABLE} ({column_list}) FROM STDIN", data)
+    return fingerprints
+
+
+def _preview_chunk(rows, fingerprints, seen, preview, summary):
+    """
+    Classifies the chunk for the progress of the upload: skipped rows go
+    to summary.skipped (exactly as _classify finds them), the rest are
+    counted in preview (a Counter) with one query for the records of the
+    chunk. seen holds the numbers of the earlier chunks. A record with an
+    old fingerprint counts as a conflict here; _classify decides field by
+    field.
+    """
+    candidates = []
+    for (row_number, ari8mos, *values), fingerprint in zip(rows, fingerprints):
+        if ari8mos is None:
+            category = INVALID
+        elif not ari8mos:
+            category = MISSING
+        elif ari8mos in seen:
+            category = REPEAT
+        else:
+            seen.add(ari8mos)
+            candidates.append((ari8mos, fingerprint))
+            continue
+        summary.skipped.append({'row': row_number, 'reason': SKIP_REASONS[category]})
+
+    existing = {
+        pk: (content_hash, not any(values))
+        for pk, content_hash, *values in Person.objects
+        .filter(pk__in=[ari8mos for ari8mos, _ in candidates])
+        .values_list('pk', 'content_hash', *EMPTY_RECORD_FIELDS)
+    }
+    for ari8mos, fingerprint in candidates:
+        if ari8mos not in existing:
+            preview[NEW] += 1
+            continue
+        content_hash, empty = existing[ari8mos]
+        if content_hash == fingerprint:
+            preview[UNCHANGED] += 1
+        else:
+            preview[EMPTY if empty else DUPLICATE] += 1
+
+
+def _show_preview(preview, summary):
+    summary.rows_added = preview[NEW]
+    summary.rows_unchanged = preview[UNCHANGED]
+    summary.rows_duplicates = preview[DUPLICATE]
+    summary.rows_empty_records = preview[EMPTY]
+
+
+def _classify(cursor):
+    """
+    Ένα statement: κάθε γραμμή του RAW_TABLE παίρνει την κατηγορία της.
+    Returns (counts per category, skipped rows, how many unchanged rows
+    have an old content_hash).
+    """
+    person = _qn(Person._meta.db_table)
+    pk = _qn(Person._meta.pk.column)
+    same = ' AND '.join(
+        f"COALESCE(p.{_column(field)}, '') = COALESCE(u.{_column(field)}, '')" for field in FIELDS
+    )
+    empty = ' AND '.join(f"COALESCE(p.{_column(field)}, '') = ''" for field in EMPTY_RECORD_FIELDS)
+
+    cursor.execute(f"""
+        CREATE TEMP TABLE {ROWS_TABLE} AS
+        SELECT u.*,
+               CASE
+                   WHEN u.ari8mos IS NULL THEN '{INVALID}'
+                   WHEN u.ari8mos = 0 THEN '{MISSING}'
+                   WHEN u.occurrence > 1 THEN '{REPEAT}'
+                   WHEN p.{pk} IS NULL THEN '{NEW}'
+                   WHEN {same} THEN '{UNCHANGED}'
+                   WHEN {empty} THEN '{EMPTY}'
+                   ELSE '{DUPLICATE}'
+               END AS category,
+               p.content_hash IS DISTINCT FROM u.content_hash AS stale
+        FROM (
+            SELECT r.*, row_number() OVER (PARTITION BY r.ari8mos ORDER BY r.row_no) AS occurrence
+            FROM {RAW_TABLE} AS r
+        ) AS u
+        LEFT JOIN {person} AS p ON p.{pk} = u.ari8mos
+    """)
+    cursor.execute(f"""
+        SELECT category, count(*), count(*) FILTER (WHERE stale)
+        FROM {ROWS_TABLE} GROUP BY category
+    """)
+    counts = {}
+    stale = 0
+    for category, count, stale_count in cursor.fetchall():
+        counts[category] = count
+        if category == UNCHANGED:
+            stale = stale_count
+    cursor.execute(
+        f"SELECT row_no, category FROM {ROWS_TABLE} WHERE category IN %s ORDER BY row_no",
+        [tuple(SKIP_REASONS)],
+    )
+    skipped = [{'row': row_no, 'reason': SKIP_REASONS[category]} for row_no, category in cursor.fetchall()]
+    return counts, skipped, stale
+
+
+def _refresh_fingerprints(cursor):
+    """The new content_hash for records that are the same field by field."""
+    person = _qn(Person._meta.db_table)
+    pk = _qn(Person._meta.pk.column)
+    content_hash = _column('content_hash')
+    cursor.execute(f"""
+        UPDATE {person} AS p SET {content_hash} = u.{content_hash}
+        FROM {ROWS_TABLE} AS u
+        WHERE p.{pk} = u.ari8mos AND u.category = %s AND u.stale
+    """, [UNCHANGED])
+
+
+def _insert_new(cursor):
+    person = _qn(Person._meta.db_table)
+    pk = _qn(Person._meta.pk.column)
+    columns = [_column(field) for field in WRITE_FIELDS]
+    cursor.execute(f"""
+        INSERT INTO {person} ({pk}, {', '.join(columns)})
+        SELECT ari8mos, {', '.join(columns)} FROM {ROWS_TABLE} WHERE category = %s
+        ON CONFLICT ({pk}) DO NOTHING
+    """, [NEW])
+    return cursor.rowcount
+
+
+def _update_existing(cursor, categories):
+    person = _qn(Person._meta.db_table)
+    pk = _qn(Person._meta.pk.column)
+    assignments = ', '.join(f"{_column(field)} = u.{_column(field)}" for field in WRITE_FIELDS)
+    cursor.execute(f"""
+        UPDATE {person} AS p SET {assignments}
+        FROM {ROWS_TABLE} AS u
+        WHERE p.{pk} = u.ari8mos AND u.category IN %s
+    """, [tuple(categories)])
+    return cursor.rowcount
+
+
+def _stage(cursor, staged_upload):
+    values = ', '.join(f"u.{_column(field)}" for field in FIELDS)
+    cursor.execute(f"""
+        INSERT INTO {_qn(StagedRow._meta.db_table)} (upload_id, ari8mos, kind, excel_data)
+        SELECT %s, u.ari8mos,
+               CASE u.category WHEN %s THEN %s ELSE %s END,
+               jsonb_build_array({values})
+        FROM {ROWS_TABLE} AS u
+        WHERE u.category IN (%s, %s)
+    """, [
+        staged_upload.pk,
+        EMPTY, StagedRow.EMPTY_RECORD, StagedRow.DUPLICATE,
+        DUPLICATE, EMPTY,
+    ])
+
+
+def ingest_in_database(chunks, summary, user, filename, policy, file_hash, progress=None, throughput=None):
+    """
+    Loads chunks into a temporary table, classifies them in one statement
+    and applies policy with set-based writes. Fills in summary like the
+    Python classification does.
+    """
+    if policy not in (REVIEW, OVERWRITE, FILL_EMPTY, SKIP):
+        raise ValueError(f"Unsupported conflict policy: {policy}")
+    timer = summary.timer
+
+    with connection.cursor() as cursor:
+        try:
+            _create_raw_table(cursor)
+
+            # Φόρτωση ανά κομμάτι, εκτός transaction ώστε να φαίνεται η πρόοδος
+            seen = set()
+            preview = Counter()
+            for rows in chunks:
+                with timer.phase('load'):
+                    fingerprints = _load_chunk(cursor, rows)
+                summary.rows_processed += len(rows)
+                if throughput is not None:
+                    throughput.add(len(rows))
+                if progress is not None:
+                    with timer.phase('progress'):
+                        _preview_chunk(rows, fingerprints, seen, preview, summary)
+                        _show_preview(preview, summary)
+                        progress(summary)
+
+            # Heartbeat πριν και μετά το transaction, που δεν αναφέρει πρόοδο
+            # (και δεν θα φαινόταν ένα heartbeat μέσα του πριν από το commit)
+            if progress is not None:
+                progress(summary)
+            with transaction.atomic():
+                with timer.phase('classify'):
+                    counts, summary.skipped, stale = _classify(cursor)
+
+                duplicates = counts.get(DUPLICATE, 0)
+                empty_records = counts.get(EMPTY, 0)
+                # Τα ακριβή αθροίσματα στη θέση της πρόχειρης ταξινόμησης
+                summary.rows_unchanged = counts.get(UNCHANGED, 0)
+
+                with timer.phase('insert'):
+                    # Μόνο αν υπάρχουν: κάθε UPDATE αλλάζει την έκδοση (main.counts)
+                    if stale:
+                        _refresh_fingerprints(cursor)
+                    summary.rows_added = _insert_new(cursor)
+
+                    updated = 0
+                    if policy == OVERWRITE:
+                        updated = _update_existing(cursor, [DUPLICATE, EMPTY])
+                    elif policy == FILL_EMPTY:
+                        updated = _update_existing(cursor, [EMPTY])
+                summary.rows_duplicates = duplicates
+                summary.rows_empty_records = empty_records
+                if policy != REVIEW:
+                    summary.rows_updated += updated
+                    summary.rows_kept += duplicates + empty_records - updated
+
+                if policy == REVIEW and duplicates + empty_records:
+                    with timer.phase('staging'):
+                        summary.staged_upload = StagedUpload.objects.create(
+                            user=user,
+                            filename=filename,
+                            file_hash=file_hash,
+                        )
+                        _stage(cursor, summary.staged_upload)
+                    summary.rows_staged += duplicates + empty_records
+            if progress is not None:
+                progress(summary)
+        finally:
+            cursor.execute(f"DROP TABLE IF EXISTS {RAW_TABLE}, {ROWS_TABLE}")
@@ -0,0 +1,113 @@
+"""
+Πλήθη εγγραφών Person χωρίς COUNT(*) σε κάθε request.
+
+- Το σύνολο του πίνακα το κρατάει η ίδια η βάση στο PersonCountDelta
+  (triggers στο main_person, μία γραμμή ανά statement), ακριβές μετά από
+  κάθε αλλαγή, από όποιο δρόμο κι αν έρθει (ORM, COPY, upserts του
+  upload, admin). Οι γραμμές αθροίζονται· τις συμπτύσσει σε μία το
+  compact, μετά από κάθε upload (main.jobs, import_excel) και με το
+  compact_person_counts (π.χ. από cron), ποτέ ένα request που διαβάζει.
+- Τα πλήθη φιλτραρισμένων λιστών μπαίνουν στο cache του Django, με κλειδί
+  το SQL του query (άρα την κανονικοποιημένη αναζήτηση) και την έκδοση
+  (το πλήθος των statements). Κάθε αλλαγή στο main_person αυξάνει την
+  έκδοση, οπότε ένα παλιό πλήθος δεν ξαναδιαβάζεται ποτέ· απλώς λήγει.
+  Η έκδοση διαβάζεται πριν από το πλήθος που αποθηκεύεται μαζί της.
+- Μέχρι να έρθει το ακριβές πλήθος μιας μεγάλης αναζήτησης, μια
+  εκτίμηση του planner (pg_class.reltuples και στατιστικά των στηλών).
+
+Με το default LocMemCache κάθε διεργασία έχει το δικό της cache· ένα κοινό
+cache (CACHES, π.χ. Redis) το μοιράζεται σε όλους τους workers.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+
+from .models import PersonCountDelta
+
+# Πόσο μένει ένα πλήθος στο cache (s), αν δεν αλλάξει τίποτα νωρίτερα
+CACHE_TIMEOUT = 60 * 60
+
+
+def _qn(name):
+    return connection.ops.quote_name(name)
+
+
+def compact():
+    """
+    Merges the PersonCountDelta rows into one, keeping the totals. Rows
+    written meanwhile by other transactions are left as they are; with
+    one row or none there is nothing to do.
+    """
+    table = _qn(PersonCountDelta._meta.db_table)
+    rows = _qn(PersonCountDelta._meta.get_field('rows').column)
+    statements = _qn(PersonCountDelta._meta.get_field('statements').column)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH merged AS (
+                DELETE FROM {table} WHERE (SELECT count(*) FROM {table}) > 1
+                RETURNING {rows}, {statements}
+            )
+            INSERT INTO {table} ({rows}, {statements})
+            SELECT sum({rows}), sum({statements}) FROM merged HAVING count(*) > 0
+        """)
+
+
+class PersonCounts:
+    """The counts of one request: reads PersonCountDelta at most once."""
+
+    def __init__(self):
+        self._stats = None
+
+    @property
+    def stats(self):
+        """(rows, version) summed over PersonCountDelta."""
+        if self._stats is None:
+            stats = PersonCountDelta.objects.aggregate(
+                rows=Sum('rows', default=0), version=Sum('statements', default=0),
+            )
+            self._stats = (stats['rows'], stats['version'])
+        return self._stats
+
+    @property
+    def total(self):
+        """Number of Person records."""
+        return self.stats[0]
+
+    @property
+    def version(self):
+        """Grows with every change to Person (the number of write statements)."""
+        return self.stats[1]
+
+    def cached(self, qs):
+        """The count of qs if it is cached for the current data, else None."""
+        return cache.get(self._key(qs))
+
+    def remember(self, qs, count):
+        """Cache count for qs; count must be read after the version (stats)."""
+        cache.set(self._key(qs), count, CACHE_TIMEOUT)
+
+    def count(self, qs):
+        """The exact count of qs, from the cache when the data hasn't changed."""
+        count = self.cached(qs)
+        if count is None:
+            count = qs.count()
+            self.remember(qs, count)
+        return count
+
+    def estimate(self, qs):
+        """The planner's estimate of the count of qs, without running it."""
+        sql, params = qs.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def _key(self, qs):
+        sql, params = qs.order_by().query.sql_with_params()
+        digest = hashlib.blake2b(repr((sql, params)).encode(), digest_size=16).hexdigest()
+        return f'person-count:{self.version}:{digest}'
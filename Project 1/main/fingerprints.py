@@ -0,0 +1,37 @@
+"""
+Αποτυπώματα (hashes) για τα re-imports: ένα ανά εγγραφή Person, από τα
+15 πεδία δεδομένων, και ένα ανά αρχείο που ανεβαίνει.
+
+Αν το αποτύπωμα μιας γραμμής του Excel είναι ίδιο με της εγγραφής στη
+βάση, η γραμμή δεν χρειάζεται ούτε σύγκριση ούτε εγγραφή.
+"""
+import hashlib
+
+from .ingestion import FIELDS
+
+_SEPARATOR = '\x1f'
+
+
+def record_fingerprint(values):
+    """
+    Hash of the values of main.ingestion.FIELDS, in that order (the
+    order of the clean tuples). None and '' count as the same value, like
+    everywhere else in the app.
+    """
+    data = _SEPARATOR.join('' if value is None else str(value) for value in values)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def person_fingerprint(person):
+    """record_fingerprint of the stored values of a Person."""
+    return record_fingerprint(getattr(person, field) for field in FIELDS)
+
+
+def file_fingerprint(file, block_size=1024 * 1024):
+    """SHA-256 of the whole file. Leaves the file at the start."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for block in iter(lambda: file.read(block_size), b''):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
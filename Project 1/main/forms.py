@@ -1,5 +1,6 @@
 from django import forms
-from .models import Person
+from .models import Person, CONFLICT_POLICIES, REVIEW
+from .sources import SUPPORTED_SUFFIXES
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 
@@ -45,6 +46,20 @@ class CustomUserCreationForm(UserCreationForm):
 
 class UploadExcelForm(forms.Form):
     excel_file = forms.FileField(label="")
+    conflict_policy = forms.ChoiceField(
+        label="Εγγραφές που υπάρχουν ήδη",
+        choices=CONFLICT_POLICIES,
+        initial=REVIEW,
+        widget=forms.RadioSelect,
+    )
+
+    def clean_excel_file(self):
+        excel_file = self.cleaned_data.get("excel_file")
+        if excel_file and not excel_file.name.lower().endswith(SUPPORTED_SUFFIXES):
+            raise forms.ValidationError(
+                "Unsupported file type. Allowed: " + ", ".join(SUPPORTED_SUFFIXES)
+            )
+        return excel_file
 
 class PersonManualForm(forms.ModelForm):
     class Meta:
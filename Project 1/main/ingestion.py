@@ -0,0 +1,343 @@
+"""
+Ανάγνωση και καθαρισμός αρχείων Excel/CSV/ODS για το upload_excel.
+
+Το αρχείο διαβάζεται γραμμή-γραμμή από την πηγή που ταιριάζει στον τύπο
+του (main.sources), οι επικεφαλίδες αντιστοιχίζονται σε πεδία μία φορά
+ανά αρχείο και οι γραμμές δίνονται σε κομμάτια σταθερού μεγέθους, ώστε
+η μνήμη να μένει σταθερή όσο μεγάλο κι αν είναι το αρχείο. Κάθε κομμάτι καθαρίζεται μία
+φορά ανά στήλη (pandas) και η ταξινόμηση διαβάζει μόνο απλά tuples.
+
+Το pandas/numpy φορτώνονται στο πρώτο κομμάτι που καθαρίζεται και όχι με
+το import του module, ώστε τα views, οι web workers και τα management
+commands που δεν κάνουν upload να μην πληρώνουν τον χρόνο και τη μνήμη τους.
+"""
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .sources import get_source
+
+logger = logging.getLogger(__name__)
+
+# Πόσες γραμμές επεξεργαζόμαστε κάθε φορά
+CHUNK_SIZE = 2000
+
+ID_HEADER = 'ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ'
+ID_FIELD = 'ari8mosEisagoghs'
+
+TEXT = 'text'
+NUMERIC_OR_TEXT = 'numeric_or_text'
+
+# Στήλη Excel → πεδίο Person, με τη σειρά που εμφανίζονται στα tuples
+COLUMNS = [
+    ('ΗΜΕΡΟΜΗΝΙΑ ΕΙΣΑΓΩΓΗΣ', 'hmeromhnia_eis', NUMERIC_OR_TEXT),
+    ('ΣΥΓΓΡΑΦΕΑΣ', 'syggrafeas', TEXT),
+    ('ΣΥΓΓΡΑΦΕΑΣ KOHA', 'koha', TEXT),
+    ('ΤΙΤΛΟΣ', 'titlos', TEXT),
+    ('ΕΚΔΟΤΗΣ', 'ekdoths', TEXT),
+    ('ΕΚΔΟΣΗ', 'ekdosh', TEXT),
+    ('ΕΤΟΣ ΕΚΔΟΣΗΣ', 'etosEkdoshs', NUMERIC_OR_TEXT),
+    ('ΤΟΠΟΣ  ΕΚΔΟΣΗΣ', 'toposEkdoshs', TEXT),
+    ('ΣΧΗΜΑ', 'sxhma', TEXT),
+    ('ΣΕΛΙΔΕΣ', 'selides', TEXT),
+    ('ΤΟΜΟΣ', 'tomos', TEXT),
+    ('ΤΡΟΠΟΣ ΠΡΟΜΗΘΕΙΑΣ ΠΑΡΑΤΗΡΗΣΕΙΣ', 'troposPromPar', TEXT),
+    ('ISBN', 'ISBN', NUMERIC_OR_TEXT),
+    ('Στήλη1', 'sthlh1', NUMERIC_OR_TEXT),
+    ('Στήλη2', 'sthlh2', NUMERIC_OR_TEXT),
+]
+
+# Το εύρος του Person.ari8mosEisagoghs (IntegerField, 32 bit)· ό,τι είναι
+# έξω από αυτό θα σταματούσε όλο το upload με "integer out of range"
+ID_MIN, ID_MAX = -2**31, 2**31 - 1
+
+# Ακέραιος ως κείμενο (CSV): "115011", " 115011 ", "115011.0"
+_INTEGER_TEXT = r'\s*[+-]?\d+(?:\.0*)?\s*'
+
+# Τα 15 πεδία δεδομένων του Person (όλα εκτός από το ari8mosEisagoghs),
+# με την ίδια σειρά που υπολογίζεται το αποτύπωμα (main.fingerprints)
+FIELDS = tuple(field for _, field, _ in COLUMNS)
+
+
+def _normalize_header(header):
+    """'Τόπος  εκδόσης ' → 'τοπος εκδοσης' (κενά και κεφαλαία δεν μετράνε)."""
+    return ' '.join(str(header).split()).casefold()
+
+
+_HEADER_FIELDS = {
+    _normalize_header(header): field
+    for header, field, _ in [(ID_HEADER, ID_FIELD, None), *COLUMNS]
+}
+
+
+def map_headers(header_row):
+    """
+    Maps the header row of a file to {field: column position}, once per
+    file. Unknown columns are ignored; if a header appears twice the
+    first one wins.
+    """
+    positions = {}
+    for position, header in enumerate(header_row):
+        if header is None:
+            continue
+        field = _HEADER_FIELDS.get(_normalize_header(header))
+        if field is not None and field not in positions:
+            positions[field] = position
+    return positions
+
+
+def generate_koha_from_author(author):
+    """
+    Converts 'surname,name,extra' → 'name surname extra'
+    """
+    if not author or "," not in author:
+        return None
+
+
+    # Normalize commas
+    author = author.replace("，", ",")
+
+    parts = [p.strip() for p in author.split(",") if p.strip()]
+
+    if len(parts) < 2:
+        return None
+
+    surname = parts[0]
+    name = parts[1]
+    extra = " ".join(parts[2:]) if len(parts) > 2 else ""
+    result = f"{name} {surname}"
+    if extra:
+        result = f"{result} {extra}"
+
+    return result
+
+
+def _none_array(length):
+    import numpy as np
+
+    return np.full(length, None, dtype=object)
+
+
+def _clean_text(column):
+    """NaN → None, οτιδήποτε άλλο → str(value).strip()"""
+    cleaned = _none_array(len(column))
+    present = column.notna().to_numpy()
+    cleaned[present] = column[present].astype(str).str.strip().to_numpy(dtype=object)
+    return cleaned
+
+
+def _clean_numeric_or_text(column):
+    """
+    For fields that can be numeric (like year "2012") or contain
+    special characters (like "[2012]"). Removes .0 from whole floats
+    but preserves text with special characters.
+    """
+    import numpy as np
+
+    cleaned = _clean_text(column)
+
+    is_float = column.map(type, na_action='ignore').isin((float, np.float64)).to_numpy()
+    if is_float.any():
+        floats = column[is_float].to_numpy(dtype=float)
+        whole = np.isfinite(floats) & (floats % 1 == 0)
+        positions = np.flatnonzero(is_float)[whole]
+        cleaned[positions] = floats[whole].astype('int64').astype(str).astype(object)  # 2012.0 → "2012"
+    return cleaned
+
+
+def _clean_ari8mos(column):
+    """
+    115011 / 115011.0 / "115011" → 115011. Ό,τι δεν είναι ακέραιος μέσα
+    στο εύρος ID_MIN..ID_MAX (12.5, "12.5", "1e5", 1e20, True, κείμενο)
+    → None, δηλαδή Invalid ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ όπως παλιά.
+    """
+    import numpy as np
+    import pandas as pd
+
+    kinds = column.map(type, na_action='ignore')
+    # Το bool είναι υποκλάση του int, αλλά ένα True δεν είναι αριθμός
+    candidates = column.where(~kinds.isin((bool, np.bool_)))
+    is_text = kinds.eq(str).to_numpy()
+    if is_text.any():
+        text = candidates[is_text]
+        candidates[is_text] = text.where(text.str.fullmatch(_INTEGER_TEXT).astype(bool))
+
+    numbers = pd.to_numeric(candidates, errors='coerce').to_numpy(dtype=float)
+    valid = np.isfinite(numbers)
+    valid[valid] = (numbers[valid] % 1 == 0) & (numbers[valid] >= ID_MIN) & (numbers[valid] <= ID_MAX)
+
+    cleaned = _none_array(len(column))
+    cleaned[valid] = numbers[valid].astype('int64').tolist()
+    return cleaned
+
+
+_CLEANERS = {
+    TEXT: _clean_text,
+    NUMERIC_OR_TEXT: _clean_numeric_or_text,
+}
+
+
+def clean_rows(numbers, rows, positions):
+    """
+    Cleans every column of the chunk once and returns plain tuples
+    (row_number, ari8mos, *FIELDS). rows must all have the same length and
+    positions comes from map_headers. ari8mos is an int, or None when the
+    cell is missing or not a whole number in the range of the IntegerField.
+    """
+    import pandas as pd
+
+    columns = list(zip(*rows))
+    empty = pd.Series(_none_array(len(rows)), dtype=object)
+
+    def column(field):
+        position = positions.get(field)
+        if position is None:
+            return empty
+        return pd.Series(columns[position], dtype=object)
+
+    cleaned = {
+        field: _CLEANERS[kind](column(field))
+        for _, field, kind in COLUMNS
+    }
+
+    # ΣΥΓΓΡΑΦΕΑΣ KOHA: αν λείπει, παράγεται από τον ΣΥΓΓΡΑΦΕΑ
+    koha = cleaned['koha']
+    syggrafeas = cleaned['syggrafeas']
+    missing = (pd.isna(koha) | (koha == '')) & pd.notna(syggrafeas) & (syggrafeas != '')
+    if missing.any():
+        koha[missing] = [generate_koha_from_author(a) for a in syggrafeas[missing]]
+
+    ari8mos = _clean_ari8mos(column(ID_FIELD))
+
+    return list(zip(
+        numbers,
+        ari8mos.tolist(),
+        *(cleaned[field].tolist() for field in FIELDS),
+    ))
+
+
+def iter_raw_chunks(excel_file, chunk_size=CHUNK_SIZE):
+    """
+    Yields (row_numbers, rows, positions) with at most chunk_size rows
+    each, read by the source that matches the file type. Blank rows are
+    dropped and every row is padded to the width of the header, so the
+    numbers are the row numbers of the sheet and can be shown to the user.
+    """
+    rows = get_source(excel_file).iter_rows()
+
+    header_row = next(rows, None)
+    if header_row is None:
+        return
+    positions = map_headers(header_row)
+    width = len(header_row)
+
+    numbers = []
+    values = []
+    for row_number, row in enumerate(rows, start=2):
+        # Κενές γραμμές (π.χ. μορφοποίηση στο τέλος του φύλλου) αγνοούνται
+        if all(v is None for v in row):
+            continue
+        # Οι γραμμές μπορεί να έχουν λιγότερα (ή περισσότερα) κελιά
+        if len(row) != width:
+            row = (tuple(row) + (None,) * width)[:width]
+        numbers.append(row_number)
+        values.append(row)
+        if len(values) >= chunk_size:
+            yield numbers, values, positions
+            numbers = []
+            values = []
+    if values:
+        yield numbers, values, positions
+
+
+def iter_clean_chunks(excel_file, chunk_size=CHUNK_SIZE, timer=None):
+    """
+    Yields lists of clean tuples, see clean_rows. With a PhaseTimer the
+    time is split into 'parse' (reading the file) and 'clean'.
+    """
+    timer = timer or PhaseTimer()
+    raw_chunks = iter_raw_chunks(excel_file, chunk_size)
+    while True:
+        with timer.phase('parse'):
+            chunk = next(raw_chunks, None)
+        if chunk is None:
+            return
+        with timer.phase('clean'):
+            rows = clean_rows(*chunk)
+        yield rows
+
+
+def parse_file(path, chunk_size=CHUNK_SIZE):
+    """
+    Διαβάζει και καθαρίζει ένα αρχείο, σε ξεχωριστή διεργασία του
+    import_excel. Εδώ και όχι στο command: με spawn/forkserver το παιδί
+    κάνει import μόνο αυτό το module, που δεν χρειάζεται το Django.
+    Returns (chunks, seconds).
+    """
+    started = time.perf_counter()
+    with open(path, 'rb') as excel_file:
+        chunks = list(iter_clean_chunks(excel_file, chunk_size))
+    return chunks, time.perf_counter() - started
+
+
+class PhaseTimer:
+    """
+    Χρόνος ανά φάση ενός upload (parse, clean, classify, insert, staging).
+    current είναι η φάση που τρέχει, π.χ. για να μετρηθούν τα queries της.
+    """
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.current = None
+
+    @contextmanager
+    def phase(self, name):
+        previous = self.current
+        self.current = name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - started
+            self.current = previous
+
+
+class Throughput:
+    """Μετράει γραμμές/δευτερόλεπτο για ένα upload."""
+
+    def __init__(self, label):
+        self.label = label
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    def add(self, rows):
+        self.rows += rows
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed else 0.0
+
+    def log(self):
+        logger.info(
+            "%s: %d rows in %.2fs (%.0f rows/s)",
+            self.label, self.rows, self.elapsed, self.rows_per_second,
+        )
+
+
+def peak_rss_mb():
+    """Peak RSS της διεργασίας σε MB, ή None όπου δεν μετριέται (Windows)."""
+    if resource is None:
+        return None
+    # ru_maxrss είναι σε KB στο Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
@@ -0,0 +1,222 @@
+"""
+Ουρά uploads στη βάση (IngestionJob), χωρίς εξωτερικό broker.
+
+Το upload_excel αποθηκεύει το αρχείο στο INGESTION_UPLOAD_DIR και
+δημιουργεί ένα job· ο run_ingestion_worker τα παίρνει ένα-ένα και τρέχει
+το main.pipeline.run_upload. Πολλοί workers μπορούν να τρέχουν μαζί:
+το claim γίνεται με SELECT ... FOR UPDATE SKIP LOCKED.
+
+Ο worker ανανεώνει το heartbeat_at του job μετά από κάθε κομμάτι. Ένα job
+που έμεινε σε RUNNING χωρίς heartbeat (ο worker σκοτώθηκε) γίνεται FAILED
+από το fail_stale_jobs, αλλιώς θα κρατούσε για πάντα το unique_active_upload.
+"""
+import logging
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .counts import compact
+from .fingerprints import file_fingerprint
+from .models import REVIEW, IngestionJob
+from .pipeline import run_upload
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_TIMEOUT = 10 * 60
+
+
+def _storage():
+    return FileSystemStorage(location=settings.INGESTION_UPLOAD_DIR)
+
+
+class JobAbandoned(Exception):
+    """The job was marked failed (no heartbeat) while it was still running."""
+
+
+class UploadInProgress(Exception):
+    """The same user already has the same file queued or running."""
+
+    def __init__(self, job):
+        super().__init__(f"{job.filename} is already being uploaded (job {job.pk})")
+        self.job = job
+
+
+def _active_job(user, file_hash):
+    return (
+        IngestionJob.objects
+        .filter(user=user, file_hash=file_hash, status__in=IngestionJob.ACTIVE_STATUSES)
+        .first()
+    )
+
+
+def enqueue_upload(user, uploaded_file, conflict_policy=REVIEW):
+    """
+    Saves the uploaded file to disk and queues it. Returns the job.
+
+    Raises UploadInProgress if the user already has the same file (same
+    content) queued or running; the unique_active_upload constraint makes
+    this hold even for two requests at the same moment.
+    """
+    file_hash = file_fingerprint(uploaded_file)
+    fail_stale_jobs()
+    job = _active_job(user, file_hash)
+    if job is not None:
+        raise UploadInProgress(job)
+
+    storage = _storage()
+    name = storage.save(f"{uuid.uuid4().hex}_{uploaded_file.name}", uploaded_file)
+    try:
+        with transaction.atomic():
+            return IngestionJob.objects.create(
+                user=user,
+                filename=uploaded_file.name,
+                file_path=storage.path(name),
+                file_hash=file_hash,
+                conflict_policy=conflict_policy,
+            )
+    except IntegrityError:
+        storage.delete(name)
+        job = _active_job(user, file_hash)
+        if job is None:
+            raise
+        raise UploadInProgress(job)
+
+
+def fail_stale_jobs():
+    """
+    Marks running jobs without a heartbeat for INGESTION_JOB_TIMEOUT as
+    failed and deletes their files. Returns how many were failed.
+    """
+    timeout = getattr(settings, 'INGESTION_JOB_TIMEOUT', DEFAULT_JOB_TIMEOUT)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    stale = IngestionJob.objects.filter(status=IngestionJob.RUNNING).filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+
+    failed = 0
+    for job in stale:
+        # Μόνο αν δεν ήρθε heartbeat στο μεταξύ (το ίδιο filter στο UPDATE)
+        if not stale.filter(pk=job.pk).update(
+            status=IngestionJob.FAILED,
+            finished_at=timezone.now(),
+            error=f"Worker {job.worker} stopped responding",
+        ):
+            continue
+        failed += 1
+        logger.warning("ingestion job %s: no heartbeat from %s, marked failed", job.pk, job.worker)
+        if os.path.exists(job.file_path):
+            os.remove(job.file_path)
+    return failed
+
+
+def claim_next_job(worker_name):
+    """
+    Marks the oldest queued job as running and returns it, or None when the
+    queue is empty. Jobs locked by another worker are skipped, so two
+    workers never claim the same job. Jobs of dead workers are failed
+    first (fail_stale_jobs).
+    """
+    fail_stale_jobs()
+    with transaction.atomic():
+        job = (
+            IngestionJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=IngestionJob.QUEUED)
+            .order_by('created_at', 'pk')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = IngestionJob.RUNNING
+        job.worker = worker_name
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.save(update_fields=['status', 'worker', 'started_at', 'heartbeat_at'])
+    return job
+
+
+def claim_job(job, worker_name='inline'):
+    """
+    Claims one specific queued job, e.g. to run it inside the request when
+    INGESTION_INLINE is on. Returns None if a worker already took it.
+    """
+    now = timezone.now()
+    claimed = IngestionJob.objects.filter(pk=job.pk, status=IngestionJob.QUEUED).update(
+        status=IngestionJob.RUNNING,
+        worker=worker_name,
+        started_at=now,
+        heartbeat_at=now,
+    )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def run_job(job):
+    """Runs a claimed job and records its progress and outcome."""
+
+    def progress(summary):
+        # Η πρόοδος είναι και το heartbeat· αν το job έγινε στο μεταξύ FAILED
+        # (fail_stale_jobs), σταματάμε αντί να τρέχει δεύτερη φορά μαζί με ένα νέο
+        updated = IngestionJob.objects.filter(pk=job.pk, status=IngestionJob.RUNNING).update(
+            heartbeat_at=timezone.now(),
+            rows_processed=summary.rows_processed,
+            rows_added=summary.rows_added,
+            rows_updated=summary.rows_updated,
+            rows_staged=summary.rows_staged,
+            rows_duplicates=summary.rows_duplicates,
+            rows_empty_records=summary.rows_empty_records,
+            rows_kept=summary.rows_kept,
+            rows_skipped=summary.rows_skipped,
+            rows_unchanged=summary.rows_unchanged,
+        )
+        if not updated:
+            raise JobAbandoned(f"job {job.pk} was marked failed while running")
+
+    try:
+        with open(job.file_path, 'rb') as excel_file:
+            summary = run_upload(
+                excel_file, job.filename, job.user,
+                policy=job.conflict_policy, progress=progress,
+            )
+    except JobAbandoned:
+        outcome = None
+    except Exception as e:
+        logger.exception("ingestion job %s failed", job.pk)
+        outcome = {'status': IngestionJob.FAILED, 'error': str(e)}
+    else:
+        outcome = {
+            'status': IngestionJob.DONE,
+            'rows_processed': summary.rows_processed,
+            'rows_added': summary.rows_added,
+            'rows_updated': summary.rows_updated,
+            'rows_staged': summary.rows_staged,
+            'rows_duplicates': summary.rows_duplicates,
+            'rows_empty_records': summary.rows_empty_records,
+            'rows_kept': summary.rows_kept,
+            'rows_skipped': summary.rows_skipped,
+            'rows_unchanged': summary.rows_unchanged,
+            'staged_upload': summary.staged_upload,
+            'identical_upload': summary.identical_upload,
+        }
+    finally:
+        if os.path.exists(job.file_path):
+            os.remove(job.file_path)
+
+    # Μόνο αν είναι ακόμα δικό μας: ένα job που έγινε FAILED στο μεταξύ
+    # (και ίσως ξαναμπήκε στην ουρά ως νέο) δεν ξαναγίνεται DONE
+    finished = outcome is not None and IngestionJob.objects.filter(
+        pk=job.pk, status=IngestionJob.RUNNING,
+    ).update(finished_at=timezone.now(), **outcome)
+    if not finished:
+        logger.warning("ingestion job %s stopped: marked failed while running", job.pk)
+    # Οι γραμμές PersonCountDelta του upload γίνονται μία
+    compact()
+    job.refresh_from_db()
+    return job
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from main.counts import compact
+from main.models import PersonCountDelta
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge the PersonCountDelta rows (one per write to Person) into one. "
+        "Uploads do this themselves; run it e.g. from cron for other changes."
+    )
+
+    def handle(self, *args, **options):
+        before = PersonCountDelta.objects.count()
+        compact()
+        if before > 1:
+            self.stdout.write(self.style.SUCCESS(f"Merged {before} PersonCountDelta rows into one"))
+        else:
+            self.stdout.write("Nothing to merge")
@@ -0,0 +1,160 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from main.counts import compact
+from main.fingerprints import file_fingerprint
+from main.ingestion import CHUNK_SIZE, PhaseTimer, parse_file
+from main.models import CONFLICT_POLICIES, REVIEW, SKIP
+from main.pipeline import find_identical_upload, ingest_chunks
+from main.sources import SUPPORTED_SUFFIXES
+
+
+def parse_files(pool, files, chunk_size, ahead):
+    """
+    Yields (path, chunks, seconds) for files, in order, parsing at most
+    ahead files in pool before the caller has taken them. The cleaned
+    chunks of a file stay in memory until they are written, so memory
+    depends on ahead and not on the number of files.
+    """
+    pending = deque()
+    for path in files:
+        pending.append((path, pool.submit(parse_file, path, chunk_size)))
+        if len(pending) >= ahead:
+            yield _next_parsed(pending)
+    while pending:
+        yield _next_parsed(pending)
+
+
+def _next_parsed(pending):
+    # Σε ξεχωριστή συνάρτηση, ώστε να μην κρατάει το future (και τα κομμάτια
+    # του) ο generator όσο γράφεται το αρχείο
+    path, future = pending.popleft()
+    return (path, *future.result())
+
+
+class Command(BaseCommand):
+    help = (
+        "Import Excel/CSV/ODS files into the catalogue. Files are parsed and cleaned "
+        "in parallel (at most one file per worker ahead of the writer) and written "
+        "one after the other, in the given order."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='+',
+            help="Workbooks, or directories whose workbooks are imported (sorted by name).",
+        )
+        parser.add_argument(
+            '--policy', default=SKIP,
+            choices=[value for value, _ in CONFLICT_POLICIES if value != REVIEW],
+            help="What to do with records that already exist (default: skip).",
+        )
+        parser.add_argument(
+            '--user',
+            help="Username the imports are logged under (default: the first superuser).",
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help="Parser processes (default: number of CPUs).",
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def _files(self, paths):
+        files = []
+        for raw in paths:
+            path = Path(raw)
+            if path.is_dir():
+                files.extend(sorted(
+                    p for p in path.iterdir()
+                    if p.suffix.lower() in SUPPORTED_SUFFIXES and not p.name.startswith('~$')
+                ))
+            elif path.is_file():
+                files.append(path)
+            else:
+                raise CommandError(f"No such file or directory: {raw}")
+        if not files:
+            raise CommandError("No workbooks to import.")
+        return files
+
+    def _user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"No such user: {username}")
+        user = User.objects.filter(is_superuser=True).order_by('pk').first()
+        if user is None:
+            raise CommandError("No superuser found, use --user.")
+        return user
+
+    def handle(self, *args, **options):
+        files = self._files(options['paths'])
+        user = self._user(options['user'])
+        policy = options['policy']
+
+        totals = {'rows': 0, 'added': 0, 'updated': 0, 'unchanged': 0, 'kept': 0, 'skipped': 0}
+        started = time.perf_counter()
+
+        # Αρχεία που έχουν ήδη περάσει με την ίδια πολιτική δεν διαβάζονται
+        hashes = {}
+        for path in list(files):
+            with open(path, 'rb') as f:
+                hashes[path] = file_fingerprint(f)
+            identical = find_identical_upload(hashes[path], policy)
+            if identical is not None:
+                self.stdout.write(
+                    f"{path.name}: identical to {identical.filename} "
+                    f"({identical.uploaded_at:%Y-%m-%d %H:%M}), skipped"
+                )
+                files.remove(path)
+
+        workers = options['workers'] or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = parse_files(pool, files, options['chunk_size'], ahead=workers)
+
+            # Ένας writer, με τη σειρά των αρχείων
+            for path, chunks, parse_seconds in parsed:
+                # Το parse (μαζί με τον καθαρισμό) έγινε σε άλλη διεργασία
+                timer = PhaseTimer()
+                timer.seconds['parse'] = parse_seconds
+                write_started = time.perf_counter()
+                summary = ingest_chunks(
+                    chunks, path.name, user, policy, file_hash=hashes[path], timer=timer,
+                    file_size=path.stat().st_size,
+                )
+                write_seconds = time.perf_counter() - write_started
+                del chunks  # πριν έρθει το επόμενο αρχείο
+
+                rate = summary.rows_processed / write_seconds if write_seconds else 0
+                self.stdout.write(
+                    f"{path.name}: {summary.rows_processed} rows | "
+                    f"{summary.rows_added} added, {summary.rows_updated} updated, "
+                    f"{summary.rows_unchanged} unchanged, "
+                    f"{summary.rows_kept} kept, {summary.rows_skipped} skipped | "
+                    f"parse {parse_seconds:.2f}s, write {write_seconds:.2f}s ({rate:,.0f} rows/s)"
+                )
+
+                totals['rows'] += summary.rows_processed
+                totals['added'] += summary.rows_added
+                totals['updated'] += summary.rows_updated
+                totals['unchanged'] += summary.rows_unchanged
+                totals['kept'] += summary.rows_kept
+                totals['skipped'] += summary.rows_skipped
+
+        # Οι γραμμές PersonCountDelta των αρχείων γίνονται μία
+        compact()
+
+        elapsed = time.perf_counter() - started
+        rate = totals['rows'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {len(files)} files: {totals['rows']} rows | "
+            f"{totals['added']} added, {totals['updated']} updated, "
+            f"{totals['unchanged']} unchanged, {totals['kept']} kept, {totals['skipped']} skipped | "
+            f"{elapsed:.2f}s ({rate:,.0f} rows/s)"
+        ))
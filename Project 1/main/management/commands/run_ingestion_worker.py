@@ -0,0 +1,48 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Process queued Excel uploads (IngestionJob). Run as many workers as needed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit when the queue is empty instead of waiting for new jobs.",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Ingestion worker {worker_name} started")
+
+        while True:
+            job = claim_next_job(worker_name)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Job {job.pk}: {job.filename}")
+            job = run_job(job)
+            if job.status == job.DONE and job.identical_upload_id:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Job {job.pk} done: identical to upload {job.identical_upload_id}, nothing to do"
+                ))
+            elif job.status == job.DONE:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Job {job.pk} done: {job.rows_processed} rows, {job.rows_added} added, "
+                    f"{job.rows_unchanged} unchanged, {job.rows_staged} to review, "
+                    f"{job.rows_skipped} skipped"
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f"Job {job.pk} failed: {job.error}"))
@@ -0,0 +1,119 @@
+"""
+Μετρήσεις ανά request: πλήθος και χρόνος SQL queries, χρόνος render των
+templates και συνολικός χρόνος. Στέλνονται στον browser ως Server-Timing
+header και τα requests πάνω από SLOW_REQUEST_THRESHOLD_MS γράφονται στον
+πίνακα SlowRequest (admin).
+
+Το κόστος είναι δύο perf_counter() ανά query και ανά template, οπότε
+μπορεί να μένει ενεργό και στην παραγωγή.
+"""
+import contextvars
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template as DjangoTemplate
+
+from .models import SlowRequest
+
+logger = logging.getLogger(__name__)
+
+# Ο χρόνος render του τρέχοντος request (None εκτός request)
+_render_seconds = contextvars.ContextVar('render_seconds', default=None)
+
+_original_render = DjangoTemplate.render
+
+
+def _timed_render(self, context=None, request=None):
+    """Template.render του backend, που μετράει και τον χρόνο του."""
+    timing = _render_seconds.get()
+    if timing is None:
+        return _original_render(self, context, request)
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        timing[0] += time.perf_counter() - started
+
+
+class _QueryTimer:
+    """execute_wrapper που μετράει πλήθος και χρόνο των queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header (sql, tpl, app, total) to every response
+    and logs slow requests in SlowRequest. Should be the first middleware,
+    so that total covers all the others.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold_ms = getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', 1000)
+        self.keep = getattr(settings, 'SLOW_REQUEST_KEEP', 1000)
+        # Μία φορά για όλη τη διεργασία
+        if DjangoTemplate.render is _original_render:
+            DjangoTemplate.render = _timed_render
+
+    def __call__(self, request):
+        queries = _QueryTimer()
+        render = [0.0]
+        token = _render_seconds.set(render)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(queries))
+                response = self.get_response(request)
+        finally:
+            _render_seconds.reset(token)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        sql_ms = queries.seconds * 1000
+        render_ms = render[0] * 1000
+        response['Server-Timing'] = ', '.join([
+            f'sql;dur={sql_ms:.1f};desc="{queries.count} queries"',
+            f'tpl;dur={render_ms:.1f}',
+            f'app;dur={max(total_ms - sql_ms - render_ms, 0):.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        if total_ms >= self.threshold_ms:
+            self._log_slow_request(request, response, total_ms, sql_ms, queries.count, render_ms)
+        return response
+
+    def _log_slow_request(self, request, response, total_ms, sql_ms, sql_count, render_ms):
+        user = getattr(request, 'user', None)
+        try:
+            slow = SlowRequest.objects.create(
+                method=request.method,
+                path=request.path[:255],
+                query_string=request.META.get('QUERY_STRING', '')[:500],
+                status_code=response.status_code,
+                user=user if user is not None and user.is_authenticated else None,
+                total_ms=total_ms,
+                sql_ms=sql_ms,
+                sql_count=sql_count,
+                render_ms=render_ms,
+            )
+            # Κυλιόμενος πίνακας: κάθε 100 εγγραφές σβήνονται όσες είναι
+            # παλαιότερες από τις τελευταίες SLOW_REQUEST_KEEP
+            if slow.pk % 100 == 0:
+                SlowRequest.objects.filter(pk__lte=slow.pk - self.keep).delete()
+        except Exception:
+            # Το log δεν πρέπει ποτέ να χαλάσει το ίδιο το request
+            logger.exception("could not log slow request %s", request.path)
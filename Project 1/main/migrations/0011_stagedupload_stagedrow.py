@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-18 17:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_alter_person_ari8moseisagoghs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StagedUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('filename', models.CharField(max_length=255)),
+                ('rows_added', models.PositiveIntegerField(default=0)),
+                ('rows_skipped', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='staged_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StagedRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ari8mos', models.IntegerField()),
+                ('kind', models.CharField(choices=[('D', 'Duplicate'), ('E', 'Empty record')], max_length=1)),
+                ('excel_data', models.JSONField()),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='main.stagedupload')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['upload', 'kind', 'ari8mos'], name='main_staged_upload__0ba927_idx')],
+                'constraints': [models.UniqueConstraint(fields=('upload', 'ari8mos'), name='unique_staged_row')],
+            },
+        ),
+    ]
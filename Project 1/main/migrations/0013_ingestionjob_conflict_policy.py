@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_ingestionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='conflict_policy',
+            field=models.CharField(choices=[('review', 'Επίλυση διπλότυπων ένα-ένα'), ('overwrite', 'Αντικατάσταση όλων των διπλότυπων από το Excel'), ('fill_empty', 'Συμπλήρωση μόνο των κενών εγγραφών'), ('skip', 'Παράλειψη όλων των διπλότυπων')], default='review', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='rows_kept',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='rows_updated',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 6.0 on 2026-10-18 17:29
+
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 2000
+
+# Αντίγραφο του main.fingerprints όπως ήταν σε αυτό το migration: το
+# migration δεν πρέπει να αλλάζει νόημα (ή να σπάει) όταν αλλάζει ο κώδικας
+DATA_FIELDS = (
+    'hmeromhnia_eis', 'syggrafeas', 'koha', 'titlos', 'ekdoths', 'ekdosh',
+    'etosEkdoshs', 'toposEkdoshs', 'sxhma', 'selides', 'tomos',
+    'troposPromPar', 'ISBN', 'sthlh1', 'sthlh2',
+)
+
+
+def record_fingerprint(values):
+    data = '\x1f'.join('' if value is None else str(value) for value in values)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def backfill_content_hash(apps, schema_editor):
+    Person = apps.get_model('main', 'Person')
+    people = []
+    for person in Person.objects.only(*DATA_FIELDS).iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        person.content_hash = record_fingerprint(getattr(person, field) for field in DATA_FIELDS)
+        people.append(person)
+        if len(people) >= BACKFILL_BATCH_SIZE:
+            Person.objects.bulk_update(people, ['content_hash'])
+            people = []
+    if people:
+        Person.objects.bulk_update(people, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_ingestionjob_conflict_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='identical_upload',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='main.uploadlog'),
+        ),
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='rows_unchanged',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='stagedupload',
+            name='file_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='stagedupload',
+            name='rows_unchanged',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadlog',
+            name='conflict_policy',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='uploadlog',
+            name='file_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
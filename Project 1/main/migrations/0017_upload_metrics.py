@@ -0,0 +1,68 @@
+# Generated by Django 6.0 on 2026-10-18 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_ingestionjob_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stagedupload',
+            name='metrics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='uploadlog',
+            name='duration_seconds',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadlog',
+            name='file_size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadlog',
+            name='peak_rss_mb',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadlog',
+            name='phase_seconds',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='uploadlog',
+            name='query_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadlog',
+            name='rows_duplicates',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadlog',
+            name='rows_empty_filled',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadlog',
+            name='rows_per_second',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadlog',
+            name='rows_processed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadlog',
+            name='rows_skipped',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
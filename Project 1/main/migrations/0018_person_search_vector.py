@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 17:48
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0017_upload_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='person',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('titlos', config='greek', weight='A'), '||', django.contrib.postgres.search.SearchVector('syggrafeas', 'koha', config='greek', weight='B'), django.contrib.postgres.search.SearchConfig('greek')), '||', django.contrib.postgres.search.SearchVector('ekdoths', config='greek', weight='C'), django.contrib.postgres.search.SearchConfig('greek')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='person_search_vector_gin'),
+        ),
+    ]
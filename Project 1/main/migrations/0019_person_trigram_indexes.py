@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 17:54
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0018_person_search_vector'),
+    ]
+
+    operations = [
+        # pg_trgm είναι στα contrib του PostgreSQL (trusted extension: αρκεί
+        # ο owner της βάσης, όχι superuser)
+        django.contrib.postgres.operations.TrigramExtension(),
+        # Μόνο το ISBN εδώ· τίτλος, συγγραφέας και εκδότης έχουν τα indexes
+        # τους στις κανονικοποιημένες στήλες (0020)
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('ISBN'), name='gin_trgm_ops'), name='person_isbn_trgm'),
+        ),
+    ]
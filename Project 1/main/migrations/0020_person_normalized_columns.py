@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-18 18:17
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0019_person_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='person',
+            name='ekdoths_norm',
+            field=models.GeneratedField(db_persist=True, expression=models.Func(django.db.models.functions.text.Lower('ekdoths'), models.Value('άέήίόύώϊϋΐΰς'), models.Value('αεηιουωιυιυσ'), function='TRANSLATE'), output_field=models.CharField(blank=True, max_length=200, null=True)),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='koha_norm',
+            field=models.GeneratedField(db_persist=True, expression=models.Func(django.db.models.functions.text.Lower('koha'), models.Value('άέήίόύώϊϋΐΰς'), models.Value('αεηιουωιυιυσ'), function='TRANSLATE'), output_field=models.CharField(blank=True, max_length=200, null=True)),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='syggrafeas_norm',
+            field=models.GeneratedField(db_persist=True, expression=models.Func(django.db.models.functions.text.Lower('syggrafeas'), models.Value('άέήίόύώϊϋΐΰς'), models.Value('αεηιουωιυιυσ'), function='TRANSLATE'), output_field=models.CharField(blank=True, max_length=200, null=True)),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='titlos_norm',
+            field=models.GeneratedField(db_persist=True, expression=models.Func(django.db.models.functions.text.Lower('titlos'), models.Value('άέήίόύώϊϋΐΰς'), models.Value('αεηιουωιυιυσ'), function='TRANSLATE'), output_field=models.CharField(blank=True, max_length=200, null=True)),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['titlos_norm'], name='person_titlos_norm_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['syggrafeas_norm'], name='person_syggrafeas_norm_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['koha_norm'], name='person_koha_norm_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['ekdoths_norm'], name='person_ekdoths_norm_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
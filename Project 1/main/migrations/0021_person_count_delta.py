@@ -0,0 +1,71 @@
+# Generated by Django 6.0 on 2026-10-18 18:28
+
+from django.db import migrations, models
+
+
+# Triggers ανά statement (όχι ανά γραμμή): ένα COPY 100.000 γραμμών γράφει
+# μία γραμμή PersonCountDelta, με το πλήθος του transition table. Κάθε
+# statement προσθέτει τη δική του γραμμή και δεν ενημερώνει καμία κοινή,
+# οπότε δύο uploads μαζί δεν περιμένουν το ένα το άλλο (ούτε κάνουν
+# deadlock) για τον μετρητή. Οι γραμμές φαίνονται μαζί με τα δεδομένα,
+# στο commit, και χάνονται μαζί τους σε ένα rollback
+DELTA_SQL = """
+INSERT INTO main_personcountdelta ("rows", statements)
+SELECT count(*), 1 FROM main_person;
+
+CREATE FUNCTION main_person_count_delta() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO main_personcountdelta ("rows", statements)
+        SELECT count(*), 1 FROM changed_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO main_personcountdelta ("rows", statements)
+        SELECT -count(*), 1 FROM changed_rows;
+    ELSIF TG_OP = 'TRUNCATE' THEN
+        INSERT INTO main_personcountdelta ("rows", statements)
+        SELECT -coalesce(sum("rows"), 0), 1 FROM main_personcountdelta;
+    ELSE
+        INSERT INTO main_personcountdelta ("rows", statements) VALUES (0, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER main_person_count_insert AFTER INSERT ON main_person
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION main_person_count_delta();
+CREATE TRIGGER main_person_count_delete AFTER DELETE ON main_person
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION main_person_count_delta();
+CREATE TRIGGER main_person_count_update AFTER UPDATE ON main_person
+    FOR EACH STATEMENT EXECUTE FUNCTION main_person_count_delta();
+CREATE TRIGGER main_person_count_truncate AFTER TRUNCATE ON main_person
+    FOR EACH STATEMENT EXECUTE FUNCTION main_person_count_delta();
+"""
+
+DROP_DELTA_SQL = """
+DROP TRIGGER main_person_count_insert ON main_person;
+DROP TRIGGER main_person_count_delete ON main_person;
+DROP TRIGGER main_person_count_update ON main_person;
+DROP TRIGGER main_person_count_truncate ON main_person;
+DROP FUNCTION main_person_count_delta();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0020_person_normalized_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonCountDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rows', models.BigIntegerField(default=0)),
+                ('statements', models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunSQL(DELTA_SQL, DROP_DELTA_SQL),
+    ]
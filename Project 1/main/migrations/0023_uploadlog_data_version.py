@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0022_ingestionjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadlog',
+            name='data_version',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,20 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models.functions import Upper
+
+from .fingerprints import person_fingerprint
+from .normalization import normalized_field
+
+# Ρύθμιση full-text του PostgreSQL: ο ελληνικός stemmer αγνοεί τόνους,
+# κεφαλαία και τελικό ς
+SEARCH_CONFIG = 'greek'
+
+# Τα πεδία με κανονικοποιημένη στήλη <πεδίο>_norm (main.normalization) και
+# trigram index (pg_trgm), για την αναζήτηση κομματιού κειμένου και με
+# ανοχή σε λάθη (main.search)
+NORMALIZED_FIELDS = ('titlos', 'syggrafeas', 'koha', 'ekdoths')
 
 class Person(models.Model):
     ari8mosEisagoghs = models.IntegerField(unique=True, primary_key=True, blank=True)
@@ -19,8 +34,53 @@ class Person(models.Model):
     sthlh1 = models.CharField(max_length=200, null=True, blank=True)
     sthlh2 = models.CharField(max_length=200, null=True, blank=True)
 
+    # Αποτύπωμα των 15 πεδίων (main.fingerprints), για τα re-imports
+    content_hash = models.CharField(max_length=32, blank=True, default='', editable=False)
+
+    # 🔎 Full-text αναζήτηση (main.search): τίτλος (A), συγγραφέας (B),
+    # εκδότης (C). Generated column, οπότε την ενημερώνει η ίδια η βάση
+    # σε κάθε εγγραφή (save, COPY, upsert, bulk_update)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('titlos', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('syggrafeas', 'koha', weight='B', config=SEARCH_CONFIG)
+            + SearchVector('ekdoths', weight='C', config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    # 🔤 Χωρίς τόνους, με πεζά και σ αντί για ς: "ΙΣΤΟΡΙΑ" βρίσκει το
+    # "Ιστορία". Generated columns, όπως το search_vector
+    titlos_norm = normalized_field('titlos')
+    syggrafeas_norm = normalized_field('syggrafeas')
+    koha_norm = normalized_field('koha')
+    ekdoths_norm = normalized_field('ekdoths')
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='person_search_vector_gin'),
+            *(
+                GinIndex(fields=[f'{field}_norm'], opclasses=['gin_trgm_ops'], name=f'person_{field}_norm_trgm')
+                for field in NORMALIZED_FIELDS
+            ),
+            # Το ISBN δεν κανονικοποιείται· index στο UPPER(ISBN), όπως
+            # ακριβώς το γράφει το icontains (UPPER("ISBN"::text) LIKE ...)
+            GinIndex(OpClass(Upper('ISBN'), name='gin_trgm_ops'), name='person_isbn_trgm'),
+        ]
+
     def __str__(self):
         return self.ari8mosEisagoghs
+
+    def compute_content_hash(self):
+        return person_fingerprint(self)
+
+    def save(self, *args, **kwargs):
+        self.content_hash = self.compute_content_hash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content_hash' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'content_hash']
+        super().save(*args, **kwargs)
     
 class UploadLog(models.Model):
     user = models.ForeignKey(
@@ -32,6 +92,219 @@ class UploadLog(models.Model):
     filename = models.CharField(max_length=255)
     rows_added = models.PositiveIntegerField(default=0)
     rows_updated = models.PositiveIntegerField(default=0)
+    # SHA-256 του αρχείου και η πολιτική του upload: το ίδιο αρχείο με την
+    # ίδια πολιτική δεν χρειάζεται να ξαναπεράσει
+    file_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    conflict_policy = models.CharField(max_length=20, blank=True, default='')
+    # Η έκδοση των Person (main.counts) μετά το upload, μόνο αν εφαρμόστηκαν
+    # όλες οι γραμμές του (όχι π.χ. "skip all" στην επίλυση)· αν δεν έχει
+    # αλλάξει από τότε, το ίδιο αρχείο δεν έχει τίποτα να αλλάξει
+    data_version = models.BigIntegerField(null=True, blank=True)
+
+    # 📊 Μετρήσεις απόδοσης (main.pipeline.upload_metrics), για το
+    # dashboard του admin
+    file_size = models.PositiveBigIntegerField(default=0)
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_duplicates = models.PositiveIntegerField(default=0)
+    rows_empty_filled = models.PositiveIntegerField(default=0)
+    rows_skipped = models.PositiveIntegerField(default=0)
+    duration_seconds = models.FloatField(default=0)
+    rows_per_second = models.FloatField(default=0)
+    phase_seconds = models.JSONField(default=dict, blank=True)
+    query_count = models.PositiveIntegerField(default=0)
+    # Peak RSS της διεργασίας που έκανε το upload (None όπου δεν μετριέται)
+    peak_rss_mb = models.FloatField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.filename} by {self.user.username} on {self.uploaded_at}"
+
+
+class StagedUpload(models.Model):
+    """Ένα upload που περιμένει επίλυση διπλότυπων / κενών εγγραφών."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="staged_uploads"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    filename = models.CharField(max_length=255)
+    rows_added = models.PositiveIntegerField(default=0)
+    rows_skipped = models.PositiveIntegerField(default=0)
+    rows_unchanged = models.PositiveIntegerField(default=0)
+    file_hash = models.CharField(max_length=64, blank=True, default='')
+    # Οι μετρήσεις του upload, περνάνε στο UploadLog μετά την επίλυση
+    metrics = models.JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return f"{self.filename} by {self.user.username} on {self.created_at}"
+
+
+class StagedRow(models.Model):
+    """
+    Μια γραμμή του Excel που συγκρούεται με υπάρχουσα εγγραφή. Κρατάμε
+    μόνο τα δεδομένα του Excel (λίστα με τις τιμές των 15 πεδίων)· τα
+    δεδομένα της βάσης διαβάζονται από τον Person όταν χρειαστούν.
+    """
+    DUPLICATE = 'D'
+    EMPTY_RECORD = 'E'
+    KIND_CHOICES = [
+        (DUPLICATE, 'Duplicate'),
+        (EMPTY_RECORD, 'Empty record'),
+    ]
+
+    upload = models.ForeignKey(
+        StagedUpload,
+        on_delete=models.CASCADE,
+        related_name="rows"
+    )
+    ari8mos = models.IntegerField()
+    kind = models.CharField(max_length=1, choices=KIND_CHOICES)
+    excel_data = models.JSONField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['upload', 'ari8mos'], name='unique_staged_row'),
+        ]
+        indexes = [
+            models.Index(fields=['upload', 'kind', 'ari8mos']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.ari8mos}"
+
+
+# Πολιτικές για εγγραφές του Excel που υπάρχουν ήδη στη βάση
+REVIEW = 'review'            # επίλυση από τον χρήστη (resolve_duplicates)
+OVERWRITE = 'overwrite'      # το Excel κερδίζει
+FILL_EMPTY = 'fill_empty'    # συμπληρώνονται μόνο οι κενές εγγραφές
+SKIP = 'skip'                # η βάση κερδίζει
+
+CONFLICT_POLICIES = [
+    (REVIEW, 'Επίλυση διπλότυπων ένα-ένα'),
+    (OVERWRITE, 'Αντικατάσταση όλων των διπλότυπων από το Excel'),
+    (FILL_EMPTY, 'Συμπλήρωση μόνο των κενών εγγραφών'),
+    (SKIP, 'Παράλειψη όλων των διπλότυπων'),
+]
+
+
+class IngestionJob(models.Model):
+    """
+    Ένα αρχείο Excel που περιμένει (ή τρέχει) στην ουρά του
+    run_ingestion_worker. Η ουρά είναι αυτός ο πίνακας, χωρίς broker.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="ingestion_jobs"
+    )
+    filename = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    # SHA-256 του αρχείου: το ίδιο αρχείο δεν μπαίνει δύο φορές μαζί στην ουρά
+    file_hash = models.CharField(max_length=64, blank=True, default='')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    conflict_policy = models.CharField(max_length=20, choices=CONFLICT_POLICIES, default=REVIEW)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Ο worker το ανανεώνει μετά από κάθε κομμάτι· ένα job σε RUNNING χωρίς
+    # heartbeat για INGESTION_JOB_TIMEOUT θεωρείται νεκρό (main.jobs.fail_stale_jobs)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    # Πρόοδος, ενημερώνεται μετά από κάθε κομμάτι
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_added = models.PositiveIntegerField(default=0)
+    rows_updated = models.PositiveIntegerField(default=0)
+    rows_staged = models.PositiveIntegerField(default=0)
+    rows_duplicates = models.PositiveIntegerField(default=0)
+    rows_empty_records = models.PositiveIntegerField(default=0)
+    rows_kept = models.PositiveIntegerField(default=0)
+    rows_skipped = models.PositiveIntegerField(default=0)
+    rows_unchanged = models.PositiveIntegerField(default=0)
+
+    staged_upload = models.ForeignKey(
+        StagedUpload,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    # Το ίδιο αρχείο είχε ήδη περάσει με την ίδια πολιτική: δεν έγινε τίποτα
+    identical_upload = models.ForeignKey(
+        UploadLog,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        constraints = [
+            # Ένα ενεργό job ανά χρήστη και αρχείο (βλ. main.jobs.enqueue_upload)
+            models.UniqueConstraint(
+                fields=['user', 'file_hash'],
+                condition=models.Q(status__in=['queued', 'running']) & ~models.Q(file_hash=''),
+                name='unique_active_upload',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+
+class SlowRequest(models.Model):
+    """
+    Ένα request που άργησε περισσότερο από SLOW_REQUEST_THRESHOLD_MS
+    (main.middleware.ServerTimingMiddleware). Κρατιούνται τα τελευταία
+    SLOW_REQUEST_KEEP.
+    """
+    created_at = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    query_string = models.CharField(max_length=500, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    total_ms = models.FloatField()
+    sql_ms = models.FloatField()
+    sql_count = models.PositiveIntegerField()
+    render_ms = models.FloatField()
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.total_ms:.0f} ms)"
+
+
+class PersonCountDelta(models.Model):
+    """
+    Μια αλλαγή στο πλήθος των εγγραφών Person: μία γραμμή ανά statement
+    στο main_person, από triggers της βάσης (migration 0021), οπότε
+    μετράει και τα COPY / upserts του upload. Το άθροισμα των rows είναι
+    το πλήθος και το άθροισμα των statements μια έκδοση που αυξάνεται σε
+    κάθε αλλαγή. Τα διαβάζει (και τα συμπτύσσει) το main.counts.
+    """
+    rows = models.BigIntegerField(default=0)
+    statements = models.BigIntegerField(default=1)
 
     def __str__(self):
-        return f"{self.filename} by {self.user.username} on {self.uploaded_at}"
\ No newline at end of file
+        return f"{self.rows:+} records ({self.statements} statements)"
@@ -0,0 +1,45 @@
+"""
+Κανονικοποίηση κειμένου για την αναζήτηση: πεζά, χωρίς τόνους/διαλυτικά
+και με τελικό ς → σ. "ΙΣΤΟΡΙΑ", "Ιστορία" και "ιστορια" γίνονται όλα
+"ιστορια".
+
+Η ίδια κανονικοποίηση γίνεται στην Python (normalize_text, για ό,τι
+πληκτρολογεί ο χρήστης) και στη βάση (LOWER + TRANSLATE, για τις στήλες
+Person.<πεδίο>_norm). Το LOWER της βάσης ακολουθεί το LC_CTYPE της, που
+πρέπει να είναι UTF-8 (π.χ. el_GR.UTF-8, C.UTF-8) για να κάνει πεζά και
+τα ελληνικά.
+"""
+from django.db import models
+from django.db.models import Func, Value
+from django.db.models.functions import Lower
+
+# Μετά το LOWER μένουν μόνο πεζά. Σύντομη λίστα: το TRANSLATE ψάχνει κάθε
+# χαρακτήρα σε όλη τη λίστα, οπότε κοστίζει ανάλογα με το μήκος της
+_FOLD_FROM = 'άέήίόύώϊϋΐΰς'
+_FOLD_TO = 'αεηιουωιυιυσ'
+
+_FOLD_TABLE = str.maketrans(_FOLD_FROM, _FOLD_TO)
+
+
+def normalize_text(value):
+    """value in lower case, without accents and with σ for ς."""
+    if value is None:
+        return None
+    return str(value).lower().translate(_FOLD_TABLE)
+
+
+def normalized(field):
+    """The SQL expression of normalize_text for field."""
+    return Func(Lower(field), Value(_FOLD_FROM), Value(_FOLD_TO), function='TRANSLATE')
+
+
+def normalized_field(field, max_length=200):
+    """
+    A column with the normalized value of field, kept up to date by the
+    database on every write (save, bulk_create, bulk_update, COPY).
+    """
+    return models.GeneratedField(
+        expression=normalized(field),
+        output_field=models.CharField(max_length=max_length, null=True, blank=True),
+        db_persist=True,
+    )
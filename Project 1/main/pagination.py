@@ -0,0 +1,136 @@
+"""
+Σελιδοποίηση με κλειδί (keyset / seek) για λίστες ταξινομημένες κατά
+αριθμό εισαγωγής: κάθε σελίδα είναι "οι επόμενες PER_PAGE μετά τον αριθμό
+Χ" (WHERE ari8mosEisagoghs > X ORDER BY ari8mosEisagoghs LIMIT PER_PAGE+1),
+οπότε κοστίζει το ίδιο σε οποιοδήποτε βάθος, χωρίς COUNT(*) και OFFSET.
+
+Η θέση περνάει στον browser ως αδιαφανές cursor (encode_cursor): μετά /
+πριν από έναν αριθμό, από έναν αριθμό και μετά (μετάβαση σε αριθμό
+εισαγωγής) ή η τελευταία σελίδα.
+"""
+import base64
+import binascii
+
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+PER_PAGE = 200
+
+KEY = 'ari8mosEisagoghs'
+
+AFTER = 'a'   # > αριθμός (επόμενη σελίδα)
+BEFORE = 'b'  # < αριθμός (προηγούμενη σελίδα)· χωρίς αριθμό: η τελευταία
+FROM = 'f'    # >= αριθμός (μετάβαση σε αριθμό εισαγωγής)
+
+
+def encode_cursor(direction, number=None):
+    token = direction + ('' if number is None else str(number))
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(direction, number or None), or None for a missing or invalid cursor."""
+    if not cursor:
+        return None
+    try:
+        token = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    direction, number = token[:1], token[1:]
+    if direction not in (AFTER, BEFORE, FROM):
+        return None
+    if not number:
+        return (direction, None)
+    if not number.isdigit():
+        return None
+    return (direction, int(number))
+
+
+class CountedPaginator(Paginator):
+    """A Paginator with a known count (main.counts), without its own COUNT."""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        return self._count
+
+
+def keyset_ordered(qs):
+    """True if qs is ordered by the accession number alone."""
+    return tuple(qs.query.order_by) in ((KEY,), ('pk',))
+
+
+class KeysetPage:
+    """One page of keyset_page, iterable like a Paginator page."""
+
+    def __init__(self, object_list, has_previous, has_next):
+        self.object_list = object_list
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    @property
+    def first_number(self):
+        return getattr(self.object_list[0], KEY) if self.object_list else None
+
+    @property
+    def last_number(self):
+        return getattr(self.object_list[-1], KEY) if self.object_list else None
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor(BEFORE, self.first_number) if self._has_previous else None
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(AFTER, self.last_number) if self._has_next else None
+
+    @property
+    def last_cursor(self):
+        return encode_cursor(BEFORE) if self._has_next else None
+
+
+def keyset_page(qs, cursor=None, per_page=PER_PAGE):
+    """
+    The page of qs at cursor (the first page without one). One query, plus
+    an EXISTS for the previous page after a jump to a number.
+    """
+    direction, number = decode_cursor(cursor) or (AFTER, None)
+
+    if direction == BEFORE:
+        rows = qs.order_by(f'-{KEY}')
+        if number is not None:
+            rows = rows.filter(**{f'{KEY}__lt': number})
+        rows = list(rows[:per_page + 1])
+        has_previous = len(rows) > per_page
+        # Η σελίδα πριν από μια υπάρχουσα σελίδα έχει πάντα επόμενη
+        return KeysetPage(rows[:per_page][::-1], has_previous, number is not None)
+
+    rows = qs.order_by(KEY)
+    if number is not None:
+        rows = rows.filter(**{f'{KEY}__{"gte" if direction == FROM else "gt"}': number})
+    rows = list(rows[:per_page + 1])
+    has_next = len(rows) > per_page
+
+    if number is None:
+        has_previous = False
+    elif direction == FROM:
+        has_previous = qs.filter(**{f'{KEY}__lt': number}).exists()
+    else:
+        # Μετά από μια υπάρχουσα σελίδα
+        has_previous = True
+    return KeysetPage(rows[:per_page], has_previous, has_next)
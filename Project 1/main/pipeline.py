@@ -0,0 +1,382 @@
+"""
+Η ροή ενός upload: καθαρισμός → ταξινόμηση → εισαγωγή.
+
+Χρησιμοποιείται από το upload_excel (μέσω της ουράς του main.jobs) και
+μπορεί να τρέξει είτε μέσα στο request είτε σε worker, καθώς και από
+το management command import_excel.
+"""
+from django.db import connection
+
+from .bulk import EMPTY_RECORD_FIELDS, insert_people, upsert_people
+from .classify_sql import classify_in_database, ingest_in_database
+from .counts import PersonCounts
+from .fingerprints import file_fingerprint, record_fingerprint
+from .ingestion import FIELDS, PhaseTimer, Throughput, iter_clean_chunks, peak_rss_mb
+from .models import FILL_EMPTY, OVERWRITE, REVIEW, Person, StagedRow, StagedUpload, UploadLog
+
+
+def is_empty_record(person):
+    return not any(getattr(person, field) for field in EMPTY_RECORD_FIELDS)
+
+
+def changed_fields(person, values):
+    """
+    The fields where the Excel row (values, in FIELDS order) differs from
+    person. None and '' count as the same value.
+    """
+    return [
+        field for field, value in zip(FIELDS, values)
+        if (value or '') != (getattr(person, field) or '')
+    ]
+
+
+class UploadSummary:
+    """Τα αποτελέσματα ενός upload μέχρι στιγμής."""
+
+    def __init__(self):
+        self.rows_processed = 0
+        self.rows_added = 0
+        self.rows_updated = 0
+        self.rows_staged = 0
+        self.rows_duplicates = 0  # συγκρούσεις με εγγραφές που έχουν άλλα δεδομένα
+        self.rows_empty_records = 0  # συγκρούσεις με κενές εγγραφές της βάσης
+        self.rows_kept = 0  # υπάρχουσες εγγραφές που έμειναν όπως ήταν
+        self.rows_unchanged = 0  # γραμμές ίδιες με τη βάση (ίδιο αποτύπωμα)
+        self.skipped = []
+        self.staged_upload = None
+        self.identical_upload = None  # UploadLog του ίδιου αρχείου, αν υπάρχει
+        self.timer = None  # PhaseTimer με τους χρόνους ανά φάση
+        self.file_size = 0
+        self.seconds = 0.0
+        self.query_count = 0
+        self.peak_rss_mb = None
+
+    @property
+    def rows_skipped(self):
+        return len(self.skipped)
+
+
+def _stage_conflicts(candidates, existing_ids, summary, user, filename, file_hash):
+    """
+    REVIEW: inserts the new rows of the chunk and stages the ones that
+    conflict with existing records for resolve_duplicates.
+    """
+    timer = summary.timer
+
+    with timer.phase('classify'):
+        new_rows, staged_rows = _classify_conflicts(candidates, existing_ids, summary)
+
+    # ✅ Bulk insert new records (non-duplicates) ανά κομμάτι
+    with timer.phase('insert'):
+        summary.rows_added += insert_people(new_rows)
+
+    # ✅ Τα διπλότυπα πάνε στον πίνακα staging
+    if staged_rows:
+        with timer.phase('staging'):
+            if summary.staged_upload is None:
+                summary.staged_upload = StagedUpload.objects.create(
+                    user=user,
+                    filename=filename,
+                    file_hash=file_hash,
+                )
+            for staged_row in staged_rows:
+                staged_row.upload = summary.staged_upload
+            StagedRow.objects.bulk_create(staged_rows, batch_size=1000)
+        summary.rows_staged += len(staged_rows)
+        empty_records = sum(1 for row in staged_rows if row.kind == StagedRow.EMPTY_RECORD)
+        summary.rows_empty_records += empty_records
+        summary.rows_duplicates += len(staged_rows) - empty_records
+
+
+def _resolve_unchanged(candidates, existing_ids, summary):
+    """
+    Non-REVIEW policies: drops the candidates whose record is already the
+    same field by field (an old or missing content_hash) and counts them
+    as rows_unchanged; only their content_hash is refreshed. Returns the
+    rows that really change and how many of them conflict with empty
+    records (one query for the conflicts of the chunk).
+    """
+    conflicts = Person.objects.only(*FIELDS).in_bulk(
+        [ari8mos for ari8mos, _ in candidates if ari8mos in existing_ids]
+    )
+
+    changed = []
+    stale = []
+    empty_records = 0
+    for ari8mos, values in candidates:
+        existing_person = conflicts.get(ari8mos)
+        if existing_person is not None and not changed_fields(existing_person, values):
+            existing_person.content_hash = existing_person.compute_content_hash()
+            stale.append(existing_person)
+            continue
+        if existing_person is not None and is_empty_record(existing_person):
+            empty_records += 1
+        changed.append((ari8mos, values))
+
+    if stale:
+        Person.objects.bulk_update(stale, ['content_hash'], batch_size=1000)
+        summary.rows_unchanged += len(stale)
+    return changed, empty_records
+
+
+def _classify_conflicts(candidates, existing_ids, summary):
+    """
+    Splits candidates into new rows and StagedRows (without upload).
+    Records that are already the same field by field only get a fresh
+    content_hash, like in _resolve_unchanged.
+    """
+    # 🔴 DUPLICATE CHECK στη βάση: φορτώνουμε μόνο τις εγγραφές που
+    # υπάρχουν ήδη και άλλαξαν (ένα IN query)
+    conflicts = Person.objects.in_bulk(
+        [ari8mos for ari8mos, _ in candidates if ari8mos in existing_ids]
+    )
+
+    new_rows = []
+    staged_rows = []
+    stale = []
+    for ari8mos, values in candidates:
+        existing_person = conflicts.get(ari8mos)
+
+        if existing_person is None:
+            # ✅ SAFE INSERT
+            new_rows.append((ari8mos, *values))
+            continue
+
+        # ✅ Ίδια με τη βάση πεδίο-πεδίο (π.χ. εγγραφή με παλιό αποτύπωμα):
+        # δεν χρειάζεται επίλυση, μόνο νέο αποτύπωμα
+        if not changed_fields(existing_person, values):
+            existing_person.content_hash = existing_person.compute_content_hash()
+            stale.append(existing_person)
+            continue
+
+        # ✅ Empty record in DB → potential insertion, αλλιώς πραγματικό duplicate
+        staged_rows.append(StagedRow(
+            ari8mos=ari8mos,
+            kind=StagedRow.EMPTY_RECORD if is_empty_record(existing_person) else StagedRow.DUPLICATE,
+            excel_data=values,
+        ))
+
+    if stale:
+        Person.objects.bulk_update(stale, ['content_hash'], batch_size=1000)
+        summary.rows_unchanged += len(stale)
+    return new_rows, staged_rows
+
+
+def run_upload(excel_file, filename, user, policy=REVIEW, progress=None, timer=None):
+    """
+    Runs the whole upload of excel_file chunk by chunk.
+
+    New records are inserted and invalid rows are skipped. Rows that
+    conflict with existing records are staged for review
+    (StagedUpload/StagedRow) when policy is REVIEW; any other policy
+    resolves them right away with a native upsert (see
+    main.bulk.upsert_people). progress(summary) is called after every
+    chunk. When nothing needs review the upload is logged in UploadLog
+    right away.
+
+    If the same file was already uploaded and applied in full with the
+    same policy, and Person hasn't changed since, nothing is read at all;
+    summary.identical_upload is that earlier UploadLog.
+    summary.timer holds the time of every phase (see PhaseTimer).
+    """
+    timer = timer or PhaseTimer()
+    with timer.phase('hash'):
+        file_size = _file_size(excel_file)
+        file_hash = file_fingerprint(excel_file)
+        identical = find_identical_upload(file_hash, policy)
+    if identical is not None:
+        summary = UploadSummary()
+        summary.identical_upload = identical
+        summary.timer = timer
+        return summary
+
+    return ingest_chunks(
+        iter_clean_chunks(excel_file, timer=timer), filename, user, policy, progress,
+        file_hash, timer, file_size,
+    )
+
+
+def _file_size(file):
+    size = getattr(file, 'size', None)
+    if size is None:
+        size = file.seek(0, 2)
+        file.seek(0)
+    return size
+
+
+def find_identical_upload(file_hash, policy):
+    """
+    The latest UploadLog of the same file with the same policy that left
+    Person as it is now (see UploadLog.data_version), or None. Otherwise
+    the fingerprints decide row by row.
+    """
+    if not file_hash:
+        return None
+    return (
+        UploadLog.objects
+        .filter(file_hash=file_hash, conflict_policy=policy, data_version=PersonCounts().version)
+        .order_by('-uploaded_at')
+        .first()
+    )
+
+
+def _ingest_in_python(chunks, summary, user, filename, policy, file_hash, progress, throughput):
+    """Ταξινόμηση ανά κομμάτι στην Python (κάθε βάση)."""
+    timer = summary.timer
+
+    # 🔴 Νέο set για να εντοπίζει διπλότυπα μέσα στο ίδιο Excel
+    seen_in_file = set()
+
+    # Κάθε γραμμή έρχεται ήδη καθαρή: (row_number, ari8mos, *FIELDS)
+    for rows in chunks:
+        with timer.phase('classify'):
+            candidates = []
+
+            for row_number, ari8mos, *values in rows:
+                if ari8mos is None:
+                    summary.skipped.append({
+                        'row': row_number,
+                        'reason': 'Invalid ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ'
+                    })
+                    continue
+
+                if not ari8mos:
+                    summary.skipped.append({
+                        'row': row_number,
+                        'reason': 'Missing ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ'
+                    })
+                    continue
+
+                # 🔴 DUPLICATE ΜΕΣΑ ΣΤΟ ΙΔΙΟ EXCEL
+                if ari8mos in seen_in_file:
+                    summary.skipped.append({
+                        'row': row_number,
+                        'reason': 'Duplicate ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ inside Excel'
+                    })
+                    continue
+                seen_in_file.add(ari8mos)
+
+                candidates.append((ari8mos, values))
+
+            # 🔴 Αποτυπώματα: ένα query για τα hashes του κομματιού· οι γραμμές
+            # που είναι ίδιες με τη βάση δεν συγκρίνονται ούτε γράφονται
+            existing_hashes = dict(
+                Person.objects
+                .filter(pk__in=[ari8mos for ari8mos, _ in candidates])
+                .values_list('pk', 'content_hash')
+            )
+            changed = []
+            for ari8mos, values in candidates:
+                if existing_hashes.get(ari8mos) == record_fingerprint(values):
+                    summary.rows_unchanged += 1
+                else:
+                    changed.append((ari8mos, values))
+
+        if policy == REVIEW:
+            _stage_conflicts(changed, existing_hashes, summary, user, filename, file_hash)
+        else:
+            # Οι συγκρούσεις ελέγχονται πεδίο-πεδίο, ώστε μια εγγραφή με παλιό
+            # αποτύπωμα να μη μετρηθεί ως ενημέρωση· και για τις μετρήσεις,
+            # πόσες είναι με κενές εγγραφές (πριν τις αλλάξει το upsert)
+            if any(ari8mos in existing_hashes for ari8mos, _ in changed):
+                with timer.phase('classify'):
+                    changed, empty_records = _resolve_unchanged(changed, existing_hashes, summary)
+                conflicts = sum(1 for ari8mos, _ in changed if ari8mos in existing_hashes)
+                summary.rows_empty_records += empty_records
+                summary.rows_duplicates += conflicts - empty_records
+
+            # ✅ Ένα INSERT ... ON CONFLICT ανά batch, χωρίς επίλυση από τον χρήστη
+            with timer.phase('insert'):
+                added, updated = upsert_people(
+                    [(ari8mos, *values) for ari8mos, values in changed], policy, existing_hashes,
+                )
+            summary.rows_added += added
+            summary.rows_updated += updated
+            summary.rows_kept += len(changed) - added - updated
+
+        summary.rows_processed += len(rows)
+        throughput.add(len(rows))
+        if progress is not None:
+            with timer.phase('progress'):
+                progress(summary)
+
+
+def upload_metrics(summary, policy, rows_empty_filled=None):
+    """
+    The performance fields of UploadLog for summary. rows_empty_filled is
+    given when the user resolved the empty records (REVIEW); for the
+    other policies it follows from the policy.
+    """
+    if rows_empty_filled is None:
+        if policy == OVERWRITE:
+            rows_empty_filled = summary.rows_empty_records
+        elif policy == FILL_EMPTY:
+            rows_empty_filled = summary.rows_updated
+        else:
+            rows_empty_filled = 0
+    return {
+        'file_size': summary.file_size,
+        'rows_processed': summary.rows_processed,
+        'rows_duplicates': summary.rows_duplicates,
+        'rows_empty_filled': rows_empty_filled,
+        'rows_skipped': summary.rows_skipped,
+        'duration_seconds': round(summary.seconds, 3),
+        'rows_per_second': round(summary.rows_processed / summary.seconds, 1) if summary.seconds else 0,
+        'phase_seconds': {name: round(seconds, 3) for name, seconds in summary.timer.seconds.items()},
+        'query_count': summary.query_count,
+        'peak_rss_mb': summary.peak_rss_mb,
+    }
+
+
+def ingest_chunks(chunks, filename, user, policy=REVIEW, progress=None, file_hash='', timer=None,
+                  file_size=0):
+    """
+    Same as run_upload, for chunks that are already cleaned (lists of
+    tuples from main.ingestion.clean_rows), e.g. parsed in another process.
+
+    Rows whose fingerprint matches the existing record are only counted
+    (rows_unchanged); everything else is classified as usual.
+    """
+    summary = UploadSummary()
+    summary.timer = timer or PhaseTimer()
+    summary.file_size = file_size
+    throughput = Throughput(f'upload {filename}')
+
+    def count_query(execute, sql, params, many, context):
+        summary.query_count += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_query):
+        if classify_in_database():
+            # 🔵 PostgreSQL: ταξινόμηση όλου του αρχείου με λίγα SQL statements
+            ingest_in_database(chunks, summary, user, filename, policy, file_hash, progress, throughput)
+        else:
+            _ingest_in_python(chunks, summary, user, filename, policy, file_hash, progress, throughput)
+    summary.seconds = throughput.elapsed
+    summary.peak_rss_mb = peak_rss_mb()
+
+    throughput.log()
+
+    with summary.timer.phase('finish'):
+        if summary.staged_upload is not None:
+            summary.staged_upload.rows_added = summary.rows_added
+            summary.staged_upload.rows_skipped = summary.rows_skipped
+            summary.staged_upload.rows_unchanged = summary.rows_unchanged
+            summary.staged_upload.metrics = upload_metrics(summary, policy)
+            summary.staged_upload.save(
+                update_fields=['rows_added', 'rows_skipped', 'rows_unchanged', 'metrics'],
+            )
+        else:
+            # ✅ Log upload (αλλιώς γίνεται μετά την επίλυση των διπλότυπων)
+            UploadLog.objects.create(
+                user=user,
+                filename=filename,
+                rows_added=summary.rows_added,
+                rows_updated=summary.rows_updated,
+                file_hash=file_hash,
+                conflict_policy=policy,
+                data_version=PersonCounts().version,
+                **upload_metrics(summary, policy),
+            )
+
+    return summary
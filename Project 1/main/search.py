@@ -0,0 +1,194 @@
+"""
+Αναζήτηση εγγραφών για το show_people.
+
+Τρεις τρόποι:
+
+- substring (ο προεπιλεγμένος): κομμάτι κειμένου, όπως ήταν πάντα η
+  αναζήτηση, οπότε ταιριάζουν και κομμάτια λέξεων και ISBN. Τίτλος,
+  συγγραφέας και εκδότης ψάχνονται στις κανονικοποιημένες στήλες
+  (main.normalization: χωρίς τόνους, κεφαλαία και τελικό ς) με τα trigram
+  indexes (pg_trgm) τους αντί για full scan.
+- full-text (PostgreSQL, αν τον διαλέξει ο χρήστης): η στήλη
+  Person.search_vector με GIN index και τον ελληνικό stemmer. Όλες οι
+  λέξεις πρέπει να υπάρχουν (ως προθέματα, αφού η αναζήτηση τρέχει όσο
+  πληκτρολογεί ο χρήστης) και τα αποτελέσματα ταξινομούνται κατά συνάφεια.
+- similar ("μήπως εννοούσατε;"): ομοιότητα trigram (word_similarity) στις
+  ίδιες στήλες, με ανοχή σε ορθογραφικά λάθη· τα αποτελέσματα
+  ταξινομούνται κατά ομοιότητα.
+
+Ο αριθμός, η ημερομηνία και το ISBN ψάχνονται πάντα όπως πριν.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from .models import NORMALIZED_FIELDS, SEARCH_CONFIG
+from .normalization import normalize_text
+
+FULLTEXT = 'fulltext'
+SUBSTRING = 'substring'
+SIMILAR = 'similar'
+
+SEARCH_MODES = (
+    (SUBSTRING, 'Κομμάτι κειμένου'),
+    (FULLTEXT, 'Λέξεις (full-text)'),
+    (SIMILAR, 'Μήπως εννοούσατε; (ανοχή σε λάθη)'),
+)
+
+# Τα βάρη του search_vector ανά κατηγορία (βλ. Person.search_vector)
+FULLTEXT_WEIGHTS = {
+    'all': '',
+    'titlos': 'A',
+    'syggrafeas': 'B',
+    'ekdoths': 'C',
+}
+
+# Τα πεδία ανά κατηγορία για την αναζήτηση με ανοχή σε λάθη (όλα με
+# κανονικοποιημένη στήλη, βλ. Person.NORMALIZED_FIELDS)
+SIMILAR_FIELDS = {
+    'all': ('titlos', 'syggrafeas', 'koha', 'ekdoths'),
+    'titlos': ('titlos',),
+    'syggrafeas': ('syggrafeas', 'koha'),
+    'ekdoths': ('ekdoths',),
+}
+
+# Το κατώφλι του word_similarity για το similar (το 0.6 του pg_trgm
+# απορρίπτει ήδη ένα λάθος γράμμα σε μεσαίες λέξεις)
+DEFAULT_SIMILARITY_THRESHOLD = 0.45
+
+_WORD = re.compile(r'\w+')
+
+
+def fulltext_available():
+    return connection.vendor == 'postgresql'
+
+
+def default_mode():
+    """
+    Substring search, as before full-text: it matches parts of words and
+    of ISBNs and keeps the list in accession order (keyset pagination).
+    """
+    return SUBSTRING
+
+
+def contains(field, search):
+    """
+    Q for field containing search. Ignores tonos, case and final ς for the
+    NORMALIZED_FIELDS (through their indexed _norm column), plain
+    icontains for the rest.
+    """
+    if field in NORMALIZED_FIELDS:
+        return Q(**{f'{field}_norm__contains': normalize_text(search)})
+    return Q(**{f'{field}__icontains': search})
+
+
+def fulltext_query(search, weights=''):
+    """
+    A tsquery with every word of search as a prefix (ιστορ → ιστορία),
+    joined with AND and limited to the given weights. None when search
+    has no words.
+    """
+    # Μόνο γράμματα/ψηφία, ώστε να μη χρειάζεται escaping στο tsquery
+    words = _WORD.findall(search)
+    if not words:
+        return None
+    return SearchQuery(
+        ' & '.join(f"{word}:*{weights}" for word in words),
+        search_type='raw',
+        config=SEARCH_CONFIG,
+    )
+
+
+def search_people(qs, search, category='all', mode=None):
+    """
+    Filters qs by search in category; full-text results come ranked.
+    SIMILAR results must be evaluated in the same transaction
+    (transaction.atomic), see _set_similarity_threshold.
+    """
+    if not search:
+        return qs
+    mode = mode or default_mode()
+
+    if mode == FULLTEXT and category in FULLTEXT_WEIGHTS and fulltext_available():
+        query = fulltext_query(search, FULLTEXT_WEIGHTS[category])
+        if query is None:
+            return qs.none()
+        q = Q(search_vector=query)
+        if category == 'all' and search.isdigit():
+            q |= Q(ari8mosEisagoghs=int(search))
+        return (
+            qs.filter(q)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', 'ari8mosEisagoghs')
+        )
+
+    if mode == SIMILAR and category in SIMILAR_FIELDS and fulltext_available():
+        return _similar_search(qs, search, category)
+
+    return _substring_search(qs, search, category)
+
+
+def _similar_search(qs, search, category):
+    """
+    Records with a word similar to search in the fields of category, most
+    similar first. Uses the trigram indexes of the _norm columns.
+    """
+    _set_similarity_threshold()
+
+    fields = SIMILAR_FIELDS[category]
+    normalized = normalize_text(search)
+    # πεδίο_norm %> search: κάποια λέξη του πεδίου μοιάζει με το search
+    q = Q()
+    for field in fields:
+        q |= Q(TrigramWordSimilar(F(f'{field}_norm'), normalized))
+    if category == 'all' and search.isdigit():
+        q |= Q(ari8mosEisagoghs=int(search))
+
+    similarities = [TrigramWordSimilarity(normalized, f'{field}_norm') for field in fields]
+    similarity = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+    return (
+        qs.filter(q)
+        .annotate(similarity=similarity)
+        .order_by('-similarity', 'ari8mosEisagoghs')
+    )
+
+
+def _set_similarity_threshold():
+    # Ο τελεστής %> (που χρησιμοποιεί το index) συγκρίνει με τη ρύθμιση
+    # pg_trgm.word_similarity_threshold. Μόνο για το τρέχον transaction
+    # (is_local), ώστε να μη μείνει στη σύνδεση για τα επόμενα queries
+    # (persistent connections)
+    threshold = getattr(settings, 'SEARCH_SIMILARITY_THRESHOLD', DEFAULT_SIMILARITY_THRESHOLD)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+            [str(threshold)],
+        )
+
+
+def _substring_search(qs, search, category):
+    if category == 'all':
+        # Search all fields (original behavior)
+        q = contains('titlos', search) | contains('syggrafeas', search)
+
+        if search.isdigit():
+            q |= Q(ari8mosEisagoghs=int(search))
+
+        return qs.filter(q)
+
+    if category == 'ari8mos':
+        # Search only by number
+        if search.isdigit():
+            return qs.filter(ari8mosEisagoghs=int(search))
+        # If non-numeric input for number search, show no results
+        return qs.none()
+
+    if category in ('hmeromhnia_eis', 'titlos', 'syggrafeas', 'ekdoths', 'ISBN'):
+        return qs.filter(contains(category, search))
+
+    return qs
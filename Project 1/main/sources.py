@@ -0,0 +1,194 @@
+"""
+Πηγές εισαγωγής για το upload_excel και το import_excel.
+
+Κάθε τύπος αρχείου έχει τον δικό του reader που δίνει τις γραμμές του
+πρώτου φύλλου ως απλά tuples: η πρώτη γραμμή είναι η επικεφαλίδα και τα
+κενά κελιά είναι None. Ο reader επιλέγεται από την κατάληξη του αρχείου
+(get_source) και όλοι διαβάζουν το αρχείο σταδιακά, εκτός από το .xls.
+Οι βιβλιοθήκες (openpyxl, pandas) φορτώνονται μόνο όταν διαβαστεί αρχείο.
+"""
+import codecs
+import csv
+import io
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+
+class IngestionSource:
+    """Base class: a file type and a reader that yields row tuples."""
+
+    suffixes = ()
+
+    def __init__(self, file):
+        self.file = file
+
+    def iter_rows(self):
+        raise NotImplementedError
+
+
+class XlsxSource(IngestionSource):
+    """openpyxl σε read_only mode, χωρίς να φορτώνεται όλο το βιβλίο."""
+
+    suffixes = ('.xlsx', '.xlsm')
+
+    def iter_rows(self):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.file, read_only=True, data_only=True)
+        try:
+            yield from workbook.worksheets[0].iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+
+class XlsSource(IngestionSource):
+    """Fallback για παλιά .xls αρχεία που δεν διαβάζει το openpyxl."""
+
+    suffixes = ('.xls',)
+
+    def iter_rows(self):
+        # Μόνο εδώ χρειάζεται το pandas (και το xlrd από πίσω του)
+        import pandas as pd
+
+        df = pd.read_excel(self.file, header=None, dtype=object)
+        df = df.astype(object).where(df.notna(), None)
+        yield from df.itertuples(index=False, name=None)
+
+
+def _detect_encoding(sample):
+    """UTF-8 (με ή χωρίς BOM), αλλιώς Windows-1253 όπως τα παλιά exports."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return 'cp1253'
+    return 'utf-8'
+
+
+class CsvSource(IngestionSource):
+    """
+    Streaming reader του csv module. Το διαχωριστικό είναι tab για .tsv,
+    αλλιώς βρίσκεται από την επικεφαλίδα (',' ή ';' ή tab).
+    """
+
+    suffixes = ('.csv', '.tsv')
+    delimiters = (',', ';', '\t')
+    sample_size = 64 * 1024
+
+    def __init__(self, file, delimiter=None):
+        super().__init__(file)
+        self.delimiter = delimiter
+
+    def _delimiter(self, text_sample):
+        if self.delimiter:
+            return self.delimiter
+        if getattr(self.file, 'name', '').lower().endswith('.tsv'):
+            return '\t'
+        # Το διαχωριστικό που εμφανίζεται πιο συχνά στην επικεφαλίδα
+        header_line = text_sample.splitlines()[0] if text_sample else ''
+        return max(self.delimiters, key=header_line.count)
+
+    def iter_rows(self):
+        sample = self.file.read(self.sample_size)
+        self.file.seek(0)
+        encoding = _detect_encoding(sample)
+        delimiter = self._delimiter(sample.decode(encoding, errors='ignore'))
+
+        text = io.TextIOWrapper(self.file, encoding=encoding, newline='')
+        try:
+            for row in csv.reader(text, delimiter=delimiter):
+                yield tuple(value if value != '' else None for value in row)
+        finally:
+            # Το αρχείο ανήκει στον caller, δεν το κλείνουμε μαζί με το wrapper
+            text.detach()
+
+
+_TABLE = '{urn:oasis:names:tc:opendocument:xmlns:table:1.0}'
+_OFFICE = '{urn:oasis:names:tc:opendocument:xmlns:office:1.0}'
+_TEXT = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
+
+_ODS_CELLS = (_TABLE + 'table-cell', _TABLE + 'covered-table-cell')
+_ODS_NUMBER_TYPES = ('float', 'percentage', 'currency')
+_ODS_VALUE_ATTRIBUTES = {
+    'date': _OFFICE + 'date-value',
+    'time': _OFFICE + 'time-value',
+    'boolean': _OFFICE + 'boolean-value',
+}
+
+
+def _ods_cell_value(cell):
+    value_type = cell.get(_OFFICE + 'value-type')
+    if value_type in _ODS_NUMBER_TYPES:
+        # Όπως το openpyxl: οι ακέραιοι μένουν int
+        value = cell.get(_OFFICE + 'value')
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
+    if value_type in _ODS_VALUE_ATTRIBUTES:
+        return cell.get(_ODS_VALUE_ATTRIBUTES[value_type])
+    paragraphs = [''.join(p.itertext()) for p in cell.iter(_TEXT + 'p')]
+    return '\n'.join(paragraphs) if paragraphs else None
+
+
+class OdsSource(IngestionSource):
+    """
+    OpenDocument (LibreOffice) φύλλα: το content.xml διαβάζεται με
+    iterparse, γραμμή-γραμμή. Τα επαναλαμβανόμενα κενά κελιά/γραμμές
+    (number-*-repeated) δεν αναπτύσσονται αν δεν ακολουθούν δεδομένα.
+    """
+
+    suffixes = ('.ods',)
+
+    def iter_rows(self):
+        with zipfile.ZipFile(self.file) as archive, archive.open('content.xml') as content:
+            row = []
+            empty_cells = 0
+            empty_rows = 0
+
+            for event, element in iterparse(content, events=('end',)):
+                if element.tag in _ODS_CELLS:
+                    repeat = int(element.get(_TABLE + 'number-columns-repeated', 1))
+                    value = _ods_cell_value(element)
+                    if value is None:
+                        empty_cells += repeat
+                    else:
+                        row.extend([None] * empty_cells)
+                        row.extend([value] * repeat)
+                        empty_cells = 0
+
+                elif element.tag == _TABLE + 'table-row':
+                    repeat = int(element.get(_TABLE + 'number-rows-repeated', 1))
+                    if row:
+                        for _ in range(empty_rows):
+                            yield ()
+                        for _ in range(repeat):
+                            yield tuple(row)
+                        empty_rows = 0
+                    else:
+                        empty_rows += repeat
+                    row = []
+                    empty_cells = 0
+                    element.clear()
+
+                elif element.tag == _TABLE + 'table':
+                    # Μόνο το πρώτο φύλλο
+                    break
+
+
+SOURCES = (XlsxSource, XlsSource, CsvSource, OdsSource)
+
+SUPPORTED_SUFFIXES = tuple(suffix for source in SOURCES for suffix in source.suffixes)
+
+
+def get_source(file, name=None):
+    """
+    Returns the source for file, chosen by the suffix of name (or of
+    file.name). Files without a known suffix are read as .xlsx.
+    """
+    name = (name or getattr(file, 'name', '') or '').lower()
+    for source in SOURCES:
+        if name.endswith(source.suffixes):
+            return source(file)
+    return XlsxSource(file)
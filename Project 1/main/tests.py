@@ -1,3 +1,1063 @@
-from django.test import TestCase
+"""
+Query budgets για τα views: κάθε view έχει σταθερό ανώτατο όριο SQL
+queries και χρόνου, με δεδομένα ρεαλιστικού μεγέθους (PEOPLE εγγραφές,
+upload UPLOAD_ROWS γραμμών). Τα όρια δεν εξαρτώνται από το πλήθος των
+γραμμών, οπότε ένα νέο query ανά γραμμή (N+1) τα ξεπερνάει αμέσως.
 
-# Create your tests here.
+Και η συμπεριφορά της εισαγωγής: ταξινόμηση των γραμμών ενός upload,
+ουρά εργασιών, και (χωρίς βάση, SimpleTestCase) πηγές αρχείων,
+καθαρισμός και αποτυπώματα.
+
+    python manage.py test main
+    python manage.py test main.tests.SourcesTests main.tests.CleanRowsTests main.tests.FingerprintTests
+"""
+import codecs
+import functools
+import hashlib
+import io
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook
+
+from .bulk import insert_people, upsert_people
+from .counts import PersonCounts, compact
+from .fingerprints import file_fingerprint, person_fingerprint, record_fingerprint
+from . import jobs
+from .jobs import UploadInProgress, claim_job, claim_next_job, enqueue_upload, run_job
+from .management.commands import import_excel
+from .ingestion import COLUMNS, FIELDS, ID_HEADER, ID_MAX, clean_rows, map_headers
+from .models import FILL_EMPTY, OVERWRITE, REVIEW, SKIP, IngestionJob, Person, PersonCountDelta, StagedRow, UploadLog
+from .normalization import normalize_text
+from .pipeline import UploadSummary, ingest_chunks, run_upload
+from .pagination import AFTER, BEFORE, FROM, PER_PAGE, decode_cursor, encode_cursor
+from .search import FULLTEXT, SIMILAR, SUBSTRING, contains, search_people
+from .sources import CsvSource, OdsSource, XlsSource, XlsxSource, get_source
+
+PEOPLE = 5000
+INCOMPLETE_EVERY = 10  # κάθε 10η εγγραφή είναι κενή (μόνο ημερομηνία)
+
+# Το upload: διπλότυπα / κενές εγγραφές (1..CONFLICTS) και νέες γραμμές
+CONFLICTS = 400
+NEW_ROWS = 200
+UPLOAD_ROWS = CONFLICTS + NEW_ROWS
+
+# Ανώτατα όρια χρόνου (s), αρκετά χαλαρά για αργά CI μηχανήματα
+VIEW_SECONDS = 2.0
+UPLOAD_SECONDS = 20.0
+
+
+def _values(number, **overrides):
+    """The FIELDS of record number, as a dict."""
+    values = {
+        'hmeromhnia_eis': f"{number % 28 + 1:02d}/{number % 12 + 1:02d}/2020",
+        'syggrafeas': f"Παπαδόπουλος {number % 50}, Γιάννης",
+        'koha': f"Γιάννης Παπαδόπουλος {number % 50}",
+        'titlos': f"Τίτλος βιβλίου {number}",
+        'ekdoths': f"Εκδόσεις {number % 30}",
+        'ekdosh': '1η',
+        'etosEkdoshs': str(1950 + number % 70),
+        'toposEkdoshs': 'Αθήνα',
+        'sxhma': '21 εκ.',
+        'selides': str(100 + number % 400),
+        'tomos': None,
+        'troposPromPar': 'Αγορά',
+        'ISBN': str(9789600000000 + number),
+        'sthlh1': None,
+        'sthlh2': None,
+    }
+    values.update(overrides)
+    return values
+
+
+def _is_incomplete(number):
+    return number % INCOMPLETE_EVERY == 0
+
+
+def _person_row(number):
+    if _is_incomplete(number):
+        values = dict.fromkeys(FIELDS)
+        values['hmeromhnia_eis'] = '01/01/2020'
+    else:
+        values = _values(number)
+    return (number, *(values[field] for field in FIELDS))
+
+
+def _upload_workbook(name='upload.xlsx'):
+    """
+    CONFLICTS γραμμές με άλλο τίτλο για υπάρχουσες εγγραφές (διπλότυπα ή
+    κενές εγγραφές) και NEW_ROWS νέες γραμμές.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append([ID_HEADER] + [header for header, _, _ in COLUMNS])
+    numbers = list(range(1, CONFLICTS + 1)) + list(range(PEOPLE + 1, PEOPLE + NEW_ROWS + 1))
+    for number in numbers:
+        values = _values(number, titlos=f"Νέος τίτλος {number}")
+        sheet.append([number] + [values[field] for _, field, _ in COLUMNS])
+    data = io.BytesIO()
+    workbook.save(data)
+    data.seek(0)
+    data.name = name
+    return data
+
+
+# Τα όρια χρόνου ελέγχονται εδώ· το log του SlowRequest θα πρόσθετε ένα
+# query μόνο όταν το request είναι αργό
+@override_settings(SLOW_REQUEST_THRESHOLD_MS=60_000)
+class QueryBudgetTestCase(TestCase):
+    """Base class: PEOPLE records and a logged-in superuser."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('librarian', 'librarian@example.com', 'password')
+        insert_people([_person_row(number) for number in range(1, PEOPLE + 1)])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        # Τα πλήθη στο cache (main.counts) δεν περνάνε από test σε test
+        cache.clear()
+
+    @contextmanager
+    def assertBudget(self, queries, seconds=VIEW_SECONDS):
+        """Fails if the block runs more than queries SQL queries or takes seconds."""
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            yield captured
+            elapsed = time.perf_counter() - started
+
+        executed = len(captured)
+        if executed > queries:
+            sql = '\n'.join(query['sql'][:200] for query in captured.captured_queries)
+            self.fail(f"{executed} queries, budget is {queries}:\n{sql}")
+        self.assertLess(elapsed, seconds, f"took {elapsed:.2f}s, budget is {seconds}s")
+
+
+class ShowPeopleTests(QueryBudgetTestCase):
+    # session + user + PersonCountDelta + COUNT + σελίδα (η λίστα κατά αριθμό
+    # δεν μετράει τίποτα)
+    BUDGET = 5
+
+    SEARCHES = {
+        'all': 'Τίτλος βιβλίου 12',
+        'ari8mos': '1234',
+        'hmeromhnia_eis': '2020',
+        'titlos': 'βιβλίου 3',
+        'syggrafeas': 'Παπαδόπουλος 7',
+        'ekdoths': 'Εκδόσεις 1',
+        'ISBN': '978960000',
+    }
+
+    def test_first_page(self):
+        with self.assertBudget(3):
+            response = self.client.get(reverse('show_people'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['keyset'])
+        self.assertEqual(len(response.context['page_obj']), 200)
+
+    def test_search_categories(self):
+        for mode in (FULLTEXT, SUBSTRING, SIMILAR):
+            # + το κατώφλι ομοιότητας του pg_trgm, μέσα σε transaction (στο
+            # TestCase γίνεται savepoint: SAVEPOINT + RELEASE)
+            budget = self.BUDGET + 3 if mode == SIMILAR else self.BUDGET
+            for category, search in self.SEARCHES.items():
+                with self.subTest(mode=mode, category=category):
+                    with self.assertBudget(budget):
+                        response = self.client.get(reverse('show_people'), {
+                            'search': search, 'search_category': category, 'search_mode': mode,
+                        })
+                    self.assertEqual(response.status_code, 200)
+                    self.assertGreater(len(response.context['page_obj']), 0)
+
+    def test_range_and_ajax_page(self):
+        with self.assertBudget(self.BUDGET):
+            response = self.client.get(
+                reverse('show_people'),
+                {'from_num': 100, 'to_num': 3000, 'page': 3},
+                headers={'X-Requested-With': 'XMLHttpRequest'},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['current_page'], 3)
+
+
+class KeysetPaginationTests(QueryBudgetTestCase):
+    BUDGET = 3  # session + user + σελίδα, σε οποιοδήποτε βάθος
+
+    def page(self, budget=BUDGET, **params):
+        with self.assertBudget(budget):
+            response = self.client.get(
+                reverse('show_people'), params, headers={'X-Requested-With': 'XMLHttpRequest'},
+            )
+        data = response.json()
+        self.assertEqual(data['pagination'], 'keyset')
+        return data
+
+    def test_next_and_previous(self):
+        first = self.page()
+        self.assertEqual((first['first_number'], first['last_number']), (1, 200))
+        self.assertFalse(first['has_previous'])
+
+        second = self.page(cursor=first['next_cursor'])
+        self.assertEqual((second['first_number'], second['last_number']), (201, 400))
+        self.assertTrue(second['has_previous'])
+
+        back = self.page(cursor=second['previous_cursor'])
+        self.assertEqual((back['first_number'], back['last_number']), (1, 200))
+        self.assertFalse(back['has_previous'])
+        self.assertTrue(back['has_next'])
+
+    def test_last_page(self):
+        last = self.page(cursor=self.page()['last_cursor'])
+        self.assertEqual((last['first_number'], last['last_number']), (PEOPLE - 199, PEOPLE))
+        self.assertFalse(last['has_next'])
+        self.assertTrue(last['has_previous'])
+
+    def test_goto_number(self):
+        # + EXISTS για την προηγούμενη σελίδα
+        page = self.page(budget=self.BUDGET + 1, goto=PEOPLE - 50)
+        self.assertEqual((page['first_number'], page['last_number']), (PEOPLE - 50, PEOPLE))
+        self.assertTrue(page['has_previous'])
+        self.assertFalse(page['has_next'])
+
+        before = self.page(cursor=page['previous_cursor'])
+        self.assertEqual(before['last_number'], PEOPLE - 51)
+
+    def test_search_results(self):
+        # + PersonCountDelta για το πλήθος στο cache + EXPLAIN για την εκτίμηση
+        page = self.page(
+            budget=self.BUDGET + 2, search='978960000', search_category='ISBN', search_mode=SUBSTRING,
+        )
+        self.assertEqual(page['first_number'], 1)
+        page = self.page(search='978960000', search_category='ISBN', search_mode=SUBSTRING, cursor=page['next_cursor'])
+        # Οι κενές εγγραφές (κάθε INCOMPLETE_EVERY) δεν έχουν ISBN
+        self.assertEqual(page['first_number'], 223)
+
+    def test_default_search_is_substring(self):
+        # Χωρίς search_mode: κομμάτι λέξης, σε σειρά αριθμού εισαγωγής
+        page = self.page(budget=self.BUDGET + 1, search='ιβλίου 12')
+        self.assertEqual(page['first_number'], 12)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.page(cursor='not a cursor!')['first_number'], 1)
+
+    def test_cursors(self):
+        for position in ((AFTER, 200), (BEFORE, 4801), (BEFORE, None), (FROM, 7)):
+            self.assertEqual(decode_cursor(encode_cursor(*position)), position)
+        self.assertIsNone(decode_cursor(encode_cursor('x', 1)))
+        self.assertIsNone(decode_cursor(encode_cursor(AFTER, '1; DROP')))
+
+
+class CountTests(QueryBudgetTestCase):
+    SEARCH = {'search': '978960000', 'search_category': 'ISBN', 'search_mode': SUBSTRING}
+    # Οι κενές εγγραφές δεν έχουν ISBN
+    SEARCH_COUNT = PEOPLE - PEOPLE // INCOMPLETE_EVERY
+
+    def people(self, budget, **params):
+        with self.assertBudget(budget):
+            response = self.client.get(
+                reverse('show_people'), params, headers={'X-Requested-With': 'XMLHttpRequest'},
+            )
+        return response.json()
+
+    def test_total_follows_changes(self):
+        self.assertEqual(PersonCounts().total, PEOPLE)
+        Person.objects.create(ari8mosEisagoghs=PEOPLE + 1, titlos='Νέο βιβλίο')
+        insert_people([_person_row(number) for number in range(PEOPLE + 2, PEOPLE + 12)])
+        self.assertEqual(PersonCounts().total, PEOPLE + 11)
+        Person.objects.filter(ari8mosEisagoghs__gt=PEOPLE).delete()
+        self.assertEqual(PersonCounts().total, PEOPLE)
+        # Μια αλλαγή χωρίς νέες γραμμές αλλάζει μόνο την έκδοση
+        version = PersonCounts().stats[1]
+        Person.objects.filter(ari8mosEisagoghs=1).update(titlos='Άλλος τίτλος')
+        self.assertEqual(PersonCounts().stats, (PEOPLE, version + 1))
+
+    def test_writers_do_not_share_a_row(self):
+        # Κάθε statement γράφει τη δική του γραμμή, χωρίς να ενημερώνει
+        # καμία κοινή· ένα rollback παίρνει και τη γραμμή του μαζί
+        deltas = PersonCountDelta.objects.count()
+        Person.objects.create(ari8mosEisagoghs=PEOPLE + 1, titlos='Νέο βιβλίο')
+        self.assertEqual(PersonCountDelta.objects.count(), deltas + 1)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Person.objects.filter(ari8mosEisagoghs=PEOPLE + 1).delete()
+            raise RuntimeError
+        self.assertEqual(PersonCountDelta.objects.count(), deltas + 1)
+        self.assertEqual(PersonCounts().total, PEOPLE + 1)
+
+    def test_compaction_keeps_the_totals(self):
+        for number in range(PEOPLE + 1, PEOPLE + 11):
+            Person.objects.create(ari8mosEisagoghs=number)
+        stats = PersonCounts().stats
+        self.assertEqual(stats[0], PEOPLE + 10)
+        # Η ανάγνωση δεν γράφει τίποτα· η σύμπτυξη γίνεται από τα uploads
+        # ή το compact_person_counts
+        self.assertGreater(PersonCountDelta.objects.count(), 10)
+        call_command('compact_person_counts', stdout=io.StringIO())
+        self.assertEqual(PersonCountDelta.objects.count(), 1)
+        self.assertEqual(PersonCounts().stats, stats)
+        compact()
+        self.assertEqual(PersonCountDelta.objects.count(), 1)
+
+    def test_truncate(self):
+        with connection.cursor() as cursor:
+            cursor.execute('TRUNCATE main_person CASCADE')
+        self.assertEqual(PersonCounts().total, 0)
+
+    def test_cached_count(self):
+        qs = Person.objects.filter(contains('titlos', 'βιβλίου 1'))
+        expected = qs.count()
+        with self.assertNumQueries(2):  # PersonCountDelta + COUNT
+            self.assertEqual(PersonCounts().count(qs), expected)
+        with self.assertNumQueries(1):  # PersonCountDelta
+            self.assertEqual(PersonCounts().count(qs), expected)
+
+        # Κάθε αλλαγή αλλάζει την έκδοση, και το πλήθος ξαναμετριέται
+        Person.objects.filter(ari8mosEisagoghs=1).update(titlos='Άλλος τίτλος')
+        with self.assertNumQueries(2):
+            self.assertEqual(PersonCounts().count(qs), expected - 1)
+
+    def test_large_search_counts_lazily(self):
+        # Πολλά αποτελέσματα: εκτίμηση (EXPLAIN) και το ακριβές πλήθος αργότερα
+        page = self.people(5, **self.SEARCH)
+        self.assertIsNone(page['result_count'])
+        self.assertTrue(page['count_url'])
+        self.assertGreater(page['count_estimate'], PER_PAGE)
+
+        with self.assertBudget(4):  # session + user + PersonCountDelta + COUNT
+            response = self.client.get(page['count_url'])
+        self.assertEqual(response.json()['count'], self.SEARCH_COUNT)
+
+        page = self.people(4, **self.SEARCH)
+        self.assertEqual(page['result_count'], self.SEARCH_COUNT)
+        self.assertIsNone(page['count_url'])
+
+    def test_small_search_counts_its_page(self):
+        page = self.people(4, search='Τίτλος βιβλίου 123', search_category='titlos', search_mode=SUBSTRING)
+        self.assertEqual(page['result_count'], 10)  # 123, 1231..1239
+        self.assertIsNone(page['count_url'])
+
+    def test_ranked_results_count_once(self):
+        params = {'search': 'βιβλίου', 'search_category': 'titlos', 'search_mode': FULLTEXT}
+        self.assertEqual(self.people(5, **params)['result_count'], self.SEARCH_COUNT)
+        # Η δεύτερη σελίδα χωρίς COUNT
+        self.assertEqual(self.people(4, page=2, **params)['result_count'], self.SEARCH_COUNT)
+
+
+class FullTextSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        insert_people([
+            (1, *(_values(1, titlos='Ιστορία της Ελλάδος', syggrafeas='Σωκράτης, Νίκος')[f] for f in FIELDS)),
+            (2, *(_values(2, titlos='Ελληνική ιστορία', ekdoths='Ιστορικές Εκδόσεις')[f] for f in FIELDS)),
+            (3, *(_values(3, titlos='Μαθηματικά', syggrafeas='Ιστοριάδης, Γιώργος')[f] for f in FIELDS)),
+        ])
+
+    def search(self, text, category='all'):
+        return list(search_people(Person.objects.all(), text, category, FULLTEXT).values_list('pk', flat=True))
+
+    def test_accents_case_and_prefixes(self):
+        self.assertEqual(self.search('ΙΣΤΟΡΙΑ ελλαδος'), [1])
+        self.assertEqual(self.search('σωκρατη'), [1])
+
+    def test_ranked_by_weight(self):
+        # Τίτλος (A) και εκδότης (C) > τίτλος > συγγραφέας (B)
+        self.assertEqual(self.search('ιστορ'), [2, 1, 3])
+
+    def test_category_weights(self):
+        self.assertEqual(sorted(self.search('ιστορ', 'titlos')), [1, 2])
+        self.assertEqual(self.search('ιστορ', 'syggrafeas'), [3])
+        self.assertEqual(self.search('ιστορ', 'ekdoths'), [2])
+
+    def test_vector_follows_updates(self):
+        person = Person.objects.get(pk=3)
+        person.titlos = 'Φυσική'
+        person.save()
+        self.assertEqual(self.search('φυσικ'), [3])
+
+    def test_punctuation_only(self):
+        self.assertEqual(self.search('&:*!'), [])
+
+
+class TrigramSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        insert_people([
+            (1, *(_values(1, syggrafeas='Καζαντζάκης, Νίκος', koha='Νίκος Καζαντζάκης', titlos='Ο Καπετάν Μιχάλης')[f] for f in FIELDS)),
+            (2, *(_values(2, syggrafeas='Παπαδόπουλος, Γιάννης', koha='Γιάννης Παπαδόπουλος', ekdoths='Εκδόσεις Πατάκη')[f] for f in FIELDS)),
+            (3, *(_values(3, syggrafeas='Παπαδάκης, Γιώργος', koha='Γιώργος Παπαδάκης')[f] for f in FIELDS)),
+        ])
+
+    def search(self, text, category='all', mode=SIMILAR):
+        return list(search_people(Person.objects.all(), text, category, mode).values_list('pk', flat=True))
+
+    def test_typos(self):
+        self.assertEqual(self.search('Καζαντζακις', 'syggrafeas'), [1])
+        self.assertEqual(self.search('καπετάν μιχάλις', 'titlos'), [1])
+        self.assertEqual(self.search('Καζαντζακις', 'ekdoths'), [])
+
+    def test_ranked_by_similarity(self):
+        self.assertEqual(self.search('Παπαδόπουλος'), [2, 3])
+        self.assertEqual(self.search('Παπαδάκη'), [3, 2])
+
+    def test_index_scans(self):
+        # Με λίγες γραμμές ο planner προτιμά το seq scan· εδώ ελέγχεται ότι
+        # τα queries ταιριάζουν με τα indexes
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        for mode, category, index in (
+            (SUBSTRING, 'titlos', 'person_titlos_norm_trgm'),
+            (SUBSTRING, 'ISBN', 'person_isbn_trgm'),
+            (SIMILAR, 'syggrafeas', 'person_koha_norm_trgm'),
+            (SIMILAR, 'ekdoths', 'person_ekdoths_norm_trgm'),
+        ):
+            with self.subTest(mode=mode, category=category):
+                qs = search_people(Person.objects.all(), 'ΠΑΠΑΔ', category, mode)
+                self.assertIn(index, qs.explain())
+        autocomplete = Person.objects.filter(contains('ekdoths', 'Πατάκ')).values_list('ekdoths', flat=True).distinct()
+        self.assertIn('person_ekdoths_norm_trgm', autocomplete.explain())
+
+
+class SimilarityThresholdTests(TransactionTestCase):
+    """Χωρίς το transaction του TestCase, για να φανεί τι μένει στη σύνδεση."""
+
+    def threshold(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT current_setting('pg_trgm.word_similarity_threshold')")
+            return float(cursor.fetchone()[0])
+
+    @override_settings(SEARCH_SIMILARITY_THRESHOLD=0.3)
+    def test_threshold_does_not_leak(self):
+        with transaction.atomic():
+            list(search_people(Person.objects.all(), 'Καζαντζακις', 'all', SIMILAR))
+            self.assertEqual(self.threshold(), 0.3)
+        # Το default του pg_trgm για τα επόμενα queries της σύνδεσης
+        self.assertEqual(self.threshold(), 0.6)
+
+
+class NormalizedSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        insert_people([
+            (1, *(_values(1, titlos='Ιστορία της Ελλάδος', syggrafeas='ΣΕΦΕΡΗΣ, ΓΙΩΡΓΟΣ')[f] for f in FIELDS)),
+            (2, *(_values(2, titlos='Ϊλιάδα', ekdoths='Εκδόσεις Café')[f] for f in FIELDS)),
+        ])
+
+    def search(self, text, category):
+        return list(search_people(Person.objects.all(), text, category, SUBSTRING).values_list('pk', flat=True))
+
+    def test_accents_case_and_final_sigma(self):
+        self.assertEqual(self.search('ΙΣΤΟΡΙΑ', 'titlos'), [1])
+        self.assertEqual(self.search('ελλαδος', 'titlos'), [1])
+        self.assertEqual(self.search('σεφέρης', 'syggrafeas'), [1])
+        self.assertEqual(self.search('ιλιαδα', 'all'), [2])
+        self.assertEqual(self.search('CAFÉ', 'ekdoths'), [2])
+
+    def test_columns_match_normalize_text(self):
+        # Η ίδια κανονικοποίηση στη βάση (TRANSLATE) και στην Python
+        for person in Person.objects.all():
+            self.assertEqual(person.titlos_norm, normalize_text(person.titlos))
+            self.assertEqual(person.ekdoths_norm, normalize_text(person.ekdoths))
+
+    def test_columns_follow_writes(self):
+        person = Person.objects.get(pk=2)
+        person.titlos = 'ΟΔΥΣΣΕΙΑ'
+        person.save()
+        self.assertEqual(self.search('οδύσσεια', 'titlos'), [2])
+
+        Person.objects.bulk_update([Person(pk=1, titlos='Ποίηση')], ['titlos'])
+        self.assertEqual(self.search('ΠΟΙΗΣΗ', 'titlos'), [1])
+        self.assertEqual(self.search('ιστορια', 'titlos'), [])
+
+
+class AutocompleteTests(QueryBudgetTestCase):
+    BUDGET = 3  # session + user + αναζήτηση
+
+    def test_autocomplete_title(self):
+        with self.assertBudget(self.BUDGET):
+            response = self.client.get(reverse('autocomplete_title'), {'q': 'βιβλίου'})
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_autocomplete_ekdoths(self):
+        with self.assertBudget(self.BUDGET):
+            response = self.client.get(reverse('autocomplete_ekdoths'), {'q': 'Εκδόσεις'})
+        self.assertEqual(len(response.json()['results']), 10)
+
+
+class PerformanceViewTests(QueryBudgetTestCase):
+    def test_days(self):
+        url = reverse('admin:main_uploadlog_performance')
+        for days, expected in (('7', 7), ('0', 1), (str(10**10), 3650), ('x', 30)):
+            with self.subTest(days=days):
+                response = self.client.get(url, {'days': days})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['days'], expected)
+
+
+class IncompleteRecordsTests(QueryBudgetTestCase):
+    def test_incomplete_records(self):
+        with self.assertBudget(6):
+            response = self.client.get(reverse('incomplete_records'))
+        self.assertEqual(response.context['count'], PEOPLE // INCOMPLETE_EVERY)
+
+
+class AddPersonTests(QueryBudgetTestCase):
+    def test_get(self):
+        with self.assertBudget(3):
+            response = self.client.get(reverse('add_person'))
+        self.assertEqual(response.context['next_number'], PEOPLE + 1)
+
+    def test_prefill_incomplete_record(self):
+        with self.assertBudget(4):
+            response = self.client.get(reverse('add_person'), {'ari8mos': INCOMPLETE_EVERY})
+        self.assertTrue(response.context['is_editing'])
+
+    def test_fill_incomplete_record_redirects_to_next(self):
+        data = {field: value or '' for field, value in _values(INCOMPLETE_EVERY).items()}
+        with self.assertBudget(5):
+            response = self.client.post(
+                f"{reverse('add_person')}?ari8mos={INCOMPLETE_EVERY}", data,
+            )
+        self.assertRedirects(
+            response, f"{reverse('add_person')}?ari8mos={2 * INCOMPLETE_EVERY}&submitted=1",
+            fetch_redirect_response=False,
+        )
+
+
+class PrintRangeDataTests(QueryBudgetTestCase):
+    def test_batch(self):
+        with self.assertBudget(3):
+            response = self.client.get(
+                reverse('print_range_data'), {'from_num': 1, 'to_num': PEOPLE, 'offset': 200, 'limit': 100},
+            )
+        data = response.json()
+        self.assertEqual(len(data['records']), 100)
+        self.assertTrue(data['has_more'])
+
+
+class UploadTests(QueryBudgetTestCase):
+    """
+    upload_excel (inline, χωρίς worker) και η επίλυση των διπλότυπων. Τα
+    όρια ισχύουν και για τις δύο ταξινομήσεις (στη βάση και σε Python).
+    """
+
+    # Το upload κάνει λίγα queries ανά κομμάτι των CHUNK_SIZE γραμμών
+    # (μαζί με την πρόχειρη ταξινόμηση για την πρόοδο και τη σύμπτυξη των
+    # PersonCountDelta στο τέλος) και κανένα ανά γραμμή
+    UPLOAD_BUDGET = 31
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        upload_dir = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, upload_dir, ignore_errors=True)
+        settings = override_settings(INGESTION_INLINE=True, INGESTION_UPLOAD_DIR=upload_dir)
+        settings.enable()
+        cls.addClassCleanup(settings.disable)
+
+    def upload(self, policy=REVIEW, name='upload.xlsx'):
+        with self.assertBudget(self.UPLOAD_BUDGET, UPLOAD_SECONDS):
+            response = self.client.post(
+                reverse('upload_excel'), {'excel_file': _upload_workbook(name), 'conflict_policy': policy},
+            )
+        self.assertEqual(response.status_code, 302)
+        job = IngestionJob.objects.get()
+        self.assertEqual(job.status, IngestionJob.DONE, job.error)
+        self.assertEqual(job.rows_processed, UPLOAD_ROWS)
+        return job
+
+    def staged_upload(self):
+        job = self.upload()
+        # Το polling της σελίδας βάζει το staged upload στο session
+        with self.assertBudget(6):
+            redirect_url = self.client.get(reverse('upload_progress', args=[job.pk])).json()['redirect_url']
+        self.assertEqual(redirect_url, reverse('resolve_duplicates'))
+        return job
+
+    def test_upload_page(self):
+        job = self.upload(SKIP)
+        with self.assertBudget(3):
+            response = self.client.get(reverse('upload_excel'), {'job': job.pk})
+        self.assertEqual(response.context['job'], job)
+
+    def test_upload_policies(self):
+        for policy in (OVERWRITE, FILL_EMPTY, SKIP):
+            for in_database in (True, False):
+                with self.subTest(policy=policy, in_database=in_database):
+                    with override_settings(INGESTION_CLASSIFY_IN_DB=in_database):
+                        job = self.upload(policy, name=f'{policy}-{in_database}.xlsx')
+                    self.assertEqual(job.rows_added, NEW_ROWS)
+                    IngestionJob.objects.all().delete()
+                    UploadLog.objects.all().delete()
+                    Person.objects.filter(pk__gt=PEOPLE).delete()
+
+    def test_upload_review_in_python(self):
+        with override_settings(INGESTION_CLASSIFY_IN_DB=False):
+            job = self.upload()
+        self.assertEqual(job.rows_staged, CONFLICTS)
+
+    def test_resolve_page(self):
+        job = self.staged_upload()
+        self.assertEqual(job.rows_staged, CONFLICTS)
+        with self.assertBudget(6):
+            response = self.client.get(reverse('resolve_duplicates'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['duplicates']) + len(response.context['potential_insertions']), 100)
+
+    def test_replace_all(self):
+        self.staged_upload()
+        with self.assertBudget(22, UPLOAD_SECONDS):
+            response = self.client.post(
+                reverse('replace_all_duplicates'), {'all_duplicates': '1', 'all_insertions': '1'},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['updated_count'], CONFLICTS)
+        self.assertEqual(Person.objects.get(pk=1).titlos, 'Νέος τίτλος 1')
+        self.assertFalse(StagedRow.objects.exists())
+        self.assertEqual(UploadLog.objects.get().data_version, PersonCounts().version)
+
+    def test_replace_selected(self):
+        self.staged_upload()
+        duplicate_ids = [str(n) for n in range(1, CONFLICTS + 1) if not _is_incomplete(n)]
+        insertion_ids = [str(n) for n in range(1, CONFLICTS + 1) if _is_incomplete(n)]
+        with self.assertBudget(22, UPLOAD_SECONDS):
+            response = self.client.post(
+                reverse('replace_all_duplicates'),
+                {'duplicate_ids[]': duplicate_ids, 'insertion_ids[]': insertion_ids},
+            )
+        self.assertEqual(response.context['updated_count'], CONFLICTS)
+
+    def test_skip_all(self):
+        self.staged_upload()
+        with self.assertBudget(12, UPLOAD_SECONDS):
+            response = self.client.post(reverse('skip_all_duplicates'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Person.objects.get(pk=1).titlos, 'Τίτλος βιβλίου 1')
+        self.assertEqual(UploadLog.objects.get().rows_added, NEW_ROWS)
+        # Οι γραμμές που παραλείφθηκαν ξαναπερνούν από επίλυση
+        self.assertIsNone(UploadLog.objects.get().data_version)
+        IngestionJob.objects.all().delete()
+        job = self.upload(name='again.xlsx')
+        self.assertIsNone(job.identical_upload)
+        self.assertEqual(job.rows_staged, CONFLICTS)
+
+
+class IngestChunksTests(TestCase):
+    """Οι μετρήσεις του ingest_chunks, με ταξινόμηση στη βάση και σε Python."""
+
+    RECORDS = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('librarian', 'librarian@example.com', 'password')
+        insert_people([_person_row(number) for number in range(1, cls.RECORDS + 1)])
+
+    def ingest(self, rows, policy, in_database):
+        chunk = [(row_number, *row) for row_number, row in enumerate(rows, start=2)]
+        with override_settings(INGESTION_CLASSIFY_IN_DB=in_database):
+            return ingest_chunks([chunk], 'upload.xlsx', self.user, policy)
+
+    def test_classification_counts(self):
+        rows = [
+            (None, *_values(30).values()),  # άκυρος αριθμός
+            (0, *_values(31).values()),  # χωρίς αριθμό
+            _person_row(1),  # ίδια με τη βάση
+            (2, *_values(2, titlos='Άλλος').values()),  # διπλότυπο
+            (10, *_values(10).values()),  # κενή εγγραφή της βάσης
+            _person_row(21),  # νέα
+            _person_row(21),  # ξανά μέσα στο αρχείο
+        ]
+        reasons = [
+            'Invalid ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ', 'Missing ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ', 'Duplicate ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ inside Excel',
+        ]
+        for policy, staged, updated in ((REVIEW, 2, 0), (OVERWRITE, 0, 2)):
+            for in_database in (True, False):
+                with self.subTest(policy=policy, in_database=in_database), transaction.atomic():
+                    summary = self.ingest(rows, policy, in_database)
+                    self.assertEqual(
+                        (summary.rows_added, summary.rows_unchanged, summary.rows_duplicates,
+                         summary.rows_empty_records, summary.rows_staged, summary.rows_updated),
+                        (1, 1, 1, 1, staged, updated),
+                    )
+                    self.assertEqual([row['reason'] for row in summary.skipped], reasons)
+                    self.assertEqual([row['row'] for row in summary.skipped], [2, 3, 8])
+                    self.assertEqual(StagedRow.objects.count(), staged)
+                    transaction.set_rollback(True)
+
+    def test_upsert_splits_added_and_updated(self):
+        rows = [(1, *_values(1, titlos='Άλλος').values()), _person_row(self.RECORDS + 1)]
+        # Τα υπάρχοντα από την ταξινόμηση: ένα INSERT ... ON CONFLICT, χωρίς
+        # SELECT (+ SAVEPOINT/RELEASE του atomic μέσα στο TestCase)
+        with self.assertNumQueries(3):
+            self.assertEqual(upsert_people(rows, OVERWRITE, {1}), (1, 1))
+        with self.assertNumQueries(3):
+            self.assertEqual(upsert_people(rows, SKIP, {1, self.RECORDS + 1}), (0, 0))
+
+    def test_stale_fingerprint_is_not_an_update(self):
+        # Εγγραφές ίδιες με το αρχείο αλλά χωρίς (σωστό) αποτύπωμα: κάθε
+        # ταξινόμηση τους δίνει το σωστό, ώστε το επόμενο upload να τις
+        # βρει από το αποτύπωμα
+        rows = [_person_row(number) for number in range(1, self.RECORDS + 1)]
+        expected = {person.pk: person.compute_content_hash() for person in Person.objects.all()}
+        for policy in (OVERWRITE, REVIEW):
+            for in_database in (True, False):
+                with self.subTest(policy=policy, in_database=in_database):
+                    Person.objects.update(content_hash='')
+                    summary = self.ingest(rows, policy, in_database)
+                    self.assertEqual(summary.rows_updated, 0)
+                    self.assertEqual(summary.rows_unchanged, self.RECORDS)
+                    self.assertEqual(summary.rows_duplicates + summary.rows_empty_records, 0)
+                    self.assertEqual(dict(Person.objects.values_list('pk', 'content_hash')), expected)
+
+    def test_progress_shows_categories_while_loading(self):
+        first = (
+            [_person_row(number) for number in range(1, 6)]  # ίδιες με τη βάση
+            + [(number, *_values(number, titlos='Άλλος').values()) for number in range(6, 11)]
+            + [_person_row(number) for number in range(21, 26)]  # νέες
+        )
+        second = [(None, *_values(30).values()), _person_row(1)]  # άκυρη, ξανά η 1
+        chunks = [
+            [(row_number, *row) for row_number, row in enumerate(rows, start=start)]
+            for rows, start in ((first, 2), (second, 17))
+        ]
+        snapshots = []
+
+        def progress(summary):
+            snapshots.append((
+                summary.rows_processed, summary.rows_added, summary.rows_unchanged,
+                summary.rows_duplicates, summary.rows_empty_records, summary.rows_skipped,
+            ))
+
+        with override_settings(INGESTION_CLASSIFY_IN_DB=True):
+            summary = ingest_chunks(chunks, 'upload.xlsx', self.user, REVIEW, progress=progress)
+
+        # Η 10 είναι κενή εγγραφή (INCOMPLETE_EVERY)· τα δύο τελευταία είναι
+        # τα heartbeats πριν και μετά το transaction της ταξινόμησης
+        self.assertEqual(snapshots, [(15, 5, 5, 4, 1, 0)] + [(17, 5, 5, 4, 1, 2)] * 3)
+        self.assertEqual(
+            (summary.rows_added, summary.rows_unchanged, summary.rows_staged, summary.rows_skipped),
+            (5, 5, 5, 2),
+        )
+        self.assertEqual([row['row'] for row in summary.skipped], [17, 18])
+
+    def test_identical_file_until_data_changes(self):
+        workbook = _upload_workbook().getvalue()
+
+        def upload():
+            return run_upload(io.BytesIO(workbook), 'upload.xlsx', self.user, OVERWRITE)
+
+        first = upload()
+        self.assertEqual(upload().identical_upload, UploadLog.objects.get())
+
+        # Μια αλλαγή μετά το upload: οι γραμμές ξαναελέγχονται μία-μία
+        Person.objects.filter(pk=1).update(titlos='Αλλαγμένος')
+        again = upload()
+        self.assertIsNone(again.identical_upload)
+        self.assertEqual(again.rows_updated, 1)
+        self.assertEqual(again.rows_unchanged, first.rows_processed - 1)
+        self.assertEqual(upload().identical_upload, UploadLog.objects.latest('pk'))
+
+
+class JobQueueTests(TestCase):
+    """Η ουρά IngestionJob (main.jobs), χωρίς να τρέξει το upload."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        upload_dir = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, upload_dir, ignore_errors=True)
+        settings = override_settings(INGESTION_UPLOAD_DIR=upload_dir, INGESTION_JOB_TIMEOUT=60)
+        settings.enable()
+        cls.addClassCleanup(settings.disable)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('librarian', 'librarian@example.com', 'password')
+        # Τα ίδια bytes κάθε φορά (το xlsx έχει μέσα την ώρα δημιουργίας)
+        cls.workbook = _upload_workbook().getvalue()
+
+    def enqueue(self):
+        return enqueue_upload(self.user, SimpleUploadedFile('upload.xlsx', self.workbook))
+
+    def test_same_file_twice(self):
+        job = self.enqueue()
+        with self.assertRaises(UploadInProgress) as raised:
+            self.enqueue()
+        self.assertEqual(raised.exception.job, job)
+
+    def test_oldest_job_first(self):
+        first = self.enqueue()
+        second = enqueue_upload(self.user, SimpleUploadedFile('other.xlsx', b'other file'))
+        self.assertEqual(claim_next_job('worker-1'), first)
+        self.assertEqual(claim_next_job('worker-2'), second)
+        self.assertIsNone(claim_next_job('worker-3'))
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.worker), (IngestionJob.RUNNING, 'worker-2'))
+
+    def test_claim_job_once(self):
+        job = self.enqueue()
+        self.assertEqual(claim_job(job).status, IngestionJob.RUNNING)
+        self.assertIsNone(claim_job(job, 'worker-1'))
+        self.assertIsNone(claim_next_job('worker-1'))
+
+    def test_stale_running_job_is_failed(self):
+        job = self.enqueue()
+        self.assertEqual(claim_next_job('worker-1'), job)
+        # Ο worker σκοτώθηκε: κανένα heartbeat για περισσότερο από το timeout
+        IngestionJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=61))
+
+        self.assertIsNone(claim_next_job('worker-2'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestionJob.FAILED)
+        self.assertIn('worker-1', job.error)
+        # Το ίδιο αρχείο μπορεί να ανέβει ξανά
+        self.assertEqual(self.enqueue().status, IngestionJob.QUEUED)
+
+    def test_job_failed_while_running_stays_failed(self):
+        job = self.enqueue()
+        claim_next_job('worker-1')
+
+        def upload(*args, **kwargs):
+            # Το fail_stale_jobs το έκανε FAILED μετά το τελευταίο heartbeat
+            IngestionJob.objects.filter(pk=job.pk).update(status=IngestionJob.FAILED, error='stopped responding')
+            summary = UploadSummary()
+            summary.rows_processed = UPLOAD_ROWS
+            return summary
+
+        with mock.patch.object(jobs, 'run_upload', upload):
+            job = run_job(job)
+        self.assertEqual((job.status, job.error), (IngestionJob.FAILED, 'stopped responding'))
+        self.assertEqual(job.rows_processed, 0)
+
+    def test_running_job_with_heartbeat_is_kept(self):
+        job = self.enqueue()
+        claim_next_job('worker-1')
+        self.assertIsNone(claim_next_job('worker-2'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestionJob.RUNNING)
+        with self.assertRaises(UploadInProgress):
+            self.enqueue()
+
+
+class ImportExcelTests(TestCase):
+    """Το import_excel, με τους parsers σε διεργασίες που ξεκινούν από την αρχή."""
+
+    def test_spawned_parsers(self):
+        # Με spawn (Windows, macOS) ή forkserver το παιδί κάνει import τον
+        # parser χωρίς django.setup()
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        (directory / 'upload.xlsx').write_bytes(_upload_workbook().getvalue())
+
+        spawn_pool = functools.partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context('spawn'))
+        output = io.StringIO()
+        with mock.patch.object(import_excel, 'ProcessPoolExecutor', spawn_pool):
+            call_command('import_excel', str(directory), workers=2, stdout=output)
+        self.assertIn(f'upload.xlsx: {UPLOAD_ROWS} rows', output.getvalue())
+        self.assertEqual(Person.objects.count(), UPLOAD_ROWS)
+
+
+class JobClaimTests(TransactionTestCase):
+    """claim_next_job από δύο συνδέσεις, με commits (skip_locked)."""
+
+    def test_locked_job_is_skipped(self):
+        user = User.objects.create_user('librarian', 'librarian@example.com', 'password')
+        first, second = [
+            IngestionJob.objects.create(user=user, filename=name, file_path=name, file_hash=name)
+            for name in ('first.xlsx', 'second.xlsx')
+        ]
+        claimed = []
+
+        def other_worker():
+            try:
+                claimed.append(claim_next_job('worker-2'))
+            finally:
+                connection.close()
+
+        # Ένας worker έχει κλειδώσει το πρώτο job και δεν έχει κάνει commit
+        with transaction.atomic():
+            IngestionJob.objects.select_for_update().get(pk=first.pk)
+            thread = threading.Thread(target=other_worker)
+            thread.start()
+            thread.join(timeout=10)
+        self.assertEqual(claimed, [second])
+        self.assertEqual(claim_next_job('worker-1'), first)
+
+
+class CleanRowsTests(SimpleTestCase):
+    """clean_rows, χωρίς βάση."""
+
+    HEADER = [ID_HEADER, 'ΤΙΤΛΟΣ', 'ΕΤΟΣ ΕΚΔΟΣΗΣ', 'ΣΥΓΓΡΑΦΕΑΣ', 'ISBN']
+
+    def clean(self, *rows):
+        rows = [tuple(row) + (None,) * (len(self.HEADER) - len(row)) for row in rows]
+        cleaned = clean_rows(range(2, len(rows) + 2), rows, map_headers(self.HEADER))
+        return [dict(zip(('row', 'ari8mos', *FIELDS), row)) for row in cleaned]
+
+    def test_ari8mos(self):
+        values = [
+            (115011, 115011), (115011.0, 115011), ('115011', 115011), (' 42 ', 42), ('7.0', 7),
+            (ID_MAX, ID_MAX), (-3, -3),
+            # Ό,τι δεν είναι ακέραιος στο εύρος του IntegerField
+            (12.5, None), ('12.5', None), ('1e5', None), (1e20, None), (ID_MAX + 1, None),
+            (float('inf'), None), (float('nan'), None), ('abc', None), (True, None), (None, None),
+        ]
+        rows = self.clean(*[(value,) for value, _ in values])
+        self.assertEqual([row['ari8mos'] for row in rows], [expected for _, expected in values])
+
+    def test_text_and_numbers(self):
+        row, = self.clean((1, '  Τίτλος ', 2012.0, 'Παπαδόπουλος, Γιάννης', 9789600000001))
+        self.assertEqual(row['titlos'], 'Τίτλος')
+        self.assertEqual(row['etosEkdoshs'], '2012')
+        self.assertEqual(row['ISBN'], '9789600000001')
+        # Το ΣΥΓΓΡΑΦΕΑΣ KOHA λείπει από το αρχείο και παράγεται από τον συγγραφέα
+        self.assertEqual(row['koha'], 'Γιάννης Παπαδόπουλος')
+        self.assertIsNone(row['ekdoths'])
+
+    def test_numeric_or_text_keeps_text(self):
+        row, = self.clean((1, None, '[2012]'))
+        self.assertEqual(row['etosEkdoshs'], '[2012]')
+
+
+def _ods(*tables):
+    """An .ods file with the content.xml tables given as XML strings."""
+    content = (
+        '<office:document-content'
+        ' xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"'
+        ' xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"'
+        ' xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+        f'<office:body><office:spreadsheet>{"".join(tables)}</office:spreadsheet></office:body>'
+        '</office:document-content>'
+    )
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w') as archive:
+        archive.writestr('mimetype', 'application/vnd.oasis.opendocument.spreadsheet')
+        archive.writestr('content.xml', content)
+    data.seek(0)
+    data.name = 'upload.ods'
+    return data
+
+
+class SourcesTests(SimpleTestCase):
+    """Οι readers του main.sources, χωρίς βάση."""
+
+    def csv_rows(self, data, name='upload.csv'):
+        file = io.BytesIO(data)
+        file.name = name
+        rows = list(get_source(file).iter_rows())
+        # Το αρχείο ανήκει στον caller και μένει ανοιχτό
+        self.assertFalse(file.closed)
+        return rows
+
+    def test_get_source(self):
+        for name, source in (
+            ('a.XLSX', XlsxSource), ('b.xlsm', XlsxSource), ('c.xls', XlsSource), ('d.csv', CsvSource),
+            ('e.tsv', CsvSource), ('f.ods', OdsSource), ('g.txt', XlsxSource), ('', XlsxSource),
+        ):
+            with self.subTest(name=name):
+                self.assertIsInstance(get_source(io.BytesIO(), name), source)
+        file = io.BytesIO()
+        file.name = 'upload.ods'
+        self.assertIsInstance(get_source(file), OdsSource)
+
+    def test_csv_encodings(self):
+        text = 'ΤΙΤΛΟΣ,ΤΟΠΟΣ ΕΚΔΟΣΗΣ\r\nΙστορία,Αθήνα\r\n'
+        for encoded in (text.encode('utf-8'), codecs.BOM_UTF8 + text.encode('utf-8'), text.encode('cp1253')):
+            with self.subTest(start=encoded[:3]):
+                self.assertEqual(
+                    self.csv_rows(encoded), [('ΤΙΤΛΟΣ', 'ΤΟΠΟΣ ΕΚΔΟΣΗΣ'), ('Ιστορία', 'Αθήνα')],
+                )
+
+    def test_csv_delimiters(self):
+        # Το διαχωριστικό βγαίνει από την επικεφαλίδα, όχι από τα δεδομένα
+        self.assertEqual(self.csv_rows(b'a;b;c\n1,5;;"x;y"\n'), [('a', 'b', 'c'), ('1,5', None, 'x;y')])
+        self.assertEqual(self.csv_rows(b'a\tb\n1,2\t3\n'), [('a', 'b'), ('1,2', '3')])
+        self.assertEqual(self.csv_rows(b'a,b\n"1,2",\n'), [('a', 'b'), ('1,2', None)])
+        # .tsv: πάντα tab
+        self.assertEqual(self.csv_rows(b'a,b\tc\n', name='upload.tsv'), [('a,b', 'c')])
+        file = io.BytesIO(b'a,b|c\n')
+        self.assertEqual(list(CsvSource(file, delimiter='|').iter_rows()), [('a,b', 'c')])
+
+    def test_ods(self):
+        first = (
+            '<table:table table:name="Φύλλο1">'
+            '<table:table-row>'
+            '<table:table-cell office:value-type="string"><text:p>ΑΡΙΘΜΟΣ</text:p></table:table-cell>'
+            '<table:table-cell table:number-columns-repeated="2"/>'
+            '<table:table-cell office:value-type="string"><text:p>ΤΙΤΛΟΣ</text:p></table:table-cell>'
+            '</table:table-row>'
+            '<table:table-row table:number-rows-repeated="2"><table:table-cell/></table:table-row>'
+            '<table:table-row>'
+            '<table:table-cell office:value-type="float" office:value="115011"/>'
+            '<table:table-cell office:value-type="float" office:value="2.5"/>'
+            '<table:table-cell office:value-type="date" office:date-value="2020-01-31"/>'
+            '<table:table-cell office:value-type="string" table:number-columns-repeated="2">'
+            '<text:p>Α</text:p><text:p>Β</text:p></table:table-cell>'
+            '<table:table-cell table:number-columns-repeated="16000"/>'
+            '</table:table-row>'
+            # Οι κενές γραμμές ως το τέλος του φύλλου δεν αναπτύσσονται
+            '<table:table-row table:number-rows-repeated="1048570">'
+            '<table:table-cell table:number-columns-repeated="16384"/></table:table-row>'
+            '</table:table>'
+        )
+        second = (
+            '<table:table table:name="Φύλλο2"><table:table-row>'
+            '<table:table-cell office:value-type="string"><text:p>άλλο φύλλο</text:p></table:table-cell>'
+            '</table:table-row></table:table>'
+        )
+        self.assertEqual(list(get_source(_ods(first, second)).iter_rows()), [
+            ('ΑΡΙΘΜΟΣ', None, None, 'ΤΙΤΛΟΣ'),
+            (),
+            (),
+            (115011, 2.5, '2020-01-31', 'Α\nΒ', 'Α\nΒ'),
+        ])
+
+    def test_xlsx(self):
+        rows = list(get_source(_upload_workbook()).iter_rows())
+        self.assertEqual(rows[0], (ID_HEADER, *(header for header, _, _ in COLUMNS)))
+        self.assertEqual(len(rows), UPLOAD_ROWS + 1)
+        self.assertEqual(rows[1][0], 1)
+
+
+class FingerprintTests(SimpleTestCase):
+    """Τα αποτυπώματα του main.fingerprints, χωρίς βάση."""
+
+    def test_record_fingerprint(self):
+        self.assertEqual(record_fingerprint(['α', None, 'β']), record_fingerprint(['α', '', 'β']))
+        self.assertEqual(record_fingerprint([2012]), record_fingerprint(['2012']))
+        # Η σειρά και τα όρια των πεδίων μετράνε
+        self.assertNotEqual(record_fingerprint(['α', 'β']), record_fingerprint(['β', 'α']))
+        self.assertNotEqual(record_fingerprint(['αβ', None]), record_fingerprint(['α', 'β']))
+        self.assertNotEqual(record_fingerprint(['α']), record_fingerprint(['α', None]))
+
+    def test_person_fingerprint(self):
+        values = _values(1)
+        person = Person(ari8mosEisagoghs=1, **values)
+        self.assertEqual(person_fingerprint(person), record_fingerprint(values[field] for field in FIELDS))
+        person.titlos = 'Άλλος τίτλος'
+        self.assertNotEqual(person_fingerprint(person), record_fingerprint(values[field] for field in FIELDS))
+
+    def test_file_fingerprint(self):
+        data = b'ari8mos,titlos\n' * 1000
+        file = io.BytesIO(data)
+        file.seek(100)
+        self.assertEqual(file_fingerprint(file, block_size=64), hashlib.sha256(data).hexdigest())
+        self.assertEqual(file.tell(), 0)
+        self.assertEqual(file_fingerprint(file), file_fingerprint(io.BytesIO(data)))
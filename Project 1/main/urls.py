@@ -10,7 +10,10 @@ urlpatterns = [
     path('signup/', SignUpView.as_view(), name='signup'),
     path('accounts/', include('django.contrib.auth.urls')),
     path('people/', views.show_people, name='show_people'),
+    path('people/count/', views.people_count, name='people_count'),
     path('upload/', views.upload_excel, name='upload_excel'),
+    path('upload/progress/<int:job_id>/', views.upload_progress, name='upload_progress'),
+    path('upload/result/<int:job_id>/', views.upload_job_result, name='upload_job_result'),
     path('duplicates/', views.resolve_duplicates, name='resolve_duplicates'),
     
     path('duplicates/resolve/', views.resolve_duplicates, name='resolve_duplicates'),
@@ -2,19 +2,28 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.core.paginator import Paginator
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
-import pandas as pd
 from .forms import UploadExcelForm, CustomUserCreationForm, PersonForm
-from .models import Person, UploadLog
+from .models import REVIEW, Person, UploadLog, StagedUpload, StagedRow, IngestionJob
+from .ingestion import COLUMNS, FIELDS
+from .pipeline import changed_fields
+from .jobs import UploadInProgress, enqueue_upload, claim_job, run_job
+from .search import SEARCH_MODES, SIMILAR, contains, default_mode, fulltext_available, search_people
+from .pagination import FROM, PER_PAGE, CountedPaginator, encode_cursor, keyset_ordered, keyset_page
+from .counts import PersonCounts
+from .bulk import apply_excel_rows
+from django.db import transaction
+from django.conf import settings
 from django.contrib.auth.forms import UserCreationForm
 from django.urls import reverse_lazy, reverse
 from django.views.generic import CreateView
 from .forms import PersonManualForm
 from django.db.models.functions import Cast, Trim
 from django.db.models import Func
-from django.db.models import IntegerField, Value, CharField, F, Q, Max
+from django.db.models import IntegerField, Value, CharField, F, Q, Max, Count
 from django.http import HttpResponse, JsonResponse, HttpResponseForbidden
 from django.template.loader import render_to_string
 from django import forms
+from functools import wraps
 
 
 
@@ -39,13 +48,14 @@ def incomplete_records(request):
         Q(sthlh2__isnull=True)
     ).order_by('ari8mosEisagoghs')  # Order to get first one consistently
     
-    count = incomplete.count()
+    counts = PersonCounts()
+    count = counts.count(incomplete)
     first_incomplete = incomplete.first()  # Get the first incomplete record
     
     return render(request, 'incomplete_records.html', {
         'count': count,
         'records': incomplete[:100],  # Show first 100 records
-        'total_records': Person.objects.count(),
+        'total_records': counts.total,
         'first_incomplete': first_incomplete,  # Pass to template
     })
 
@@ -56,7 +66,7 @@ def incomplete_records(request):
 def autocomplete_title(request):
     q = request.GET.get('q', '')
     results = (
-        Person.objects.filter(titlos__icontains=q)
+        Person.objects.filter(contains('titlos', q))
         .values_list('titlos', flat=True)
         .distinct()[:10]
     )
@@ -67,7 +77,7 @@ def autocomplete_title(request):
 def autocomplete_ekdoths(request):
     q = request.GET.get('q', '')
     results = (
-        Person.objects.filter(ekdoths__icontains=q)
+        Person.objects.filter(contains('ekdoths', q))
         .values_list('ekdoths', flat=True)
         .distinct()[:10]
     )
@@ -84,88 +94,40 @@ class SignUpView( CreateView):
     
     
 
-def clean(value):
-    if pd.isna(value):
-        return None
-    return str(value).strip()
-    
-def clean_ari8mos(value):
-    if pd.isna(value):
-        return None
-    try:
-        return str(int(value))  # 115011.0 → "115011"
-    except (ValueError, TypeError):
-        return str(value).strip() 
-
-def clean_numeric_or_text(value):
+def _search_transaction(view):
     """
-    For fields that can be numeric (like year "2012") or contain 
-    special characters (like "[2012]"). Removes .0 from clean numbers
-    but preserves text with special characters.
+    Runs SIMILAR searches in a transaction: their similarity threshold is
+    set only for the current transaction (main.search).
     """
-    if pd.isna(value):
-        return None
-    
-    # If it's a float and a whole number, convert to int then string
-    if isinstance(value, float):
-        if value.is_integer():
-            return str(int(value))  # 2012.0 → "2012"
-        return str(value).strip()  # 2012.5 → "2012.5"
-    
-    # Otherwise just convert to string
-    return str(value).strip()
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.GET.get('search_mode') == SIMILAR:
+            with transaction.atomic():
+                return view(request, *args, **kwargs)
+        return view(request, *args, **kwargs)
+    return wrapper
 
-@login_required
-def show_people(request):
+
+def _people_queryset(request):
+    """
+    The records of show_people for the search and range of the request:
+    (qs, search, search_category, search_mode, filtered).
+    """
     qs = (
         Person.objects
         .exclude(ari8mosEisagoghs__isnull=True)
         .order_by("ari8mosEisagoghs")
     )
 
-    # 🔍 Search
+    # 🔍 Search (main.search: full-text ή substring)
     search = request.GET.get('search', '').strip()
     search_category = request.GET.get('search_category', 'all')  # New parameter
-    
-    if search:
-        if search_category == 'all':
-            # Search all fields (original behavior)
-            q = Q(titlos__icontains=search) | Q(syggrafeas__icontains=search)
-            
-            if search.isdigit():
-                q |= Q(ari8mosEisagoghs=int(search))
-                
-            qs = qs.filter(q)
-            
-        elif search_category == 'ari8mos':
-            # Search only by number
-            if search.isdigit():
-                qs = qs.filter(ari8mosEisagoghs=int(search))
-            else:
-                # If non-numeric input for number search, show no results
-                qs = qs.none()
-                
-        elif search_category == 'hmeromhnia_eis':
-            # Search only by hmeromhnia_eis
-            qs = qs.filter(hmeromhnia_eis__icontains=search)
-            
-        elif search_category == 'titlos':
-            # Search only by title
-            qs = qs.filter(titlos__icontains=search)
-            
-        elif search_category == 'syggrafeas':
-            # Search only by author
-            qs = qs.filter(syggrafeas__icontains=search)
-            
-        elif search_category == 'ekdoths':
-            # Search only by publisher
-            qs = qs.filter(ekdoths__icontains=search)
-            
-        elif search_category == 'ISBN':
-            # Search only by ISBN
-            qs = qs.filter(ISBN__icontains=search)
-            
-        
+    search_mode = request.GET.get('search_mode') or default_mode()
+    if search_mode not in dict(SEARCH_MODES):
+        search_mode = default_mode()
+
+    qs = search_people(qs, search, search_category, search_mode)
+
     # 📊 Range filter
     from_num = request.GET.get('from_num')
     to_num = request.GET.get('to_num')
@@ -175,11 +137,54 @@ def show_people(request):
           ari8mosEisagoghs__gte=int(from_num),
           ari8mosEisagoghs__lte=int(to_num)
        )
-       
-    # 📄 Pagination
-    paginator = Paginator(qs, 200)
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)  
+
+    filtered = bool(search) or bool(from_num and to_num)
+    return qs, search, search_category, search_mode, filtered
+
+
+@login_required
+@_search_transaction
+def show_people(request):
+    qs, search, search_category, search_mode, filtered = _people_queryset(request)
+    # 🔢 Πλήθη από το main.counts: στην πρώτη σελίδα, μόνο για αναζητήσεις
+    counts = PersonCounts()
+
+    # 📄 Pagination: με κλειδί (main.pagination, χωρίς COUNT/OFFSET) όταν η
+    # λίστα είναι κατά αριθμό εισαγωγής· με αριθμό σελίδας για τα
+    # αποτελέσματα κατά συνάφεια και τα παλιά links με ?page=
+    keyset = keyset_ordered(qs) and 'page' not in request.GET
+    if keyset:
+        cursor = request.GET.get('cursor')
+        goto = request.GET.get('goto', '').strip()
+        if goto.isdigit():
+            cursor = encode_cursor(FROM, int(goto))
+        # Το cache (και η έκδοση των δεδομένων) πριν από τη σελίδα: ένα
+        # πλήθος δεν αποθηκεύεται με έκδοση νεότερη από τη μέτρησή του
+        counted = filtered and cursor is None
+        result_count = counts.cached(qs) if counted else None
+        page_obj = keyset_page(qs, cursor)
+        no_results = not page_obj.object_list and not page_obj.has_previous()
+
+        if counted and not page_obj.has_next():
+            # Όλα τα αποτελέσματα χωράνε στη σελίδα
+            if result_count is None:
+                counts.remember(qs, len(page_obj))
+            result_count = len(page_obj)
+        # Χωρίς πλήθος στο cache: εκτίμηση τώρα, το ακριβές από το people_count
+        count_pending = counted and result_count is None
+    else:
+        paginator = CountedPaginator(qs, PER_PAGE, counts.count(qs))
+        page_number = request.GET.get('page', 1)
+        page_obj = paginator.get_page(page_number)
+        result_count = paginator.count
+        no_results = result_count == 0
+        count_pending = False
+    count_url = None
+    count_estimate = None
+    if count_pending:
+        count_url = f"{reverse('people_count')}?{request.GET.urlencode()}"
+        # Τουλάχιστον όσα έχει η σελίδα και η επόμενη
+        count_estimate = max(counts.estimate(qs), PER_PAGE + 1)
 
     # ✅ AJAX request - return JSON
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -188,51 +193,59 @@ def show_people(request):
         },
             request=request 
         )
+        if keyset:
+            return JsonResponse({
+                'html': html,
+                'pagination': 'keyset',
+                'has_previous': page_obj.has_previous(),
+                'has_next': page_obj.has_next(),
+                'previous_cursor': page_obj.previous_cursor,
+                'next_cursor': page_obj.next_cursor,
+                'last_cursor': page_obj.last_cursor,
+                'first_number': page_obj.first_number,
+                'last_number': page_obj.last_number,
+                'result_count': result_count,
+                'count_estimate': count_estimate,
+                'count_url': count_url,
+            })
         return JsonResponse({
             'html': html,
+            'pagination': 'pages',
             'has_previous': page_obj.has_previous(),
             'has_next': page_obj.has_next(),
             'current_page': page_obj.number,
             'total_pages': page_obj.paginator.num_pages,
+            'result_count': result_count,
+            'count_estimate': None,
+            'count_url': None,
         })
         
 
 
     return render(request, "main/people.html", {
         "page_obj": page_obj,
+        "keyset": keyset,
+        "result_count": result_count,
+        "count_estimate": count_estimate,
+        "count_url": count_url,
+        "no_results": no_results,
         "search": search,
         "search_category": search_category,
+        "search_mode": search_mode,
+        "search_modes": SEARCH_MODES if fulltext_available() else (),
         
         
     })
 
 
+@login_required
+@_search_transaction
+def people_count(request):
+    """The exact number of results of a show_people search (cached)."""
+    qs, *_ = _people_queryset(request)
+    return JsonResponse({'count': PersonCounts().count(qs)})
 
 
-def generate_koha_from_author(author):
-    """
-    Converts 'surname,name,extra' → 'name surname extra'
-    """
-    if not author or "," not in author:
-        return None
-    
-    
-    # Normalize commas
-    author = author.replace("，", ",")
-
-    parts = [p.strip() for p in author.split(",") if p.strip()]
-    
-    if len(parts) < 2:
-        return None
-
-    surname = parts[0]
-    name = parts[1]
-    extra = " ".join(parts[2:]) if len(parts) > 2 else ""
-    result = f"{name} {surname}"
-    if extra:
-        result = f"{result} {extra}"
-        
-    return result
 
 
 @login_required
@@ -242,353 +255,230 @@ def upload_excel(request):
 
         if form.is_valid():
             excel_file = request.FILES['excel_file']
-            df = pd.read_excel(excel_file)
-            
-            # ✅ υπάρχοντα IDs στη βάση
-            existing_ids = set(
-                Person.objects.values_list('ari8mosEisagoghs', flat=True)
-            )
-
-            # 🔴 Νέο set για να εντοπίζει διπλότυπα μέσα στο ίδιο Excel
-            seen_in_file = set()
-
-            added = []
-            skipped = []
-            duplicates = []
-            potential_insertions = []  # NEW: για κενές εγγραφές
-            new_objects = []
-
-            for index, row in df.iterrows():
-                raw_ari8mos = clean_ari8mos(row.get('ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ'))
-                syggrafeas = clean(row.get('ΣΥΓΓΡΑΦΕΑΣ'))
-                koha = clean(row.get('ΣΥΓΓΡΑΦΕΑΣ KOHA'))
-                
-                if (koha is None or koha == "") and syggrafeas:
-                   koha = generate_koha_from_author(syggrafeas)
-                
-                try:
-                    ari8mos = int(raw_ari8mos)
-                except (TypeError, ValueError):
-                    skipped.append({
-                      'row': index + 2,
-                      'reason': 'Invalid ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ'
-                    })
-                    continue
-
-                if not ari8mos:
-                    skipped.append({
-                        'row': index + 2,
-                        'reason': 'Missing ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ'
-                    })
-                    continue
-
-                # 🔴 DUPLICATE ΜΕΣΑ ΣΤΟ ΙΔΙΟ EXCEL
-                if ari8mos in seen_in_file:
-                    skipped.append({
-                        'row': index + 2,
-                        'reason': 'Duplicate ΑΡΙΘΜΟΣ ΕΙΣΑΓΩΓΗΣ inside Excel'
-                    })
-                    continue
-                seen_in_file.add(ari8mos)
-
-                # 🔴 DUPLICATE CHECK (existing_ids = βάση δεδομένων)
-                if ari8mos in existing_ids:
-                    existing_person = Person.objects.filter(ari8mosEisagoghs=ari8mos).first()
-
-                    if not existing_person:
-                        # Ασφαλές insert
-                        new_objects.append(Person(
-                            ari8mosEisagoghs=ari8mos,
-                            hmeromhnia_eis=clean_numeric_or_text(row.get('ΗΜΕΡΟΜΗΝΙΑ ΕΙΣΑΓΩΓΗΣ')),
-                            syggrafeas=clean(row.get('ΣΥΓΓΡΑΦΕΑΣ')),
-                            koha=koha,
-                            titlos=clean(row.get('ΤΙΤΛΟΣ')),
-                            ekdoths=clean(row.get('ΕΚΔΟΤΗΣ')),
-                            ekdosh=clean(row.get('ΕΚΔΟΣΗ')),
-                            etosEkdoshs=clean_numeric_or_text(row.get('ΕΤΟΣ ΕΚΔΟΣΗΣ')),
-                            toposEkdoshs=clean(row.get('ΤΟΠΟΣ  ΕΚΔΟΣΗΣ')),
-                            sxhma=clean(row.get('ΣΧΗΜΑ')),
-                            selides=clean(row.get('ΣΕΛΙΔΕΣ')),
-                            tomos=clean(row.get('ΤΟΜΟΣ')),
-                            troposPromPar=clean(row.get('ΤΡΟΠΟΣ ΠΡΟΜΗΘΕΙΑΣ ΠΑΡΑΤΗΡΗΣΕΙΣ')),
-                            ISBN=clean_numeric_or_text(row.get('ISBN')),
-                            sthlh1=clean_numeric_or_text(row.get('Στήλη1')),
-                            sthlh2=clean_numeric_or_text(row.get('Στήλη2')),
-                        ))
-                        existing_ids.add(ari8mos)
-                        continue
-
-                    # ✅ NEW: Check if existing record is empty (all fields null except ari8mos and hmeromhnia_eis)
-                    is_empty_record = all([
-                        not existing_person.syggrafeas,
-                        not existing_person.koha,
-                        not existing_person.titlos,
-                        not existing_person.ekdoths,
-                        not existing_person.ekdosh,
-                        not existing_person.etosEkdoshs,
-                        not existing_person.toposEkdoshs,
-                        not existing_person.sxhma,
-                        not existing_person.selides,
-                        not existing_person.tomos,
-                        #not existing_person.troposPromPar,
-                        not existing_person.ISBN,
-                        not existing_person.sthlh1,
-                        not existing_person.sthlh2,
-                    ])
-
-                    if is_empty_record:
-                        # This is a potential new insertion (empty record in DB)
-                        potential_insertions.append({
-                            "ari8mos": ari8mos,
-                            "database": {
-                                "ari8mos": existing_person.ari8mosEisagoghs,
-                                "hmeromhnia_eis": existing_person.hmeromhnia_eis,
-                            },
-                            "excel": {
-                                "ari8mos": ari8mos,
-                                "hmeromhnia_eis": clean_numeric_or_text(row.get('ΗΜΕΡΟΜΗΝΙΑ ΕΙΣΑΓΩΓΗΣ')),
-                                "syggrafeas": clean(row.get('ΣΥΓΓΡΑΦΕΑΣ')),
-                                "koha": koha,
-                                "titlos": clean(row.get('ΤΙΤΛΟΣ')),
-                                "ekdoths": clean(row.get('ΕΚΔΟΤΗΣ')),
-                                "ekdosh": clean(row.get('ΕΚΔΟΣΗ')),
-                                "etosEkdoshs": clean_numeric_or_text(row.get('ΕΤΟΣ ΕΚΔΟΣΗΣ')),
-                                "toposEkdoshs": clean(row.get('ΤΟΠΟΣ  ΕΚΔΟΣΗΣ')),
-                                "sxhma": clean(row.get('ΣΧΗΜΑ')),
-                                "selides": clean(row.get('ΣΕΛΙΔΕΣ')),
-                                "tomos": clean(row.get('ΤΟΜΟΣ')),
-                                "troposPromPar": clean(row.get('ΤΡΟΠΟΣ ΠΡΟΜΗΘΕΙΑΣ ΠΑΡΑΤΗΡΗΣΕΙΣ')),
-                                "ISBN": clean_numeric_or_text(row.get('ISBN')),
-                                "sthlh1": clean_numeric_or_text(row.get('Στήλη1')),
-                                "sthlh2": clean_numeric_or_text(row.get('Στήλη2')),
-                            },
-                        })
-                        continue
-
-                    # Πραγματικό duplicate → αποθήκευση για resolve
-                    duplicates.append({
-                        "left": {
-                            "ari8mos": existing_person.ari8mosEisagoghs,
-                            "hmeromhnia_eis": existing_person.hmeromhnia_eis,
-                            "syggrafeas": existing_person.syggrafeas,
-                            "koha": existing_person.koha,
-                            "titlos": existing_person.titlos,
-                            "ekdoths": existing_person.ekdoths,
-                            "ekdosh": existing_person.ekdosh,
-                            "etosEkdoshs": existing_person.etosEkdoshs,
-                            "toposEkdoshs": existing_person.toposEkdoshs,
-                            "sxhma": existing_person.sxhma,
-                            "selides": existing_person.selides,
-                            "tomos": existing_person.tomos,
-                            "troposPromPar": existing_person.troposPromPar,
-                            "ISBN": existing_person.ISBN,
-                            "sthlh1": existing_person.sthlh1,
-                            "sthlh2": existing_person.sthlh2,
-                        },
-                        "right": {
-                            "ari8mos": ari8mos,
-                            "hmeromhnia_eis": clean_numeric_or_text(row.get('ΗΜΕΡΟΜΗΝΙΑ ΕΙΣΑΓΩΓΗΣ')),
-                            "syggrafeas": clean(row.get('ΣΥΓΓΡΑΦΕΑΣ')),
-                            "koha": koha,
-                            "titlos": clean(row.get('ΤΙΤΛΟΣ')),
-                            "ekdoths": clean(row.get('ΕΚΔΟΤΗΣ')),
-                            "ekdosh": clean(row.get('ΕΚΔΟΣΗ')),
-                            "etosEkdoshs": clean_numeric_or_text(row.get('ΕΤΟΣ ΕΚΔΟΣΗΣ')),
-                            "toposEkdoshs": clean(row.get('ΤΟΠΟΣ  ΕΚΔΟΣΗΣ')),
-                            "sxhma": clean(row.get('ΣΧΗΜΑ')),
-                            "selides": clean(row.get('ΣΕΛΙΔΕΣ')),
-                            "tomos": clean(row.get('ΤΟΜΟΣ')),
-                            "troposPromPar": clean(row.get('ΤΡΟΠΟΣ ΠΡΟΜΗΘΕΙΑΣ ΠΑΡΑΤΗΡΗΣΕΙΣ')),
-                            "ISBN": clean_numeric_or_text(row.get('ISBN')),
-                            "sthlh1": clean_numeric_or_text(row.get('Στήλη1')),
-                            "sthlh2": clean_numeric_or_text(row.get('Στήλη2')),
-                        },
-                    })
-                    continue
-
-                # ✅ SAFE INSERT
-                new_objects.append(Person(
-                    ari8mosEisagoghs=ari8mos,
-                    hmeromhnia_eis=clean_numeric_or_text(row.get('ΗΜΕΡΟΜΗΝΙΑ ΕΙΣΑΓΩΓΗΣ')),
-                    syggrafeas=clean(row.get('ΣΥΓΓΡΑΦΕΑΣ')),
-                    koha=koha,
-                    titlos=clean(row.get('ΤΙΤΛΟΣ')),
-                    ekdoths=clean(row.get('ΕΚΔΟΤΗΣ')),
-                    ekdosh=clean(row.get('ΕΚΔΟΣΗ')),
-                    etosEkdoshs=clean_numeric_or_text(row.get('ΕΤΟΣ ΕΚΔΟΣΗΣ')),
-                    toposEkdoshs=clean(row.get('ΤΟΠΟΣ  ΕΚΔΟΣΗΣ')),
-                    sxhma=clean(row.get('ΣΧΗΜΑ')),
-                    selides=clean(row.get('ΣΕΛΙΔΕΣ')),
-                    tomos=clean(row.get('ΤΟΜΟΣ')),
-                    troposPromPar=clean(row.get('ΤΡΟΠΟΣ ΠΡΟΜΗΘΕΙΑΣ ΠΑΡΑΤΗΡΗΣΕΙΣ')),
-                    ISBN=clean_numeric_or_text(row.get('ISBN')),
-                    sthlh1=clean_numeric_or_text(row.get('Στήλη1')),
-                    sthlh2=clean_numeric_or_text(row.get('Στήλη2')),
-                ))
-                existing_ids.add(ari8mos)
-                
-                added.append({
-                    'ari8mos': ari8mos,
-                    'titlos': clean(row.get('ΤΙΤΛΟΣ')),
-                    'syggrafeas': clean(row.get('ΣΥΓΓΡΑΦΕΑΣ')),
-                })
-           
-            # ✅ Bulk create new records (non-duplicates)
-            Person.objects.bulk_create(new_objects, batch_size=1000)
-
-            # ✅ Store data in session for duplicate resolution
-            request.session['duplicates'] = duplicates
-            request.session['potential_insertions'] = potential_insertions
-            request.session['new_records_count'] = len(new_objects)
-            request.session['skipped_count'] = len(skipped)
-
-            # ✅ If there are duplicates or potential insertions, redirect to resolution page
-            if duplicates or potential_insertions:
-                return redirect('resolve_duplicates')
-
-            # ✅ Log upload
-            UploadLog.objects.create(
-                user=request.user,
-                filename=excel_file.name,
-                rows_added=len(new_objects),
-                rows_updated=0,
-            )
-
-            total_records = Person.objects.count()
-
-            # No duplicates, go straight to results
-            return render(request, 'upload_result.html', {
-                'added_count': len(new_objects),
-                'duplicate_count': 0,
-                'skipped_count': len(skipped),
-                'total_records': total_records,
-            })
+
+            # Ένα νέο upload αντικαθιστά ό,τι είχε μείνει ανεπίλυτο
+            discard_staged_upload(request)
+
+            # ✅ Το αρχείο μπαίνει στην ουρά· τη δουλειά την κάνει ο worker
+            try:
+                job = enqueue_upload(request.user, excel_file, form.cleaned_data['conflict_policy'])
+            except UploadInProgress as e:
+                # 🔴 Το ίδιο αρχείο τρέχει ήδη: δείχνουμε την πρόοδο εκείνου
+                messages.warning(request, f'Το αρχείο {e.job.filename} ανεβαίνει ήδη. Δείτε την πρόοδο παρακάτω.')
+                return redirect(f"{reverse('upload_excel')}?job={e.job.pk}")
+            if settings.INGESTION_INLINE:
+                claimed = claim_job(job)
+                if claimed is not None:
+                    run_job(claimed)
+
+            return redirect(f"{reverse('upload_excel')}?job={job.pk}")
 
     else:
         form = UploadExcelForm()
 
-    return render(request, 'upload_excel.html', {'form': form})
+    job = None
+    job_id = request.GET.get('job', '')
+    if job_id.isdigit():
+        job = IngestionJob.objects.filter(pk=int(job_id), user=request.user).first()
+
+    return render(request, 'upload_excel.html', {'form': form, 'job': job})
 
 
+PROGRESS_FIELDS = (
+    'status', 'rows_processed', 'rows_added', 'rows_updated', 'rows_staged',
+    'rows_duplicates', 'rows_empty_records', 'rows_skipped', 'rows_unchanged', 'error',
+)
+
+@login_required
+def upload_progress(request, job_id):
+    """JSON με την πρόοδο ενός upload, για το polling της σελίδας upload."""
+    job = get_object_or_404(IngestionJob, pk=job_id, user=request.user)
+
+    redirect_url = None
+    if job.status == IngestionJob.DONE:
+        if job.staged_upload_id:
+            request.session['staged_upload_id'] = job.staged_upload_id
+            redirect_url = reverse('resolve_duplicates')
+        else:
+            redirect_url = reverse('upload_job_result', args=[job.pk])
+
+    return JsonResponse({
+        **{field: getattr(job, field) for field in PROGRESS_FIELDS},
+        'redirect_url': redirect_url,
+    })
+
+
+@login_required
+def upload_job_result(request, job_id):
+    """Αποτελέσματα ενός upload χωρίς διπλότυπα."""
+    job = get_object_or_404(IngestionJob, pk=job_id, user=request.user, status=IngestionJob.DONE)
+
+    return render(request, 'upload_result.html', {
+        'added_count': job.rows_added,
+        'updated_count': job.rows_updated,
+        'duplicate_count': 0,
+        'skipped_count': job.rows_skipped + job.rows_kept,
+        'unchanged_count': job.rows_unchanged,
+        'identical_upload': job.identical_upload,
+        'total_records': PersonCounts().total,
+    })
+
+
+# Πόσα διπλότυπα εμφανίζονται ανά σελίδα στην επίλυση
+RESOLVE_PAGE_SIZE = 100
+
+# Οι επικεφαλίδες του Excel ως ετικέτες στη σύγκριση
+FIELD_LABELS = {field: header for header, field, _ in COLUMNS}
+
+
+def get_staged_upload(request):
+    """The staged upload of the session, if it belongs to this user."""
+    upload_id = request.session.get('staged_upload_id')
+    if upload_id is None:
+        return None
+    return StagedUpload.objects.filter(pk=upload_id, user=request.user).first()
+
+
+def discard_staged_upload(request, staged_upload=None):
+    staged_upload = staged_upload or get_staged_upload(request)
+    if staged_upload is not None:
+        staged_upload.delete()
+    request.session.pop('staged_upload_id', None)
+
+
+def staged_counts(staged_upload):
+    return staged_upload.rows.aggregate(
+        duplicates=Count('pk', filter=Q(kind=StagedRow.DUPLICATE)),
+        insertions=Count('pk', filter=Q(kind=StagedRow.EMPTY_RECORD)),
+    )
+
 
 @login_required
 def resolve_duplicates(request):
     """Show all duplicates and potential insertions for user to review"""
-    duplicates = request.session.get('duplicates', [])  # Changed from 'main/duplicates'
-    potential_insertions = request.session.get('potential_insertions', [])
+    staged_upload = get_staged_upload(request)
+    counts = staged_counts(staged_upload) if staged_upload else None
     
-    if not duplicates and not potential_insertions:
+    if not counts or not (counts['duplicates'] or counts['insertions']):
         messages.info(request, 'No duplicates or potential insertions to resolve.')
         return redirect('upload_excel')
+
+    paginator = Paginator(
+        staged_upload.rows.order_by('kind', 'ari8mos'),
+        RESOLVE_PAGE_SIZE,
+    )
+    paginator.count = counts['duplicates'] + counts['insertions']  # ήδη γνωστό, χωρίς COUNT
+    page_obj = paginator.get_page(request.GET.get('page', 1))
+
+    # Τα δεδομένα της βάσης μόνο για τις γραμμές αυτής της σελίδας
+    people = Person.objects.in_bulk([row.ari8mos for row in page_obj])
+
+    duplicates = []
+    potential_insertions = []
+    for row in page_obj:
+        excel = {"ari8mos": row.ari8mos, **dict(zip(FIELDS, row.excel_data))}
+        person = people.get(row.ari8mos)
+        database = {
+            "ari8mos": row.ari8mos,
+            **{field: getattr(person, field, None) for field in FIELDS},
+        }
+        if row.kind == StagedRow.DUPLICATE:
+            # 🔴 Σημειώνουμε τα πεδία που διαφέρουν από τη βάση
+            changed = set(changed_fields(person, row.excel_data)) if person else set(FIELDS)
+            duplicates.append({
+                "left": database,
+                "right": excel,
+                "cells": [
+                    {
+                        "label": FIELD_LABELS[field],
+                        "excel": excel[field],
+                        "database": database[field],
+                        "changed": field in changed,
+                    }
+                    for field in FIELDS
+                ],
+                "changed_labels": [FIELD_LABELS[field] for field in FIELDS if field in changed],
+            })
+        else:
+            potential_insertions.append({
+                "ari8mos": row.ari8mos,
+                "database": database,
+                "excel": excel,
+            })
     
     return render(request, 'main/resolve_duplicates.html', {  # Make sure path is correct
         'duplicates': duplicates,
         'potential_insertions': potential_insertions,
-        'duplicate_count': len(duplicates),
-        'insertion_count': len(potential_insertions),
+        'duplicate_count': counts['duplicates'],
+        'insertion_count': counts['insertions'],
+        'page_obj': page_obj,
     })
 
+
+def _selected_staged_rows(staged_upload, kind, select_all, selected_ids):
+    """{ari8mos: {field: value}} for the staged rows the user selected."""
+    rows = staged_upload.rows.filter(kind=kind)
+    if not select_all:
+        rows = rows.filter(ari8mos__in=[int(i) for i in selected_ids if i.isdigit()])
+    return {
+        ari8mos: dict(zip(FIELDS, excel_data))
+        for ari8mos, excel_data in rows.values_list('ari8mos', 'excel_data').iterator(chunk_size=2000)
+    }
+
+
 @login_required
 def replace_all_duplicates(request):
     """Replace selected database records with Excel data"""
     if request.method == 'POST':
-        duplicates = request.session.get('duplicates', [])  # Changed from 'main/duplicates'
-        potential_insertions = request.session.get('potential_insertions', [])
-        
-        # Get selected IDs from POST data
-        selected_duplicate_ids = request.POST.getlist('duplicate_ids[]')
-        selected_insertion_ids = request.POST.getlist('insertion_ids[]')
-        
-        updated_count = 0
-        inserted_count = 0
-        
-        # Handle selected duplicates
-        for dup in duplicates:
-            ari8mos = str(dup['left']['ari8mos'])
-            
-            # Only process if selected
-            if ari8mos not in selected_duplicate_ids:
-                continue
-            
-            try:
-                person = Person.objects.get(ari8mosEisagoghs=int(ari8mos))
-                
-                # Update with Excel data (from 'right')
-                person.hmeromhnia_eis = dup['right']['hmeromhnia_eis']
-                person.syggrafeas = dup['right']['syggrafeas']
-                person.koha = dup['right']['koha']
-                person.titlos = dup['right']['titlos']
-                person.ekdoths = dup['right']['ekdoths']
-                person.ekdosh = dup['right']['ekdosh']
-                person.etosEkdoshs = dup['right']['etosEkdoshs']
-                person.toposEkdoshs = dup['right']['toposEkdoshs']
-                person.sxhma = dup['right']['sxhma']
-                person.selides = dup['right']['selides']
-                person.tomos = dup['right']['tomos']
-                person.troposPromPar = dup['right']['troposPromPar']
-                person.ISBN = dup['right']['ISBN']
-                person.sthlh1 = dup['right']['sthlh1']
-                person.sthlh2 = dup['right']['sthlh2']
-                
-                person.save()
-                updated_count += 1
-                
-            except Person.DoesNotExist:
-                continue
+        staged_upload = get_staged_upload(request)
+        if staged_upload is None:
+            messages.info(request, 'No duplicates or potential insertions to resolve.')
+            return redirect('upload_excel')
         
-        # Handle selected potential insertions (empty records)
-        for insertion in potential_insertions:
-            ari8mos = str(insertion['ari8mos'])
-            
-            # Only process if selected
-            if ari8mos not in selected_insertion_ids:
-                continue
-            
-            try:
-                person = Person.objects.get(ari8mosEisagoghs=int(ari8mos))
-                
-                # Fill empty record with Excel data
-                person.hmeromhnia_eis = insertion['excel']['hmeromhnia_eis']
-                person.syggrafeas = insertion['excel']['syggrafeas']
-                person.koha = insertion['excel']['koha']
-                person.titlos = insertion['excel']['titlos']
-                person.ekdoths = insertion['excel']['ekdoths']
-                person.ekdosh = insertion['excel']['ekdosh']
-                person.etosEkdoshs = insertion['excel']['etosEkdoshs']
-                person.toposEkdoshs = insertion['excel']['toposEkdoshs']
-                person.sxhma = insertion['excel']['sxhma']
-                person.selides = insertion['excel']['selides']
-                person.tomos = insertion['excel']['tomos']
-                person.troposPromPar = insertion['excel']['troposPromPar']
-                person.ISBN = insertion['excel']['ISBN']
-                person.sthlh1 = insertion['excel']['sthlh1']
-                person.sthlh2 = insertion['excel']['sthlh2']
-                
-                person.save()
-                inserted_count += 1
-                
-            except Person.DoesNotExist:
-                continue
+        # Get selected IDs from POST data (ή όλες τις σελίδες με all_duplicates / all_insertions)
+        selected_duplicates = _selected_staged_rows(
+            staged_upload, StagedRow.DUPLICATE,
+            request.POST.get('all_duplicates') == '1',
+            request.POST.getlist('duplicate_ids[]'),
+        )
+        selected_insertions = _selected_staged_rows(
+            staged_upload, StagedRow.EMPTY_RECORD,
+            request.POST.get('all_insertions') == '1',
+            request.POST.getlist('insertion_ids[]'),
+        )
+
+        counts = staged_counts(staged_upload)
+
+        # ✅ Όλα σε ένα transaction, με ένα UPDATE ανά batch
+        with transaction.atomic():
+            updated_count = apply_excel_rows(selected_duplicates, 'replace duplicates')
+            inserted_count = apply_excel_rows(selected_insertions, 'fill empty records')
         
-        # Get counts from session
-        new_records_count = request.session.get('new_records_count', 0)
-        skipped_count = request.session.get('skipped_count', 0)
+        new_records_count = staged_upload.rows_added
+        skipped_count = staged_upload.rows_skipped
+        person_counts = PersonCounts()
+        # Μόνο αν αντικαταστάθηκαν όλες, το ίδιο αρχείο δεν έχει κάτι ακόμα
+        applied_all = (
+            len(selected_duplicates) == counts['duplicates']
+            and len(selected_insertions) == counts['insertions']
+        )
         
         # Log upload
         UploadLog.objects.create(
             user=request.user,
-            filename='Excel Upload',
+            filename=staged_upload.filename,
             rows_added=new_records_count,
             rows_updated=updated_count + inserted_count,
+            file_hash=staged_upload.file_hash,
+            conflict_policy=REVIEW,
+            data_version=person_counts.version if applied_all else None,
+            **{**staged_upload.metrics, 'rows_empty_filled': inserted_count},
         )
         
-        # Clear session
-        request.session.pop('duplicates', None)
-        request.session.pop('potential_insertions', None)
-        request.session.pop('new_records_count', None)
-        request.session.pop('skipped_count', None)
+        # Clear staged rows
+        discard_staged_upload(request, staged_upload)
         
-        total_records = Person.objects.count()
+        total_records = person_counts.total
         
         if updated_count > 0 or inserted_count > 0:
             messages.success(request, f'Successfully replaced {updated_count} duplicates and filled {inserted_count} empty records!')
@@ -600,6 +490,7 @@ def replace_all_duplicates(request):
             'updated_count': updated_count + inserted_count,
             'duplicate_count': 0,
             'skipped_count': skipped_count,
+            'unchanged_count': staged_upload.rows_unchanged,
             'total_records': total_records,
         })
     
@@ -609,28 +500,33 @@ def replace_all_duplicates(request):
 def skip_all_duplicates(request):
     """Skip all duplicates and insertions - keep database records as they are"""
     if request.method == 'POST':
-        duplicates = request.session.get('duplicates', [])  # Changed from 'main/duplicates'
-        potential_insertions = request.session.get('potential_insertions', [])
-        new_records_count = request.session.get('new_records_count', 0)
-        skipped_count = request.session.get('skipped_count', 0)
+        staged_upload = get_staged_upload(request)
+        if staged_upload is None:
+            messages.info(request, 'No duplicates or potential insertions to resolve.')
+            return redirect('upload_excel')
+
+        counts = staged_counts(staged_upload)
+        new_records_count = staged_upload.rows_added
+        skipped_count = staged_upload.rows_skipped
         
-        # Log upload
+        # Log upload (χωρίς data_version: οι γραμμές που παραλείφθηκαν
+        # ξαναπερνούν από επίλυση, αν ανέβει πάλι το ίδιο αρχείο)
         UploadLog.objects.create(
             user=request.user,
-            filename='Excel Upload',
+            filename=staged_upload.filename,
             rows_added=new_records_count,
             rows_updated=0,
+            file_hash=staged_upload.file_hash,
+            conflict_policy=REVIEW,
+            **staged_upload.metrics,
         )
         
-        # Clear session
-        request.session.pop('duplicates', None)
-        request.session.pop('potential_insertions', None)
-        request.session.pop('new_records_count', None)
-        request.session.pop('skipped_count', None)
+        # Clear staged rows
+        discard_staged_upload(request, staged_upload)
         
-        total_records = Person.objects.count()
+        total_records = PersonCounts().total
         
-        total_skipped = len(duplicates) + len(potential_insertions)
+        total_skipped = counts['duplicates'] + counts['insertions']
         
         messages.info(request, f'Skipped {total_skipped} records (duplicates and empty records). Database unchanged.')
         
@@ -639,6 +535,7 @@ def skip_all_duplicates(request):
             'updated_count': 0,
             'duplicate_count': 0,
             'skipped_count': skipped_count + total_skipped,
+            'unchanged_count': staged_upload.rows_unchanged,
             'total_records': total_records,
         })
     
@@ -646,7 +543,6 @@ def skip_all_duplicates(request):
 
 
 
-
 # ———————————————— Υπόλοιπες view functions παραμένουν ίδιες ————————————————
 
 